@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Módulo 'cache' de Pydatajson
+
+Contiene estructuras para guardar resultados ya calculados (en memoria o en
+disco) y reutilizarlos entre distintas llamadas a la librería.
+"""
+
+from __future__ import unicode_literals, print_function, with_statement, absolute_import
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from six import text_type
+
+from . import json_backend
+
+DEFAULT_MAX_ITEMS = 10000
+
+
+def fingerprint(obj):
+    """Calcula un hash del contenido de un objeto serializable a JSON.
+
+    El objeto se serializa en forma canónica (claves ordenadas, sin espacios)
+    así dos objetos con el mismo contenido tienen el mismo hash, sin importar
+    el orden en que se insertaron sus claves.
+
+    Args:
+        obj (dict, list, str, int...): Objeto serializable a JSON.
+
+    Returns:
+        str: Hash hexadecimal del contenido de `obj`.
+    """
+    canonical = json.dumps(obj, sort_keys=True, separators=(",", ":"),
+                           ensure_ascii=False, default=text_type)
+
+    return hashlib.sha1(text_type(canonical).encode("utf-8")).hexdigest()
+
+
+class BaseStore(object):
+    """Interfaz común de los almacenes de resultados.
+
+    Cada almacén lleva la cuenta de los aciertos (`hits`) y fallos (`misses`)
+    de las consultas hechas con `get()`.
+    """
+
+    def __init__(self, max_items=DEFAULT_MAX_ITEMS):
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Devuelve el valor guardado en `key`, o `default` si no existe."""
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """Guarda `value` en `key`, descartando los valores usados hace más
+        tiempo si se supera `max_items`."""
+        raise NotImplementedError
+
+    def invalidate(self, key=None):
+        """Elimina el valor guardado en `key`, o todos si no se pasa una."""
+        raise NotImplementedError
+
+    def stats(self):
+        """Devuelve un resumen de uso del almacén."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": float(self.hits) / total if total else 0.0,
+            "items": len(self)
+        }
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class MemoryStore(BaseStore):
+    """Almacén en memoria con política de descarte LRU."""
+
+    def __init__(self, max_items=DEFAULT_MAX_ITEMS):
+        super(MemoryStore, self).__init__(max_items)
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            value = self._items.pop(key, None)
+            if value is not None:
+                # lo vuelve a insertar como el más reciente
+                self._items[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            while self.max_items and len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._items.clear()
+            else:
+                self._items.pop(key, None)
+
+    def keys(self):
+        with self._lock:
+            return list(self._items.keys())
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SQLiteStore(BaseStore):
+    """Almacén persistente en un archivo SQLite con política de descarte LRU.
+
+    Los valores se guardan serializados como JSON, por lo que sólo admite
+    valores serializables.
+
+    Args:
+        path (str): Path al archivo SQLite. Se crea si no existe.
+        max_items (int): Cantidad máxima de valores a conservar.
+    """
+
+    def __init__(self, path, max_items=DEFAULT_MAX_ITEMS):
+        super(SQLiteStore, self).__init__(max_items)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS store ("
+                "key TEXT PRIMARY KEY, value TEXT, last_access REAL)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS store_last_access "
+                "ON store (last_access)")
+
+    def _get(self, key):
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value FROM store WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE store SET last_access = ? WHERE key = ?",
+                (time.time(), key))
+        return json_backend.loads(row[0])
+
+    def set(self, key, value):
+        serialized = json_backend.dumps(value)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO store VALUES (?, ?, ?)",
+                (key, serialized, time.time()))
+            excess = self._count() - (self.max_items or float("inf"))
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM store WHERE key IN ("
+                    "SELECT key FROM store ORDER BY last_access LIMIT ?)",
+                    (int(excess),))
+
+    def invalidate(self, key=None):
+        with self._lock, self._conn:
+            if key is None:
+                self._conn.execute("DELETE FROM store")
+            else:
+                self._conn.execute("DELETE FROM store WHERE key = ?", (key,))
+
+    def close(self):
+        self._conn.close()
+
+    def _count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM store").fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._count()
+
+
+class BoundedMemoryStore(MemoryStore):
+    """Almacén en memoria con política de descarte LRU, que además acota el
+    tamaño total de los valores guardados y su tiempo de vida.
+
+    Args:
+        max_items (int): Cantidad máxima de valores a conservar.
+        max_bytes (int): Suma máxima de los tamaños (declarados en `set()`)
+            de los valores a conservar. Si es None, no se acota.
+        ttl (int o float): Segundos durante los que un valor es válido. Si es
+            None, los valores no vencen.
+    """
+
+    def __init__(self, max_items=DEFAULT_MAX_ITEMS, max_bytes=None, ttl=None):
+        super(BoundedMemoryStore, self).__init__(max_items)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+
+    def _get(self, key):
+        entry = super(BoundedMemoryStore, self)._get(key)
+        if entry is None:
+            return None
+
+        value, size, expires = entry
+        if expires is not None and expires < time.time():
+            self.invalidate(key)
+            return None
+        return value
+
+    def set(self, key, value, size=0):
+        """Guarda `value` en `key`, descartando los valores usados hace más
+        tiempo si se supera `max_items` o `max_bytes`. Un valor más grande
+        que `max_bytes` no se guarda."""
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.invalidate(key)
+            return
+
+        expires = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._discard(key)
+            self._items[key] = (value, size, expires)
+            self.bytes += size
+            while self._items and (
+                    (self.max_items and len(self._items) > self.max_items) or
+                    (self.max_bytes is not None and
+                     self.bytes > self.max_bytes)):
+                self._discard(next(iter(self._items)))
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._items.clear()
+                self.bytes = 0
+            else:
+                self._discard(key)
+
+    def stats(self):
+        stats = super(BoundedMemoryStore, self).stats()
+        stats["bytes"] = self.bytes
+        return stats
+
+    def _discard(self, key):
+        entry = self._items.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
@@ -7,12 +7,12 @@ de CKAN v3.
 from __future__ import unicode_literals, print_function, with_statement, absolute_import
 import os.path
 import logging
-import json
 from six.moves.urllib_parse import urljoin
 from six import iteritems
 from ckanapi import RemoteCKAN
 
 from .helpers import clean_str, title_to_name
+from . import json_backend
 
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -21,12 +21,12 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 ABSOLUTE_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
 with open(os.path.join(ABSOLUTE_PROJECT_DIR, "schemas",
                        "accrualPeriodicity.json")) as frequencies:
-    RAW_FREQUENCIES = json.load(frequencies)
+    RAW_FREQUENCIES = json_backend.load(frequencies)
     FREQUENCIES = {row["description"]: row["id"] for row in RAW_FREQUENCIES}
 
 with open(os.path.join(ABSOLUTE_PROJECT_DIR, "schemas",
                        "superThemeTaxonomy.json")) as super_themes:
-    RAW_SUPER_THEMES = json.load(super_themes)
+    RAW_SUPER_THEMES = json_backend.load(super_themes)
     SUPER_THEMES = {row["label"]: row["id"] for row in RAW_SUPER_THEMES}
 
 logging.basicConfig(format='%(asctime)s [%(levelname)s]: %(message)s',
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Módulo 'compression' de Pydatajson
+
+Contiene los métodos auxiliares para leer y escribir archivos comprimidos
+(gzip, bzip2, xz y, si está instalado el paquete `zstandard`, zstd), en
+forma incremental.
+"""
+
+from __future__ import unicode_literals, print_function, with_statement, absolute_import
+
+import bz2
+import gzip
+import io
+import itertools
+import zlib
+
+# sufijos de archivo de las compresiones soportadas, y la firma con la que
+# empieza el contenido comprimido en cada una
+MAGIC_NUMBERS = {
+    "gz": b"\x1f\x8b",
+    "bz2": b"BZh",
+    "xz": b"\xfd7zXZ\x00",
+    "zst": b"\x28\xb5\x2f\xfd",
+}
+COMPRESSIONS = list(MAGIC_NUMBERS.keys())
+
+
+def get_compression(path):
+    """Devuelve la compresión que indica el sufijo de `path` ("gz", "bz2",
+    "xz" o "zst"), o None si no es un archivo comprimido."""
+    suffix = path.split(".")[-1].strip("/")
+    return suffix if suffix in COMPRESSIONS else None
+
+
+def strip_compression_suffix(path):
+    """Devuelve `path` sin el sufijo de compresión, si lo tiene."""
+    if get_compression(path):
+        return path.rstrip("/").rsplit(".", 1)[0]
+    return path
+
+
+def iter_decompressed(chunks, compression):
+    """Descomprime bloques de bytes en forma incremental.
+
+    Si el contenido no empieza con la firma de `compression` (por ejemplo,
+    porque un servidor HTTP ya lo descomprimió al enviarlo con
+    Content-Encoding), los bloques se devuelven sin cambios.
+
+    Args:
+        chunks (iterable): Bloques de bytes del contenido comprimido.
+        compression (str): Compresión del contenido (ver `COMPRESSIONS`).
+
+    Yields:
+        bytes: Bloques del contenido descomprimido.
+    """
+    chunks = iter(chunks)
+    magic_number = MAGIC_NUMBERS[compression]
+
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= len(magic_number):
+            break
+
+    if not head.startswith(magic_number):
+        yield head
+        for chunk in chunks:
+            yield chunk
+        return
+
+    decompressor = _decompressor(compression)
+    for chunk in itertools.chain([head], chunks):
+        while chunk:
+            if _reached_end(decompressor):
+                if not chunk.strip(b"\x00"):
+                    # relleno de ceros tras el último miembro, que gzip admite
+                    break
+                # el contenido sigue con otro miembro (gzip) o stream (bzip2,
+                # xz), que se descomprime a continuación
+                if hasattr(decompressor, "flush"):
+                    yield decompressor.flush()
+                decompressor = _decompressor(compression)
+            yield decompressor.decompress(chunk)
+            chunk = getattr(decompressor, "unused_data", b"")
+    if hasattr(decompressor, "flush"):
+        yield decompressor.flush()
+
+
+def open_compressed(path, mode="rb"):
+    """Abre un archivo comprimido según el sufijo de `path`, en modo
+    binario ("rb" o "wb")."""
+    compression = get_compression(path)
+    if compression == "gz":
+        return gzip.GzipFile(path, mode)
+    elif compression == "bz2":
+        return bz2.BZ2File(path, mode)
+    elif compression == "xz":
+        return _import_lzma().LZMAFile(path, mode)
+    elif compression == "zst":
+        zstandard = _import_zstandard()
+        raw_file = io.open(path, mode)
+        if "w" in mode:
+            return zstandard.ZstdCompressor().stream_writer(raw_file)
+        return zstandard.ZstdDecompressor().stream_reader(raw_file)
+    else:
+        raise ValueError("{} no es un archivo comprimido conocido. Pruebe "
+                         "con {}".format(path, ", ".join(COMPRESSIONS)))
+
+
+def _decompressor(compression):
+    if compression == "gz":
+        # 16 + MAX_WBITS indica a zlib que espere el encabezado de gzip
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif compression == "bz2":
+        return bz2.BZ2Decompressor()
+    elif compression == "xz":
+        return _import_lzma().LZMADecompressor()
+    else:
+        return _import_zstandard().ZstdDecompressor().decompressobj()
+
+
+def _reached_end(decompressor):
+    """Indica si un descompresor llegó al final de su miembro o stream."""
+    if hasattr(decompressor, "eof"):
+        return decompressor.eof
+    # los descompresores de python 2 no tienen "eof"
+    return bool(getattr(decompressor, "unused_data", b""))
+
+
+def _import_lzma():
+    try:
+        import lzma
+    except ImportError:
+        try:
+            from backports import lzma
+        except ImportError:
+            raise ValueError(
+                "Para leer o escribir archivos .xz se requiere Python 3 o "
+                "el paquete 'backports.lzma'.")
+    return lzma
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("Para leer o escribir archivos .zst se requiere el "
+                         "paquete 'zstandard'.")
+    return zstandard
@@ -12,6 +12,7 @@ from __future__ import unicode_literals
 from __future__ import with_statement
 
 import io
+import itertools
 import json
 import os.path
 import re
@@ -24,11 +25,13 @@ from openpyxl.styles import Alignment, Font
 from six import string_types, iteritems
 from six.moves.urllib_parse import urljoin
 
+from . import custom_exceptions as ce
 from . import documentation
 from . import helpers
 from . import indicators
 from . import readers
 from . import search
+from . import snapshot
 from . import validation
 from . import writers
 from . import federation
@@ -52,7 +55,7 @@ class DataJson(dict):
     CATALOG_FIELDS_PATH = os.path.join(ABSOLUTE_PROJECT_DIR, "fields")
 
     def __init__(self, catalog=None, schema_filename=None, schema_dir=None,
-                 default_values=None):
+                 default_values=None, validator_engine=None):
         """Crea un manipulador de `data.json`s.
 
         Salvo que se indique lo contrario, el validador de esquemas asociado
@@ -63,11 +66,22 @@ class DataJson(dict):
                 validador.
             schema_dir (str): Directorio (absoluto) donde se encuentra el
                 esquema validador (y sus referencias, de tenerlas).
+            validator_engine (str): Motor de validación ("jsonschema" o
+                "compiled"). Ver `validation.create_validator`.
         """
+        # se guarda el origen del catálogo para poder detectar cuándo un
+        # snapshot suyo queda desactualizado (ver `to_snapshot`)
+        self.catalog_source = (catalog if isinstance(catalog, string_types)
+                               else None)
+        self.default_values = default_values
+
         # se construye el objeto DataJson con la interfaz de un dicconario
         if catalog:
+            # DataJson modifica el catálogo, así que nunca usa el de sólo
+            # lectura de la cache
             catalog = readers.read_catalog(catalog,
-                                           default_values=default_values)
+                                           default_values=default_values,
+                                           writable=True)
             for key, value in iteritems(catalog):
                 self[key] = value
             self.has_catalog = True
@@ -75,7 +89,13 @@ class DataJson(dict):
             self.has_catalog = False
 
         self.validator = validation.create_validator(
-            schema_filename, schema_dir)
+            schema_filename, schema_dir, validator_engine)
+
+        # índices por identificador y título para las búsquedas de entidades
+        self.search_index = search.CatalogIndex(self)
+        # índice de texto libre, que se arma la primera vez que se lo usa
+        # (ver `search.get_fulltext_index`)
+        self.fulltext_index = None
 
         # asigno docstrings de los métodos modularizados
         fn_doc = indicators.generate_catalogs_indicators.__doc__
@@ -101,6 +121,8 @@ class DataJson(dict):
     get_theme = search.get_theme
     get_field_location = search.get_field_location
     get_catalog_metadata = search.get_catalog_metadata
+    get_fulltext_index = search.get_fulltext_index
+    search_text = search.search_text
 
     # metodos para guardar el catálogo en otros formatos
     to_xlsx = writers.write_xlsx_catalog
@@ -109,10 +131,85 @@ class DataJson(dict):
     # Metodos para interactuar con un portal de CKAN
     push_dataset_to_ckan = federation.push_dataset_to_ckan
 
+    def to_snapshot(self, path):
+        """Guarda el catálogo en un snapshot binario, que se carga mucho más
+        rápido que su JSON o XLSX de origen (ver `from_snapshot`).
+
+        Args:
+            path (str): Path del snapshot a escribir.
+
+        Raises:
+            ValueError: Si el catálogo se leyó de una URL cuyo servidor no
+                informa ETag ni Last-Modified: no podría saberse cuándo el
+                snapshot queda desactualizado.
+        """
+        snapshot.write_snapshot(self, path, source=self.catalog_source,
+                                default_values=self.default_values)
+
+    @classmethod
+    def from_snapshot(cls, path, catalog=None, default_values=None,
+                      **kwargs):
+        """Crea un DataJson a partir de un snapshot escrito con
+        `to_snapshot`.
+
+        Si se indica el catálogo de origen y el snapshot no existe o está
+        desactualizado (porque el archivo de origen cambió, o porque fue
+        escrito con otra versión de pydatajson), se lee el catálogo y se
+        reescribe el snapshot. Si no se lo indica, se verifica el origen
+        guardado en el snapshot.
+
+        Args:
+            path (str): Path del snapshot.
+            catalog (str): Path o URL del catálogo de origen.
+            default_values (dict): Valores default a aplicar al catálogo.
+            **kwargs: Argumentos de `DataJson` (por ejemplo,
+                `schema_filename`).
+
+        Returns:
+            DataJson: El catálogo cargado.
+
+        Raises:
+            StaleSnapshotError: Si el snapshot no puede usarse y no se indicó
+                el catálogo de origen.
+            ValueError: Si hay que reescribir el snapshot de un catálogo
+                remoto cuyo servidor no informa ETag ni Last-Modified (ver
+                `to_snapshot`).
+        """
+        try:
+            catalog_dict = snapshot.read_snapshot(
+                path, source=catalog, default_values=default_values)
+        except ce.StaleSnapshotError:
+            if catalog is None:
+                raise
+            datajson = cls(catalog, default_values=default_values, **kwargs)
+            datajson.to_snapshot(path)
+            return datajson
+
+        datajson = cls(catalog_dict, **kwargs)
+        datajson.catalog_source = catalog
+        datajson.default_values = default_values
+        return datajson
+
+    def __setitem__(self, key, value):
+        super(DataJson, self).__setitem__(key, value)
+        self._catalog_changed()
+
+    def __delitem__(self, key):
+        super(DataJson, self).__delitem__(key)
+        self._catalog_changed()
+
+    def _catalog_changed(self):
+        # los índices de búsqueda se crean después de cargar el catálogo
+        if getattr(self, "search_index", None) is not None:
+            self.search_index.invalidate()
+
     def remove_dataset(self, identifier):
         for index, dataset in enumerate(self["dataset"]):
             if dataset["identifier"] == identifier:
                 self["dataset"].pop(index)
+                self.search_index.invalidate()
+                if self.fulltext_index is not None:
+                    self.fulltext_index.remove_dataset(identifier)
                 print("Dataset {} en posicion {} fue eliminado.".format(
                     identifier, index))
                 return
@@ -126,6 +223,9 @@ class DataJson(dict):
                         (not dataset_identifier or
                          dataset["identifier"] == dataset_identifier)):
                     dataset["distribution"].pop(index)
+                    self.search_index.invalidate()
+                    if self.fulltext_index is not None:
+                        self.fulltext_index.add_dataset(dataset)
                     print("Distribution {} del dataset {} en posicion {} fue eliminada.".format(
                         identifier, dataset["identifier"], index))
                     return
@@ -136,48 +236,16 @@ class DataJson(dict):
         catalog = catalog or self
         return validation.is_valid_catalog(catalog, validator=self.validator)
 
-    @staticmethod
-    def _update_validation_response(error, response):
-        """Actualiza la respuesta por default acorde a un error de
-        validación."""
-        new_response = response.copy()
-
-        # El status del catálogo entero será ERROR
-        new_response["status"] = "ERROR"
-
-        # Adapto la información del ValidationError recibido a los fines
-        # del validador de DataJsons
-        error_info = {
-            # Error Code 1 para "campo obligatorio faltante"
-            # Error Code 2 para "error en tipo o formato de campo"
-            "error_code": 1 if error.validator == "required" else 2,
-            "message": error.message,
-            "validator": error.validator,
-            "validator_value": error.validator_value,
-            "path": list(error.path),
-            # La instancia validada es irrelevante si el error es de tipo 1
-            "instance": (None if error.validator == "required" else
-                         error.instance)
-        }
-
-        # Identifico a qué nivel de jerarquía sucedió el error.
-        if len(error.path) >= 2 and error.path[0] == "dataset":
-            # El error está a nivel de un dataset particular o inferior
-            position = new_response["error"]["dataset"][error.path[1]]
-        else:
-            # El error está a nivel de catálogo
-            position = new_response["error"]["catalog"]
-
-        position["status"] = "ERROR"
-        position["errors"].append(error_info)
-
-        return new_response
-
     def validate_catalog(self, catalog=None, only_errors=False, fmt="dict",
-                         export_path=None):
+                         export_path=None, validation_cache=None,
+                         workers=None, max_errors_per_dataset=None,
+                         max_total_errors=None, streaming=False):
         catalog = catalog or self
         return validation.validate_catalog(
-            catalog, only_errors, fmt, export_path, validator=self.validator)
+            catalog, only_errors, fmt, export_path, validator=self.validator,
+            validation_cache=validation_cache, workers=workers,
+            max_errors_per_dataset=max_errors_per_dataset,
+            max_total_errors=max_total_errors, streaming=streaming)
 
     @staticmethod
     def _stringify_list(str_or_list):
@@ -410,6 +478,10 @@ el argumento 'report'. Por favor, intentelo nuevamente.""")
         url = catalog if isinstance(catalog, string_types) else None
         catalog = readers.read_catalog(catalog)
 
+        # lee el reporte una única vez, en lugar de una vez por dataset
+        if harvest == 'report' and report:
+            report = self._extract_datasets_to_harvest(report)
+
         validation = self.validate_catalog(catalog)
         catalog_validation = validation["error"]["catalog"]
         datasets_validations = validation["error"]["dataset"]
@@ -435,6 +507,20 @@ el argumento 'report'. Por favor, intentelo nuevamente.""")
 
         return catalog_report
 
+    def _catalog_error_report(self, error, catalog, catalog_id, catalog_org):
+        """Genera la línea de `generate_datasets_report` que reemplaza a
+        los datasets de un catálogo que no se pudo reportar."""
+        url = catalog if isinstance(catalog, string_types) else None
+        catalog_fields = self._catalog_report_helper(
+            {}, {"status": "ERROR"}, url, catalog_id, catalog_org)
+        dataset_report = self._dataset_report(
+            {"distribution": []}, {"status": "ERROR"}, None, catalog_fields,
+            harvest="none")
+        dataset_report["notas"] = "No se pudo procesar el catálogo: {}".format(
+            error)
+
+        return dataset_report
+
     def generate_datasets_report(
             self, catalogs, harvest='valid', report=None,
             export_path=None, catalog_ids=None, catalog_homepages=None,
@@ -462,7 +548,9 @@ el argumento 'report'. Por favor, intentelo nuevamente.""")
 
         Returns:
             list: Contiene tantos dicts como datasets estén presentes en
-                `catalogs`, con la data del reporte generado.
+                `catalogs`, con la data del reporte generado. Cada catálogo
+                que no se pudo procesar aporta un único dict, con harvest=0 y el
+                error en "notas".
         """
         assert isinstance(catalogs, string_types + (dict, list))
         if isinstance(catalogs, list):
@@ -482,13 +570,18 @@ el argumento 'report'. Por favor, intentelo nuevamente.""")
                                                string_types + (dict,)):
             catalog_homepages = [catalog_homepages] * len(catalogs)
 
+        def report_catalog(index, catalog):
+            return self.catalog_report(
+                catalog, harvest, report, catalog_id=catalog_ids[index],
+                catalog_homepage=catalog_homepages[index],
+                catalog_org=catalog_orgs[index])
+
+        # un catálogo que no se pudo reportar no interrumpe al resto
         catalogs_reports = [
-            self.catalog_report(
-                catalog, harvest, report, catalog_id=catalog_id,
-                catalog_homepage=catalog_homepage, catalog_org=catalog_org
-            )
-            for catalog, catalog_id, catalog_org, catalog_homepage in
-            zip(catalogs, catalog_ids, catalog_orgs, catalog_homepages)
+            rows if error is None else [self._catalog_error_report(
+                error, catalog, catalog_ids[index], catalog_orgs[index])]
+            for index, (catalog, (rows, error)) in enumerate(zip(
+                catalogs, readers.map_catalogs(report_catalog, catalogs)))
         ]
 
         full_report = []
@@ -569,7 +662,7 @@ el argumento 'report'. Por favor, intentelo nuevamente.""")
                 raise ValueError("""
 Usted eligio 'report' como criterio de harvest, pero no proveyo un valor para
 el argumento 'report'. Por favor, intentelo nuevamente.""")
-            datasets_report = readers.read_table(report)
+            datasets_report = readers.iter_table(report)
         elif harvest in ['valid', 'none', 'all']:
             # catalogs no puede faltar para estos criterios
             assert isinstance(catalogs, string_types + (dict, list))
@@ -647,36 +740,55 @@ actualizacion original de cada dataset.""".format(frequency))
                 especifica `export_path`, el método no devolverá nada.
 
         Returns:
-            list of dicts: Lista de catálogos.
+            list of dicts: Lista de los catálogos que se pudieron leer. Cada
+                catálogo que no se pudo leer se omite y se advierte con un
+                warning.
         """
         assert isinstance(catalogs, string_types + (dict, list))
         # Si se pasa un único catálogo, genero una lista que lo contenga
         if isinstance(catalogs, string_types + (dict,)):
             catalogs = [catalogs]
 
-        harvestable_catalogs = [readers.read_catalog(c) for c in catalogs]
-        catalogs_urls = [catalog if isinstance(catalog, string_types)
-                         else None for catalog in catalogs]
+        # un catálogo que no se pudo leer no interrumpe al resto: se advierte
+        # y se omite de la salida
+        harvestable_catalogs = []
+        for idx, (catalog, error) in enumerate(
+                readers.read_catalogs(catalogs)):
+            if error is None:
+                catalog_url = (catalogs[idx] if isinstance(
+                    catalogs[idx], string_types) else None)
+                harvestable_catalogs.append((idx, catalog_url, catalog))
+            else:
+                warnings.warn("No se pudo leer el catálogo {}: {}".format(
+                    idx, error))
 
         # aplica los criterios de cosecha
         if harvest == 'all':
             pass
         elif harvest == 'none':
-            for catalog in harvestable_catalogs:
+            for _, _, catalog in harvestable_catalogs:
                 catalog["dataset"] = []
         elif harvest == 'valid':
-            report = self.generate_datasets_report(catalogs, harvest)
-            return self.generate_harvestable_catalogs(
-                catalogs=catalogs, harvest='report', report=report,
-                export_path=export_path)
+            # valida los catálogos ya leídos, sin volver a leerlos
+            for _, _, catalog in harvestable_catalogs:
+                if ("dataset" in catalog and
+                        isinstance(catalog["dataset"], list)):
+                    validations = self.validate_catalog(
+                        catalog)["error"]["dataset"]
+                    catalog["dataset"] = [
+                        dataset for dataset, validation in zip(
+                            catalog["dataset"], validations)
+                        if validation["status"] == "OK"
+                    ]
+                else:
+                    catalog["dataset"] = []
         elif harvest == 'report':
             if not report:
                 raise ValueError("""
 Usted eligio 'report' como criterio de harvest, pero no proveyo un valor para
 el argumento 'report'. Por favor, intentelo nuevamente.""")
             datasets_to_harvest = self._extract_datasets_to_harvest(report)
-            for idx_cat, catalog in enumerate(harvestable_catalogs):
-                catalog_url = catalogs_urls[idx_cat]
+            for _, catalog_url, catalog in harvestable_catalogs:
                 if ("dataset" in catalog and
                         isinstance(catalog["dataset"], list)):
                     catalog["dataset"] = [
@@ -694,14 +806,15 @@ el argumento 'report'. Por favor, intentelo nuevamente.""")
         # devuelve los catálogos harvesteables
         if export_path and os.path.isdir(export_path):
             # Creo un JSON por catálogo
-            for idx, catalog in enumerate(harvestable_catalogs):
+            for idx, _, catalog in harvestable_catalogs:
                 filename = os.path.join(export_path, "catalog_{}".format(idx))
                 writers.write_json(catalog, filename)
         elif export_path:
             # Creo un único JSON con todos los catálogos
-            writers.write_json(harvestable_catalogs, export_path)
+            writers.write_json([catalog for _, _, catalog in
+                                harvestable_catalogs], export_path)
         else:
-            return harvestable_catalogs
+            return [catalog for _, _, catalog in harvestable_catalogs]
 
     def generate_datasets_summary(self, catalog, export_path=None):
         """Genera un informe sobre los datasets presentes en un catálogo,
@@ -897,8 +1010,12 @@ Por favor, consulte el informe [`datasets.csv`](datasets.csv).
                                               len(x) == 2 for x in report])):
             return report
 
-        table = readers.read_table(report)
-        table_keys = table[0].keys()
+        # Recorro el reporte de a una fila, sin cargarlo entero en memoria
+        table = readers.iter_table(report)
+        first_row = next(table, None)
+        if first_row is None:
+            return []
+        table_keys = first_row.keys()
         expected_keys = ["catalog_metadata_url", "dataset_title",
                          "dataset_accrualPeriodicity"]
 
@@ -909,24 +1026,26 @@ Por favor, consulte el informe [`datasets.csv`](datasets.csv).
 El reporte no contiene la clave obligatoria {}. Pruebe con otro archivo.
 """.format(key))
 
+        rows = itertools.chain([first_row], table)
         if "harvest" in table_keys:
             # El archivo es un reporte de datasets.
             datasets_to_harvest = [
                 (row["catalog_metadata_url"], row["dataset_title"]) for row in
-                table if int(row["harvest"])]
+                rows if int(row["harvest"])]
         else:
             # El archivo es un config de harvester.
             datasets_to_harvest = [
                 (row["catalog_metadata_url"], row["dataset_title"]) for row in
-                table]
+                rows]
 
         return datasets_to_harvest
 
     def generate_catalogs_indicators(self, catalogs=None,
-                                     central_catalog=None):
+                                     central_catalog=None, streaming=False):
         catalogs = catalogs or self
         return indicators.generate_catalogs_indicators(
-            catalogs, central_catalog, validator=self.validator)
+            catalogs, central_catalog, validator=self.validator,
+            streaming=streaming)
 
     @staticmethod
     def _count_distribution_formats_dataset(dataset):
@@ -331,3 +331,18 @@ class ThemeTaxonomyNonExistentError(Exception):
     def __init__(self, dataset_id):
         msg = "Catalogo no tiene themeTaxonomy"
         super(ThemeTaxonomyNonExistentError, self).__init__(msg)
+
+
+class CatalogReadTimeoutError(Exception):
+
+    def __init__(self, catalog, timeout):
+        msg = "No se pudo leer el catalogo {} en {} segundos".format(
+            catalog, timeout)
+        super(CatalogReadTimeoutError, self).__init__(msg)
+
+
+class StaleSnapshotError(Exception):
+
+    def __init__(self, path, reason):
+        msg = "El snapshot {} no puede usarse: {}".format(path, reason)
+        super(StaleSnapshotError, self).__init__(msg)
@@ -8,12 +8,41 @@ Contiene métodos para descargar archivos a través del protocolo HTTP.
 from __future__ import unicode_literals, print_function, with_statement
 from __future__ import absolute_import
 
-import requests
+import hashlib
+import io
+import os
+import threading
 import time
 
+import requests
+from requests.adapters import HTTPAdapter
+from six.moves.urllib_parse import urlparse
+from urllib3.util.retry import Retry
+
+from . import helpers
+from . import json_backend
+
 DEFAULT_TRIES = 1
 RETRY_DELAY = 1
 
+# configuración de las lecturas de catálogos remotos (ver `configure`)
+DEFAULT_TIMEOUT = 60
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = [500, 502, 503, 504]
+POOL_MAXSIZE = 10
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_transport = {
+    "timeout": DEFAULT_TIMEOUT,
+    "retries": DEFAULT_RETRIES,
+    "backoff_factor": DEFAULT_BACKOFF_FACTOR,
+    "cache_dir": None,
+    "verify": False
+}
+_sessions = {}
+_sessions_lock = threading.Lock()
+
 
 def download(url, tries=DEFAULT_TRIES, retry_delay=RETRY_DELAY,
              try_timeout=None, proxies=None, verify=True):
@@ -35,8 +64,10 @@ def download(url, tries=DEFAULT_TRIES, retry_delay=RETRY_DELAY,
     """
     for i in range(tries):
         try:
-            return requests.get(url, timeout=try_timeout, proxies=proxies,
-                                verify=verify).content
+            # los intentos son los de `tries`: la sesión no reintenta
+            return get_session(url, retries=False).get(
+                url, timeout=try_timeout, proxies=proxies,
+                verify=verify).content
         except Exception as e:
             download_exception = e
 
@@ -60,3 +91,183 @@ def download_to_file(url, file_path, **kwargs):
     content = download(url, **kwargs)
     with open(file_path, "wb") as f:
         f.write(content)
+
+
+def configure(timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+              backoff_factor=DEFAULT_BACKOFF_FACTOR, cache_dir=None,
+              verify=False):
+    """Configura cómo se leen los catálogos y esquemas remotos.
+
+    Todas las lecturas de `readers` usan una `requests.Session` por host,
+    que reutiliza las conexiones entre pedidos al mismo servidor.
+
+    Args:
+        timeout (int o float o tuple): Tiempo máximo a esperar, en segundos,
+            para conectar y para recibir cada respuesta. Puede ser una tupla
+            (conexión, lectura).
+        retries (int): Reintentos ante errores de conexión o respuestas con
+            status en RETRY_STATUS_CODES.
+        backoff_factor (float): Factor de espera entre reintentos (ver
+            `urllib3.util.retry.Retry`).
+        cache_dir (str): Directorio de un caché HTTP en disco. Si se
+            especifica, se guardan las respuestas que tienen ETag o
+            Last-Modified y se vuelven a pedir en forma condicional: si el
+            servidor responde 304 (sin cambios), se leen del disco.
+        verify (bool): Si es True, se verifican los certificados SSL.
+    """
+    with _sessions_lock:
+        _transport.update({
+            "timeout": timeout,
+            "retries": retries,
+            "backoff_factor": backoff_factor,
+            "cache_dir": cache_dir,
+            "verify": verify
+        })
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def get_session(url, retries=True):
+    """Devuelve la sesión HTTP compartida para el host de `url`.
+
+    Args:
+        url (str): URL a pedir con la sesión.
+        retries (bool): Si es True, la sesión reintenta los pedidos según
+            `configure`. Si es False, no reintenta (la usa `download`, que
+            tiene sus propios intentos).
+    """
+    parsed_url = urlparse(url)
+    key = (parsed_url.scheme, parsed_url.netloc, retries)
+    with _sessions_lock:
+        if key not in _sessions:
+            max_retries = 0
+            if retries:
+                max_retries = Retry(
+                    total=_transport["retries"], read=_transport["retries"],
+                    connect=_transport["retries"],
+                    backoff_factor=_transport["backoff_factor"],
+                    status_forcelist=RETRY_STATUS_CODES,
+                    raise_on_status=False)
+            adapter = HTTPAdapter(max_retries=max_retries,
+                                  pool_maxsize=POOL_MAXSIZE)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[key] = session
+
+        return _sessions[key]
+
+
+def get_validators(url):
+    """Consulta los validadores HTTP (ETag y Last-Modified) del contenido
+    actual de una URL, sin descargarlo.
+
+    Returns:
+        dict: Con las claves "etag" y "last_modified" (None si el servidor
+            no informa alguno).
+    """
+    session = get_session(url)
+    res = session.head(url, allow_redirects=True,
+                       timeout=_transport["timeout"],
+                       verify=_transport["verify"])
+    if res.status_code in [405, 501]:
+        # el servidor no admite HEAD: se piden sólo los encabezados del GET
+        res = session.get(url, stream=True, timeout=_transport["timeout"],
+                          verify=_transport["verify"])
+        res.close()
+    res.raise_for_status()
+    return {
+        "etag": res.headers.get("ETag"),
+        "last_modified": res.headers.get("Last-Modified")
+    }
+
+
+def get_content(url):
+    """Descarga el contenido de una URL con la configuración de `configure`.
+
+    Returns:
+        bytes: Contenido de la respuesta.
+    """
+    return b"".join(iter_content(url))
+
+
+def iter_content(url, chunk_size=STREAM_CHUNK_SIZE):
+    """Descarga el contenido de una URL en bloques, con la configuración de
+    `configure`.
+
+    Si hay un caché en disco configurado y el servidor responde que el
+    contenido no cambió (304), los bloques se leen del caché.
+
+    Yields:
+        bytes: Cada bloque del contenido de la respuesta.
+    """
+    cache_dir = _transport["cache_dir"]
+    headers = {}
+    if cache_dir:
+        cache_paths = _cache_paths(cache_dir, url)
+        cached = _read_cache_meta(cache_paths[0])
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    res = get_session(url).get(
+        url, headers=headers, stream=True, timeout=_transport["timeout"],
+        verify=_transport["verify"])
+    tmp_path = None
+    try:
+        if cache_dir and res.status_code == 304 and headers:
+            with io.open(cache_paths[1], "rb") as cached_body:
+                for chunk in iter(lambda: cached_body.read(chunk_size), b""):
+                    yield chunk
+            return
+
+        res.raise_for_status()
+        meta = {
+            "url": url,
+            "etag": res.headers.get("ETag"),
+            "last_modified": res.headers.get("Last-Modified")
+        }
+        if not cache_dir or not (meta["etag"] or meta["last_modified"]):
+            for chunk in res.iter_content(chunk_size=chunk_size):
+                yield chunk
+            return
+
+        # guarda el contenido en el caché a medida que se descarga, en un
+        # archivo temporal propio de esta descarga: otros hilos o procesos
+        # pueden estar descargando la misma URL
+        helpers.ensure_dir_exists(cache_dir)
+        tmp_path = helpers.make_temp_file(cache_paths[1])
+        with io.open(tmp_path, "wb") as tmp_body:
+            for chunk in res.iter_content(chunk_size=chunk_size):
+                tmp_body.write(chunk)
+                yield chunk
+        helpers.replace_file(tmp_path, cache_paths[1])
+        tmp_path = helpers.make_temp_file(cache_paths[0])
+        with io.open(tmp_path, "w", encoding="utf-8") as meta_file:
+            meta_file.write(json_backend.dumps(meta))
+        helpers.replace_file(tmp_path, cache_paths[0])
+    finally:
+        res.close()
+        # una descarga interrumpida no se guarda en el caché
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _cache_paths(cache_dir, url):
+    """Paths de los metadatos y del contenido de una URL en el caché."""
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return (os.path.join(cache_dir, key + ".json"),
+            os.path.join(cache_dir, key + ".body"))
+
+
+def _read_cache_meta(meta_path):
+    body_path = os.path.splitext(meta_path)[0] + ".body"
+    if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+        return {}
+    try:
+        with io.open(meta_path, encoding="utf-8") as meta_file:
+            return json_backend.load(meta_file)
+    except ValueError:
+        return {}
@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Módulo 'fulltext' de Pydatajson
+
+Contiene un índice invertido para buscar texto libre en la metadata de un
+catálogo (títulos, descripciones, palabras clave y temas de sus datasets,
+distribuciones y campos), con resultados ordenados según BM25.
+
+Example:
+    >>> index = FullTextIndex.from_catalog("data.json")
+    >>> index.search("contrataciones electronicas")
+    >>> index.search("contrat", prefix=True)
+    >>> index.save("data.index")
+    >>> index = FullTextIndex.load("data.index")
+"""
+
+from __future__ import unicode_literals, print_function, with_statement, absolute_import
+
+import bisect
+import io
+import math
+import os
+import re
+from collections import Counter
+
+from six import iteritems, string_types, text_type
+from six.moves import cPickle as pickle
+from unidecode import unidecode
+
+from . import readers
+from .helpers import (STOP_WORDS, load_pickle_without_gc, make_temp_file,
+                      replace_file)
+
+# se incrementa cada vez que cambia la estructura del índice guardado
+FULLTEXT_FORMAT_VERSION = 2
+FULLTEXT_MAGIC = b"PYDATAJSON-FULLTEXT\n"
+# parámetros de BM25
+BM25_K1 = 1.5
+BM25_B = 0.75
+# campos indexados de cada entidad, y cuánto pesa cada aparición de un
+# término en ellos
+INDEXED_FIELDS = {
+    "dataset": {"title": 2, "description": 1, "keyword": 1, "theme": 1},
+    "distribution": {"title": 2, "description": 1},
+    "field": {"title": 2, "description": 1},
+}
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Separa un texto en términos en minúsculas y sin acentos, descartando
+    las palabras de `helpers.STOP_WORDS`."""
+    text = unidecode(text_type(text)).lower()
+    return [token for token in TOKEN_PATTERN.findall(text)
+            if token not in STOP_WORDS]
+
+
+class FullTextIndex(object):
+    """Índice invertido de la metadata de los datasets de un catálogo.
+
+    Cada dataset, distribución y campo es un documento del índice. Los
+    datasets se pueden agregar y quitar de a uno (`add_dataset`,
+    `remove_dataset`) sin reconstruir el índice. Las distribuciones y los
+    campos se identifican por su posición dentro del dataset, ya que sus
+    identificadores pueden faltar o repetirse.
+
+    Args:
+        themes (list): Taxonomía de temas del catálogo. Si se pasa, los
+            temas de los datasets se indexan también por su etiqueta y
+            descripción.
+    """
+
+    def __init__(self, themes=None):
+        self.themes = {theme.get("id"): theme for theme in themes or []}
+        # documento -> metadata, frecuencia de cada término y largo
+        self._documents = {}
+        # término -> {documento: frecuencia}
+        self._postings = {}
+        # identificador de dataset -> documentos del dataset
+        self._dataset_documents = {}
+        self._total_length = 0
+        self._sorted_terms = None
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        """Crea el índice de todos los datasets de un catálogo.
+
+        Args:
+            catalog (dict or str): Representación externa/interna de un
+                catálogo.
+
+        Raises:
+            ValueError: Si algún dataset no tiene identificador (ver
+                `add_dataset`).
+        """
+        catalog = readers.read_catalog(catalog)
+        index = cls(catalog.get("themeTaxonomy"))
+        for dataset in catalog.get("dataset", []):
+            index.add_dataset(dataset)
+        return index
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add_dataset(self, dataset):
+        """Indexa un dataset con sus distribuciones y campos. Si ya había
+        un dataset con el mismo identificador, lo reemplaza.
+
+        Raises:
+            ValueError: Si el dataset no tiene identificador: no podría
+                reemplazarse ni quitarse del índice.
+        """
+        dataset_id = dataset.get("identifier")
+        if not dataset_id:
+            raise ValueError(
+                "No se puede indexar el dataset '{}': no tiene "
+                "identificador.".format(dataset.get("title")))
+        self.remove_dataset(dataset_id)
+
+        documents = [(("dataset", dataset_id), dataset, {
+            "type": "dataset",
+            "dataset_identifier": dataset_id,
+            "title": dataset.get("title"),
+        })]
+        for distribution_position, distribution in enumerate(
+                dataset.get("distribution") or []):
+            distribution_id = distribution.get("identifier")
+            documents.append((
+                ("distribution", dataset_id, distribution_position),
+                distribution, {
+                    "type": "distribution",
+                    "dataset_identifier": dataset_id,
+                    "distribution_identifier": distribution_id,
+                    "title": distribution.get("title"),
+                }))
+            for position, field in enumerate(distribution.get("field") or []):
+                documents.append((
+                    ("field", dataset_id, distribution_position, position),
+                    field, {
+                        "type": "field",
+                        "dataset_identifier": dataset_id,
+                        "distribution_identifier": distribution_id,
+                        "field_id": field.get("id"),
+                        "title": field.get("title"),
+                    }))
+
+        self._dataset_documents[dataset_id] = []
+        for document, entity, metadata in documents:
+            self._add_document(document, entity, metadata)
+            self._dataset_documents[dataset_id].append(document)
+
+    def remove_dataset(self, identifier):
+        """Quita del índice un dataset con sus distribuciones y campos.
+
+        Returns:
+            bool: True si el dataset estaba indexado.
+        """
+        documents = self._dataset_documents.pop(identifier, None)
+        if documents is None:
+            return False
+
+        for document in documents:
+            _, frequencies, length = self._documents.pop(document)
+            self._total_length -= length
+            for term in frequencies:
+                postings = self._postings[term]
+                del postings[document]
+                if not postings:
+                    del self._postings[term]
+                    self._sorted_terms = None
+        return True
+
+    def search(self, query, limit=10, prefix=False, types=None):
+        """Busca los documentos más relevantes para un texto, según BM25.
+
+        Args:
+            query (str): Texto a buscar. Un término terminado en "*" se
+                busca como prefijo.
+            limit (int): Cantidad máxima de resultados. Si es None, se
+                devuelven todos.
+            prefix (bool): Si es True, el último término se busca como
+                prefijo (por ejemplo, mientras se escribe la consulta).
+            types (list): Tipos de documentos a devolver ("dataset",
+                "distribution" y/o "field"). Si es None, todos.
+
+        Returns:
+            list: Diccionarios con el tipo ("type"), los identificadores
+                ("dataset_identifier", "distribution_identifier", "field_id")
+                y el título ("title") de cada documento encontrado, y su
+                puntaje ("score"), de mayor a menor puntaje.
+        """
+        terms = []
+        words = query.split()
+        for position, word in enumerate(words):
+            is_prefix = word.endswith("*") or (
+                prefix and position == len(words) - 1)
+            for token in tokenize(word):
+                terms.append((token, is_prefix))
+
+        scores = Counter()
+        for token, is_prefix in terms:
+            expanded = (self._terms_with_prefix(token) if is_prefix
+                        else [token])
+            for term in expanded:
+                for document, score in self._score_term(term):
+                    scores[document] += score
+
+        results = []
+        for document, score in scores.most_common():
+            metadata = self._documents[document][0]
+            if types and metadata["type"] not in types:
+                continue
+            result = dict(metadata)
+            result["score"] = score
+            results.append(result)
+            if limit and len(results) >= limit:
+                break
+        return results
+
+    def save(self, path):
+        """Guarda el índice en un archivo, para cargarlo con `load` sin
+        volver a construirlo."""
+        state = {
+            "format": FULLTEXT_FORMAT_VERSION,
+            "themes": self.themes,
+            "documents": self._documents,
+            "postings": self._postings,
+            "dataset_documents": self._dataset_documents,
+            "total_length": self._total_length,
+        }
+        temp_path = make_temp_file(path)
+        try:
+            with io.open(temp_path, "wb") as index_file:
+                index_file.write(FULLTEXT_MAGIC)
+                pickle.dump(state, index_file, pickle.HIGHEST_PROTOCOL)
+            replace_file(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @classmethod
+    def load(cls, path):
+        """Carga un índice guardado con `save`.
+
+        Raises:
+            ValueError: Si el archivo no es un índice, o si fue guardado con
+                otra versión del formato.
+        """
+        with io.open(path, "rb") as index_file:
+            if index_file.read(len(FULLTEXT_MAGIC)) != FULLTEXT_MAGIC:
+                raise ValueError("{} no es un índice de texto.".format(path))
+            state = load_pickle_without_gc(index_file)
+        if state.get("format") != FULLTEXT_FORMAT_VERSION:
+            raise ValueError(
+                "El índice {} fue guardado con la versión {} del formato, "
+                "pero se requiere la {}. Vuelva a construirlo.".format(
+                    path, state.get("format"), FULLTEXT_FORMAT_VERSION))
+
+        index = cls()
+        index.themes = state["themes"]
+        index._documents = state["documents"]
+        index._postings = state["postings"]
+        index._dataset_documents = state["dataset_documents"]
+        index._total_length = state["total_length"]
+        return index
+
+    def _add_document(self, document, entity, metadata):
+        frequencies = Counter()
+        for field, weight in iteritems(INDEXED_FIELDS[metadata["type"]]):
+            for text in self._field_texts(entity, field):
+                for token in tokenize(text):
+                    frequencies[token] += weight
+
+        length = sum(frequencies.values())
+        self._documents[document] = (metadata, dict(frequencies), length)
+        self._total_length += length
+        for term, frequency in iteritems(frequencies):
+            if term not in self._postings:
+                self._postings[term] = {}
+                self._sorted_terms = None
+            self._postings[term][document] = frequency
+
+    def _field_texts(self, entity, field):
+        value = entity.get(field)
+        values = value if isinstance(value, list) else [value]
+        for value in values:
+            if not isinstance(value, string_types):
+                continue
+            yield value
+            # los temas se indexan también por su etiqueta y descripción
+            if field == "theme" and value in self.themes:
+                theme = self.themes[value]
+                for theme_field in ["label", "description"]:
+                    if isinstance(theme.get(theme_field), string_types):
+                        yield theme[theme_field]
+
+    def _score_term(self, term):
+        postings = self._postings.get(term)
+        if not postings:
+            return
+        documents_count = len(self._documents)
+        average_length = float(self._total_length) / documents_count
+        idf = math.log(1 + (documents_count - len(postings) + 0.5) /
+                       (len(postings) + 0.5))
+        for document, frequency in iteritems(postings):
+            length = self._documents[document][2]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+            yield document, idf * frequency * (BM25_K1 + 1) / (
+                frequency + norm)
+
+    def _terms_with_prefix(self, prefix):
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        terms = []
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
@@ -8,16 +8,20 @@ from __future__ import print_function
 from __future__ import with_statement
 
 from datetime import datetime
+import gc
 import os
-import json
 import re
+import uuid
 
 from openpyxl import load_workbook
 from six.moves.urllib_parse import urlparse
 
 from six import string_types
+from six.moves import cPickle as pickle
 from unidecode import unidecode
 
+from . import json_backend
+
 ABSOLUTE_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
 ABSOLUTE_SCHEMA_DIR = os.path.join(ABSOLUTE_PROJECT_DIR, "schemas")
 STOP_WORDS = [
@@ -95,6 +99,32 @@ def ensure_dir_exists(directory):
         os.makedirs(directory)
 
 
+def make_temp_file(path, suffix=".tmp"):
+    """Crea un archivo temporal vacío, con nombre único, junto a `path`.
+
+    Sirve para escribir un archivo completo antes de reemplazar `path` con
+    `replace_file`, sin chocar con otros hilos o procesos que escriban el
+    mismo `path`. A diferencia de `tempfile.mkstemp`, el archivo se crea con
+    los permisos por default (según la umask), que conserva al reemplazar a
+    `path`.
+    """
+    tmp_path = "{}.{}{}".format(path, uuid.uuid4().hex, suffix)
+    os.close(os.open(tmp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666))
+    return tmp_path
+
+
+def replace_file(src, dst):
+    """Renombra `src` a `dst`, reemplazándolo si existe."""
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        # python 2 no tiene os.replace, y os.rename no reemplaza archivos
+        # existentes en Windows
+        if os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
 def traverse_dict(dicc, keys, default_value=None):
     """Recorre un diccionario siguiendo una lista de claves, y devuelve
     default_value en caso de que alguna de ellas no exista.
@@ -185,9 +215,21 @@ def sheet_to_table(worksheet):
             registros incluya la hoja, y con tantas claves por diccionario como
             campos tenga la hoja.
     """
+    return list(iter_sheet_rows(worksheet))
+
 
+def iter_sheet_rows(worksheet):
+    """Recorre una hoja de libro de Excel de a una fila por vez (ver
+    `sheet_to_table`).
+
+    Args:
+        worksheet (Workbook.worksheet): Hoja de cálculo de un archivo XLSX
+            según los lee `openpyxl`
+
+    Yields:
+        dict: Cada registro de la hoja, con los headers como claves.
+    """
     headers = []
-    value_rows = []
     for row_i, row in enumerate(worksheet.iter_rows()):
 
         # lee los headers y el tamaño máximo de la hoja en columnas en fila 1
@@ -203,21 +245,13 @@ def sheet_to_table(worksheet):
         row_cells = [parse_value(cell) for index, cell in enumerate(row)
                      if index < len(headers)]
 
-        # agrega las filas siguientes que tengan al menos un campo no nulo
-        if any(row_cells):
-            value_rows.append(row_cells)
         # no se admiten filas vacías, eso determina el fin de la hoja
-        else:
+        if not any(row_cells):
             break
 
-    # convierte las filas en diccionarios con los headers como keys
-    table = [
-        # Ignoro los campos con valores nulos (None)
-        {k: v for (k, v) in zip(headers, row) if v is not None}
-        for row in value_rows
-    ]
-
-    return table
+        # convierte la fila en diccionario con los headers como keys,
+        # ignorando los campos con valores nulos (None)
+        yield {k: v for (k, v) in zip(headers, row_cells) if v is not None}
 
 
 def string_to_list(string, sep=","):
@@ -313,11 +347,28 @@ def parse_repeating_time_interval_to_str(date_str):
     with open(os.path.join(ABSOLUTE_SCHEMA_DIR,
                            "accrualPeriodicity.json"), "r") as f:
         freqs_map = {freq["id"]: freq["description"]
-                     for freq in json.load(f)}
+                     for freq in json_backend.load(f)}
 
     return freqs_map[date_str]
 
 
+def load_pickle_without_gc(pickle_file):
+    """Carga un pickle con el recolector de basura desactivado: crear
+    millones de diccionarios y listas lo dispara una y otra vez sin que haya
+    nada que recolectar.
+
+    Args:
+        pickle_file: Archivo (o mmap) abierto en modo binario.
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return pickle.load(pickle_file)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
 def get_ws_case_insensitive(wb, title):
     """Devuelve una hoja en un workbook sin importar mayúsculas/minúsculas."""
     return wb[find_ws_name(wb, title)]
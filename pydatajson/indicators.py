@@ -9,15 +9,17 @@ una red de catálogos.
 
 from __future__ import print_function, absolute_import, unicode_literals, with_statement
 
-import json
 import os
 from datetime import datetime
 
-from six import string_types
+from six import string_types, text_type
 
 from . import helpers
+from . import json_backend
 from . import readers
-from .reporting import generate_datasets_summary
+from . import search
+from .reporting import generate_datasets_summary, dataset_summary
+from .validation import iter_validated_datasets
 
 CENTRAL_CATALOG = "http://datos.gob.ar/data.json"
 ABSOLUTE_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -25,7 +27,7 @@ CATALOG_FIELDS_PATH = os.path.join(ABSOLUTE_PROJECT_DIR, "fields")
 
 
 def generate_catalogs_indicators(catalogs, central_catalog=None,
-                                 validator=None):
+                                 validator=None, streaming=False):
     """Genera una lista de diccionarios con varios indicadores sobre
     los catálogos provistos, tales como la cantidad de datasets válidos,
     días desde su última fecha actualizada, entre otros.
@@ -36,10 +38,15 @@ def generate_catalogs_indicators(catalogs, central_catalog=None,
         central_catalog (str): catálogo central sobre el cual comparar los
             datasets subidos en la lista anterior. De no pasarse no se
             generarán indicadores de federación de datasets.
+        streaming (bool): Si es True, los catálogos en formato JSON (path o
+            URL) se leen en forma incremental, de a un dataset por vez,
+            conservando en memoria sólo los campos de cada dataset necesarios
+            para los indicadores.
 
     Returns:
         tuple: 2 elementos, el primero una lista de diccionarios con los
-            indicadores esperados, uno por catálogo pasado, y el segundo
+            indicadores esperados, uno por catálogo pasado (o con la clave
+            'catalogo_error' si no se pudo leer), y el segundo
             un diccionario con indicadores a nivel global,
             datos sobre la lista entera en general.
     """
@@ -49,35 +56,58 @@ def generate_catalogs_indicators(catalogs, central_catalog=None,
     if isinstance(catalogs, string_types + (dict,)):
         catalogs = [catalogs]
 
-    # Leo todos los catálogos
-    catalogs = [readers.read_catalog(catalog) for catalog in catalogs]
+    # Leo en simultáneo los catálogos (salvo los que se leen de a un dataset
+    # por vez) y el central, una única vez para todos ellos
+    to_read = [catalog for catalog in catalogs
+               if not (streaming and readers.is_json_path_or_url(catalog))]
+    if central_catalog:
+        to_read.append(central_catalog)
+    read_results = readers.read_catalogs(to_read)
+    if central_catalog:
+        central_catalog, error = read_results.pop()
+        if error is not None:
+            raise error
+    read_results = iter(read_results)
 
     indicators_list = []
+    # Indicadores de los catálogos que se pudieron leer, para los totales
+    catalogs_indicators = []
     # Cuenta la cantidad de campos usados/recomendados a nivel global
     fields = {}
     for catalog in catalogs:
-        catalog = readers.read_catalog(catalog)
-
-        fields_count, result = _generate_indicators(
-            catalog, validator=validator)
+        if streaming and readers.is_json_path_or_url(catalog):
+            fields_count, result, catalog = _generate_streaming_indicators(
+                catalog, validator=validator)
+        else:
+            catalog, error = next(read_results)
+            if error is not None:
+                # un catálogo que no se pudo leer no interrumpe al resto
+                indicators_list.append({'catalogo_error': text_type(error)})
+                continue
+            fields_count, result = _generate_indicators(
+                catalog, validator=validator)
         if central_catalog:
             result.update(_federation_indicators(catalog,
                                                  central_catalog))
 
         indicators_list.append(result)
+        catalogs_indicators.append(result)
         # Sumo a la cuenta total de campos usados/totales
         fields = helpers.add_dicts(fields_count, fields)
 
     # Indicadores de la red entera
     network_indicators = {
-        'catalogos_cant': len(catalogs)
+        'catalogos_cant': len(catalogs),
+        'catalogos_error_cant': len(catalogs) - len(catalogs_indicators)
     }
+    if not catalogs_indicators:
+        return indicators_list, network_indicators
 
     # Sumo los indicadores individuales al total
-    indicators_total = indicators_list[0].copy()
-    for i in range(1, len(indicators_list)):
+    indicators_total = catalogs_indicators[0].copy()
+    for i in range(1, len(catalogs_indicators)):
         indicators_total = helpers.add_dicts(indicators_total,
-                                             indicators_list[i])
+                                             catalogs_indicators[i])
     network_indicators.update(indicators_total)
     # Genero los indicadores de la red entera,
     _network_indicator_percentages(fields, network_indicators)
@@ -94,18 +124,90 @@ def _generate_indicators(catalog, validator=None):
     Returns:
         dict: diccionario con los indicadores del catálogo provisto
     """
-    result = {}
     # Obtengo summary para los indicadores del estado de los metadatos
-    result.update(_generate_status_indicators(catalog, validator=validator))
-    # Genero los indicadores relacionados con fechas, y los agrego
-    result.update(_generate_date_indicators(catalog))
+    summary = generate_datasets_summary(catalog, validator=validator)
     # Agrego la cuenta de los formatos de las distribuciones
     count = _count_distribution_formats(catalog)
+    # Agrego porcentaje de campos recomendados/optativos usados
+    fields_count = _count_required_and_optional_fields(catalog)
+
+    return fields_count, _assemble_indicators(
+        catalog, summary, count, fields_count)
+
+
+def _generate_streaming_indicators(catalog, validator=None):
+    """Genera los indicadores de un catálogo individual leyéndolo de a un
+    dataset por vez (ver `readers.iter_datasets`).
+
+    Args:
+        catalog (str): path o URL a un catálogo en formato JSON
+
+    Returns:
+        tuple: la cuenta de campos usados, los indicadores del catálogo, y
+            el catálogo con sólo los campos de cada dataset necesarios para
+            los indicadores de fechas y de federación
+    """
+    catalog_fields = _load_catalog_fields()
+    summary = []
+    count = {}
+    datasets_fields_count = {}
+    light_datasets = []
+    for level, dataset, result in iter_validated_datasets(
+            catalog, validator):
+        if level == "catalog":
+            catalog = dataset
+            continue
+
+        dataset = dataset if isinstance(dataset, dict) else {}
+        summary.append(dataset_summary(result["list_index"], dataset, result))
+        count = helpers.add_dicts(
+            count, _count_distribution_formats_dataset(dataset))
+        datasets_fields_count = helpers.add_dicts(
+            datasets_fields_count,
+            _count_fields_recursive(dataset, catalog_fields["dataset"]))
+        light_datasets.append(_light_dataset(dataset))
+
+    if isinstance(catalog.get("dataset"), list):
+        catalog = dict(catalog, dataset=light_datasets)
+        fields_count = helpers.add_dicts(
+            datasets_fields_count,
+            _count_fields_recursive(catalog, {
+                key: value for key, value in catalog_fields.items()
+                if key != "dataset"
+            }))
+    else:
+        fields_count = _count_fields_recursive(catalog, catalog_fields)
+
+    return fields_count, _assemble_indicators(
+        catalog, summary, count, fields_count), catalog
+
+
+def _light_dataset(dataset):
+    """Copia de un dataset con sólo los campos que usan los indicadores de
+    fechas y de federación."""
+    light_dataset = {
+        field: dataset[field] for field in
+        ["title", "landingPage", "accrualPeriodicity", "modified", "issued"]
+        if field in dataset
+    }
+    if "publisher" in dataset:
+        publisher = dataset["publisher"]
+        if isinstance(publisher, dict):
+            publisher = {key: value for key, value in publisher.items()
+                         if key == "name"}
+        light_dataset["publisher"] = publisher
+
+    return light_dataset
+
+
+def _assemble_indicators(catalog, summary, count, fields_count):
+    result = {}
+    result.update(_generate_status_indicators(summary))
+    # Genero los indicadores relacionados con fechas, y los agrego
+    result.update(_generate_date_indicators(catalog))
     result.update({
         'distribuciones_formatos_cant': count
     })
-    # Agrego porcentaje de campos recomendados/optativos usados
-    fields_count = _count_required_and_optional_fields(catalog)
     recomendados_pct = 100 * float(fields_count['recomendado']) / \
         fields_count['total_recomendado']
     optativos_pct = 100 * float(fields_count['optativo']) / \
@@ -114,7 +216,7 @@ def _generate_indicators(catalog, validator=None):
         'campos_recomendados_pct': round(recomendados_pct, 2),
         'campos_optativos_pct': round(optativos_pct, 2)
     })
-    return fields_count, result
+    return result
 
 
 def _federation_indicators(catalog, central_catalog):
@@ -244,17 +346,17 @@ def _network_indicator_percentages(fields, network_indicators):
             round(federados_pct, 2)
 
 
-def _generate_status_indicators(catalog, validator=None):
+def _generate_status_indicators(summary):
     """Genera indicadores básicos sobre el estado de un catálogo
 
     Args:
-        catalog (dict): diccionario de un data.json parseado
+        summary (list): informe de los datasets del catálogo, generado por
+            `generate_datasets_summary`
 
     Returns:
         dict: indicadores básicos sobre el catálogo, tal como la cantidad
         de datasets, distribuciones y número de errores
     """
-    summary = generate_datasets_summary(catalog, validator=validator)
     cant_ok = 0
     cant_error = 0
     cant_distribuciones = 0
@@ -372,21 +474,8 @@ def _count_distribution_formats(catalog):
         dict: diccionario con los formatos de las distribuciones
         encontradas como claves, con la cantidad de ellos en sus valores.
     """
-
-    # Leo catálogo
-    catalog = readers.read_catalog(catalog)
-    catalog_formats = {}
-
-    for dataset in catalog.get('dataset', []):
-        dataset_formats = _count_distribution_formats_dataset(dataset)
-
-        for distribution_format in dataset_formats:
-            count_catalog = catalog_formats.get(distribution_format, 0)
-            count_dataset = dataset_formats.get(distribution_format, 0)
-            catalog_formats[
-                distribution_format] = count_catalog + count_dataset
-
-    return catalog_formats
+    return search.facets(catalog, ["distribution.format"])[
+        "distribution.format"]
 
 
 def _count_distribution_formats_dataset(dataset):
@@ -458,14 +547,16 @@ def _count_required_and_optional_fields(catalog):
 
     catalog = readers.read_catalog(catalog)
 
+    # Armado recursivo del resultado
+    return _count_fields_recursive(catalog, _load_catalog_fields())
+
+
+def _load_catalog_fields():
     # Archivo .json con el uso de cada campo. Lo cargamos a un dict
     catalog_fields_path = os.path.join(CATALOG_FIELDS_PATH,
                                        'fields.json')
     with open(catalog_fields_path) as f:
-        catalog_fields = json.load(f)
-
-    # Armado recursivo del resultado
-    return _count_fields_recursive(catalog, catalog_fields)
+        return json_backend.load(f)
 
 
 def _count_fields_recursive(dataset, fields):
@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Módulo 'json_backend' de Pydatajson
+
+Contiene las funciones con las que la librería decodifica y codifica JSON, a
+través de la implementación más rápida que esté instalada (orjson,
+python-rapidjson o ujson), o del módulo `json` de la biblioteca estándar si
+no hay ninguna.
+
+Si una implementación alternativa no puede procesar un valor (por ejemplo,
+un tipo que no sabe serializar, o un JSON con NaN), se usa `json` para ese
+valor, de modo que los resultados y los errores son los mismos con cualquier
+backend. El texto generado puede variar en la notación de los números (ej.:
+1.5e-7 en lugar de 1.5e-07), pero se decodifica a los mismos valores. orjson
+sólo sabe indentar con 2 espacios, así que las otras indentaciones (como la de
+`writers.write_json`) se generan con `json`, y el texto es idéntico al de la
+biblioteca estándar.
+
+Ejecutado como script, compara los backends instalados sobre los catálogos
+indicados:
+
+    python -m pydatajson.json_backend tests/samples/*.json
+"""
+
+from __future__ import unicode_literals, print_function, with_statement, absolute_import
+
+import io
+import json
+import sys
+import timeit
+
+from six import string_types, text_type, iteritems
+
+# backends soportados, en orden de preferencia
+JSON_BACKENDS = ["orjson", "rapidjson", "ujson", "json"]
+# tamaño mínimo de los bloques de texto que genera `iter_dumps`
+JSON_DUMP_CHUNK_SIZE = 64 * 1024
+# niveles de la estructura que `iter_dumps` recorre por su cuenta con los
+# backends alternativos: el catálogo y sus listas (ej.: "dataset"). Cada
+# elemento de esas listas se codifica de una vez.
+JSON_DUMP_STREAM_DEPTH = 2
+# indentaciones que orjson sabe generar
+ORJSON_INDENTS = [None, 2]
+
+
+class _StdlibBackend(object):
+    name = "json"
+
+    def __init__(self):
+        self.module = json
+
+    def indent_size(self, indent):
+        return indent
+
+    def loads(self, content):
+        if isinstance(content, bytes):
+            content = content.decode("utf-8")
+        return json.loads(content)
+
+    def dumps(self, obj, indent=None):
+        separators = (",", ": ") if indent else (",", ":")
+        return text_type(json.dumps(obj, indent=indent, separators=separators,
+                                    ensure_ascii=False))
+
+    def iter_dumps(self, obj, indent=None):
+        separators = (",", ": ") if indent else (",", ":")
+        encoder = json.JSONEncoder(indent=indent, separators=separators,
+                                   ensure_ascii=False)
+        return encoder.iterencode(obj)
+
+
+class _AlternativeBackend(_StdlibBackend):
+    """Backend que usa una implementación alternativa a `json`, y recurre a
+    `json` para los valores que aquella no puede procesar."""
+
+    def __init__(self, module):
+        self.module = module
+        self.stdlib = _StdlibBackend()
+
+    def loads(self, content):
+        try:
+            return self._loads(content)
+        except ValueError:
+            return self.stdlib.loads(content)
+
+    def dumps(self, obj, indent=None):
+        try:
+            return self._dumps(obj, indent)
+        except (TypeError, ValueError, OverflowError):
+            return self.stdlib.dumps(obj, self.indent_size(indent))
+
+    def iter_dumps(self, obj, indent=None):
+        return _iter_dumps_by_parts(self, obj, indent, 0,
+                                    JSON_DUMP_STREAM_DEPTH)
+
+
+class _OrjsonBackend(_AlternativeBackend):
+    name = "orjson"
+
+    def __init__(self, module):
+        super(_OrjsonBackend, self).__init__(module)
+        # codifica con las indentaciones que orjson no soporta. Es siempre
+        # json: los otros backends escriben algunos números en otra notación
+        self.indent_fallback = self.stdlib
+
+    def indent_size(self, indent):
+        return indent or None
+
+    def dumps(self, obj, indent=None):
+        if (indent or None) not in ORJSON_INDENTS:
+            return self.indent_fallback.dumps(obj, indent)
+        return super(_OrjsonBackend, self).dumps(obj, indent)
+
+    def iter_dumps(self, obj, indent=None):
+        if (indent or None) not in ORJSON_INDENTS:
+            return self.indent_fallback.iter_dumps(obj, indent)
+        return super(_OrjsonBackend, self).iter_dumps(obj, indent)
+
+    def _loads(self, content):
+        return self.module.loads(content)
+
+    def _dumps(self, obj, indent):
+        # los datetime se rechazan, igual que con json
+        options = (self.module.OPT_NON_STR_KEYS |
+                   self.module.OPT_PASSTHROUGH_DATETIME)
+        if indent:
+            options |= self.module.OPT_INDENT_2
+        return self.module.dumps(obj, option=options).decode("utf-8")
+
+
+class _RapidjsonBackend(_AlternativeBackend):
+    name = "rapidjson"
+
+    def _loads(self, content):
+        return self.module.loads(content)
+
+    def _dumps(self, obj, indent):
+        return text_type(self.module.dumps(obj, indent=indent,
+                                           ensure_ascii=False))
+
+
+class _UjsonBackend(_AlternativeBackend):
+    name = "ujson"
+
+    def _loads(self, content):
+        return self.module.loads(content)
+
+    def _dumps(self, obj, indent):
+        return text_type(self.module.dumps(
+            obj, indent=indent or 0, ensure_ascii=False,
+            escape_forward_slashes=False))
+
+
+BACKEND_CLASSES = {
+    "orjson": _OrjsonBackend,
+    "rapidjson": _RapidjsonBackend,
+    "ujson": _UjsonBackend,
+}
+
+
+def available_backends():
+    """Devuelve los nombres de los backends instalados, en orden de
+    preferencia."""
+    return [name for name in JSON_BACKENDS if _import_backend(name)]
+
+
+def set_backend(name=None):
+    """Elige el backend con el que la librería procesa JSON.
+
+    Args:
+        name (str): "orjson", "rapidjson", "ujson" o "json". Si es None, se
+            usa el primero que esté instalado de `JSON_BACKENDS`.
+
+    Raises:
+        ValueError: Si el backend no existe o no está instalado.
+    """
+    global _backend
+
+    if name is None:
+        name = available_backends()[0]
+    if name not in JSON_BACKENDS:
+        raise ValueError("'{}' no es un backend de JSON. Pruebe con {}".format(
+            name, ", ".join(JSON_BACKENDS)))
+
+    _backend = _make_backend(name)
+
+
+def get_backend():
+    """Devuelve el nombre del backend en uso."""
+    return _backend.name
+
+
+def loads(content):
+    """Decodifica un texto JSON (str o bytes UTF-8)."""
+    return _backend.loads(content)
+
+
+def load(json_file):
+    """Decodifica el contenido de un archivo JSON abierto (en modo texto o
+    binario)."""
+    return _backend.loads(json_file.read())
+
+
+def dumps(obj, indent=None):
+    """Codifica un objeto a un texto JSON, sin escapar caracteres no ASCII.
+
+    Args:
+        obj: Objeto a codificar.
+        indent (int): Espacios de indentación. Si es None, el texto se genera
+            en una sola línea.
+
+    Returns:
+        str: El texto JSON.
+    """
+    return _backend.dumps(obj, indent)
+
+
+def iter_dumps(obj, indent=None):
+    """Codifica un objeto a JSON en bloques de texto, sin armar el texto
+    completo en memoria.
+
+    Con `json`, el texto se genera de a poco con `JSONEncoder.iterencode`.
+    Con los backends alternativos, se recorren los primeros niveles del
+    objeto (ver `JSON_DUMP_STREAM_DEPTH`) y se codifica de una vez cada uno
+    de sus elementos; para un catálogo, cada dataset.
+
+    Args:
+        obj: Objeto a codificar.
+        indent (int): Espacios de indentación (ver `dumps`).
+
+    Yields:
+        str: Bloques de al menos `JSON_DUMP_CHUNK_SIZE` caracteres (salvo el
+            último) del texto JSON.
+    """
+    buffered = []
+    buffered_size = 0
+    for chunk in _backend.iter_dumps(obj, indent):
+        buffered.append(chunk)
+        buffered_size += len(chunk)
+        if buffered_size >= JSON_DUMP_CHUNK_SIZE:
+            yield "".join(buffered)
+            buffered = []
+            buffered_size = 0
+    if buffered:
+        yield "".join(buffered)
+
+
+def benchmark(paths, backends=None, number=5):
+    """Mide cuánto tarda cada backend en decodificar y en codificar (con la
+    indentación de `writers.write_json`) cada uno de los archivos JSON.
+
+    Args:
+        paths (list): Paths a archivos JSON.
+        backends (list): Backends a comparar. Si es None, se comparan todos
+            los instalados.
+        number (int): Cantidad de repeticiones de cada medición.
+
+    Returns:
+        list: Un diccionario por archivo y backend, con los segundos
+            promedio de "loads", "dumps" e "iter_dumps".
+    """
+    results = []
+    for path in paths:
+        with io.open(path, "rb") as json_file:
+            content = json_file.read()
+        for name in backends or available_backends():
+            backend = _make_backend(name)
+            obj = backend.loads(content)
+            timings = {
+                "loads": lambda: backend.loads(content),
+                "dumps": lambda: backend.dumps(obj, 4),
+                "iter_dumps": lambda: "".join(backend.iter_dumps(obj, 4)),
+            }
+            result = {"path": path, "backend": name, "bytes": len(content)}
+            for operation, function in iteritems(timings):
+                result[operation] = timeit.timeit(function,
+                                                  number=number) / number
+            results.append(result)
+    return results
+
+
+def _import_backend(name):
+    try:
+        return __import__(name)
+    except ImportError:
+        return None
+
+
+def _make_backend(name):
+    if name == "json":
+        return _StdlibBackend()
+    module = _import_backend(name)
+    if module is None:
+        raise ValueError("El backend de JSON '{}' no está instalado.".format(
+            name))
+    return BACKEND_CLASSES[name](module)
+
+
+def _iter_dumps_by_parts(backend, obj, indent, level, depth):
+    """Codifica `obj` recorriendo `depth` niveles de diccionarios y listas,
+    con la indentación que corresponde a su profundidad `level`."""
+    indent = backend.indent_size(indent)
+    if not depth or not isinstance(obj, (dict, list)) or not obj:
+        text = backend.dumps(obj, indent)
+        if indent and level:
+            text = text.replace("\n", "\n" + " " * indent * level)
+        yield text
+        return
+
+    if indent:
+        newline = "\n" + " " * indent * (level + 1)
+        closing = "\n" + " " * indent * level
+        key_separator = ": "
+    else:
+        newline = closing = ""
+        key_separator = ":"
+
+    if isinstance(obj, dict):
+        opening, ending = "{", "}"
+        items = iteritems(obj)
+    else:
+        opening, ending = "[", "]"
+        items = ((None, value) for value in obj)
+
+    yield opening
+    for index, (key, value) in enumerate(items):
+        yield ("," + newline) if index else newline
+        if isinstance(obj, dict):
+            yield backend.dumps(_key_to_text(key)) + key_separator
+        for chunk in _iter_dumps_by_parts(backend, value, indent, level + 1,
+                                          depth - 1):
+            yield chunk
+    yield closing + ending
+
+
+def _key_to_text(key):
+    """Convierte una clave de diccionario a texto, como lo hace `json`."""
+    if isinstance(key, string_types):
+        return key
+    return list(json.loads(json.dumps({key: None})))[0]
+
+
+def main():
+    """Compara los backends instalados sobre los archivos JSON pasados como
+    argumentos.
+
+    Example:
+        python -m pydatajson.json_backend tests/samples/*.json
+    """
+    results = benchmark(sys.argv[1:])
+    row = "{:<50} {:<10} {:>10} {:>10} {:>10} {:>10}"
+    print(row.format("archivo", "backend", "bytes", "loads", "dumps",
+                     "iter_dumps"))
+    for result in results:
+        print(row.format(result["path"][-50:], result["backend"],
+                         result["bytes"], "{:.5f}".format(result["loads"]),
+                         "{:.5f}".format(result["dumps"]),
+                         "{:.5f}".format(result["iter_dumps"])))
+
+
+_backend = None
+set_backend()
+
+
+if __name__ == '__main__':
+    main()
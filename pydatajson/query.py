@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Módulo 'query' de Pydatajson
+
+Contiene el compilador de los filtros `filter_in` y `filter_out` de las
+funciones del módulo 'search'.
+
+Cada filtro es un diccionario con los niveles "dataset", "distribution" y
+"field", y para cada nivel, las condiciones que deben cumplir sus entidades.
+Una condición es un par `campo: valor`, donde `campo` puede ser:
+
+    - Una clave de la entidad ("title"), que debe valer `valor`.
+    - Un camino a una clave anidada, separado por puntos
+      ("publisher.name").
+    - Cualquiera de los anteriores seguido de "__" y un operador
+      ("issued__gte", "format__in", "keyword__contains"). Ver `OPERATORS`.
+      Anteponiendo "not_" al operador se niega la condición
+      ("keyword__not_contains").
+
+Una entidad pasa el filtro si cumple todas las condiciones de `filter_in` y
+ninguna de las de `filter_out`.
+
+Los filtros se compilan una única vez en funciones que reciben una entidad y
+devuelven si pasa el filtro, y se guardan para las búsquedas siguientes.
+
+Example:
+    >>> filter_in = {"dataset": {"issued__gte": "2016-01-01",
+    ...                          "keyword__contains": "compras"},
+    ...              "distribution": {"format__in": ["CSV", "XLSX"]}}
+"""
+
+from __future__ import unicode_literals, print_function, with_statement, absolute_import
+
+import datetime
+
+from six import iteritems, string_types
+
+from . import cache
+
+LEVELS = ["dataset", "distribution", "field"]
+OPERATOR_SEPARATOR = "__"
+NEGATION_PREFIX = "not_"
+PATH_SEPARATOR = "."
+# cantidad de filtros compilados que se guardan para reutilizar
+COMPILED_FILTERS_CACHE_SIZE = 256
+
+
+def _equals(value, argument):
+    return value == argument
+
+
+def _not_equals(value, argument):
+    return value != argument
+
+
+def _is_in(value, argument):
+    # un campo lista está incluido si alguno de sus elementos lo está
+    if isinstance(value, list):
+        return any(item in argument for item in value)
+    return value in argument
+
+
+def _contains(value, argument):
+    if isinstance(value, (list, string_types)):
+        return argument in value
+    return False
+
+
+def _comparison(compare):
+    def operator(value, argument):
+        if value is None:
+            return False
+        try:
+            return compare(value, argument)
+        except TypeError:
+            # valores no comparables entre sí (ej.: texto y número)
+            return False
+    return operator
+
+
+def _exists(value, argument):
+    return (value is not None) == bool(argument)
+
+
+OPERATORS = {
+    "eq": _equals,
+    "ne": _not_equals,
+    "in": _is_in,
+    "contains": _contains,
+    "gt": _comparison(lambda value, argument: value > argument),
+    "gte": _comparison(lambda value, argument: value >= argument),
+    "lt": _comparison(lambda value, argument: value < argument),
+    "lte": _comparison(lambda value, argument: value <= argument),
+    "exists": _exists,
+}
+
+_compiled_filters = cache.MemoryStore(max_items=COMPILED_FILTERS_CACHE_SIZE)
+
+
+def compile_filters(filter_in=None, filter_out=None):
+    """Compila los filtros de las funciones de búsqueda.
+
+    Args:
+        filter_in (dict): Condiciones que deben cumplir las entidades de cada
+            nivel.
+        filter_out (dict): Condiciones que no debe cumplir ninguna entidad de
+            cada nivel.
+
+    Returns:
+        dict: Para cada nivel de `LEVELS`, una función que recibe una
+            entidad y devuelve True si pasa el filtro, o None si el nivel no
+            tiene condiciones.
+
+    Raises:
+        ValueError: Si una condición usa un operador desconocido, o un
+            argumento inválido para su operador.
+    """
+    filter_in = filter_in or {}
+    filter_out = filter_out or {}
+    if not filter_in and not filter_out:
+        return dict.fromkeys(LEVELS)
+
+    # la huella es el JSON de los filtros, que no distingue, por ejemplo,
+    # una fecha de su texto: esos filtros se compilan en cada llamada
+    cacheable = _is_json_native([filter_in, filter_out])
+    if cacheable:
+        key = cache.fingerprint([filter_in, filter_out])
+        compiled = _compiled_filters.get(key)
+        if compiled is not None:
+            return compiled
+
+    compiled = {
+        level: compile_conditions(filter_in.get(level),
+                                  filter_out.get(level))
+        for level in LEVELS
+    }
+    if cacheable:
+        _compiled_filters.set(key, compiled)
+    return compiled
+
+
+def _is_json_native(obj):
+    """Indica si un objeto está formado sólo por diccionarios con claves de
+    texto, listas, textos, números, booleanos y None."""
+    if isinstance(obj, dict):
+        return all(isinstance(key, string_types) and _is_json_native(value)
+                   for key, value in iteritems(obj))
+    if isinstance(obj, list):
+        return all(_is_json_native(item) for item in obj)
+    return obj is None or isinstance(obj, string_types + (bool, int, float))
+
+
+def compile_conditions(conditions_in=None, conditions_out=None):
+    """Compila las condiciones de un nivel en una función.
+
+    Args:
+        conditions_in (dict): Condiciones que debe cumplir la entidad.
+        conditions_out (dict): Condiciones que no debe cumplir la entidad.
+
+    Returns:
+        function: Recibe una entidad y devuelve True si cumple todas las
+            condiciones de `conditions_in` y ninguna de `conditions_out`, o
+            None si no hay condiciones.
+    """
+    checks_in = [_compile_condition(field, argument)
+                 for field, argument in iteritems(conditions_in or {})]
+    checks_out = [_compile_condition(field, argument)
+                  for field, argument in iteritems(conditions_out or {})]
+    if not checks_in and not checks_out:
+        return None
+
+    def predicate(entity):
+        for check in checks_in:
+            if not check(entity):
+                return False
+        for check in checks_out:
+            if check(entity):
+                return False
+        return True
+
+    return predicate
+
+
+def compile_getter(path):
+    """Compila un camino a un campo, posiblemente anidado, en una función.
+
+    Args:
+        path (str): Clave de la entidad ("title") o camino a una clave
+            anidada, separado por puntos ("publisher.name").
+
+    Returns:
+        function: Recibe una entidad y devuelve el valor del campo, o None
+            si no lo tiene.
+    """
+    keys = path.split(PATH_SEPARATOR)
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda entity: entity.get(key)
+
+    def get_value(entity):
+        value = entity
+        for key in keys:
+            try:
+                value = value.get(key)
+            except AttributeError:
+                return None
+        return value
+    return get_value
+
+
+def _compile_condition(field, argument):
+    path, operator_name = field, "eq"
+    if OPERATOR_SEPARATOR in field:
+        path, operator_name = field.rsplit(OPERATOR_SEPARATOR, 1)
+
+    negate = operator_name.startswith(NEGATION_PREFIX)
+    if negate:
+        operator_name = operator_name[len(NEGATION_PREFIX):]
+    if operator_name not in OPERATORS:
+        raise ValueError(
+            "'{}' no es un operador de filtro válido (en '{}'). Pruebe con "
+            "{}".format(operator_name, field, ", ".join(sorted(OPERATORS))))
+
+    operator = OPERATORS[operator_name]
+    argument = _comparable(argument)
+    if operator_name == "in":
+        if isinstance(argument, string_types) or not hasattr(argument,
+                                                             "__iter__"):
+            raise ValueError("El operador 'in' (en '{}') requiere una lista "
+                             "de valores.".format(field))
+        argument = [_comparable(item) for item in argument]
+
+    get_value = compile_getter(path)
+
+    if negate:
+        return lambda entity: not operator(get_value(entity), argument)
+    return lambda entity: operator(get_value(entity), argument)
+
+
+def _comparable(argument):
+    """Las fechas se comparan como los textos ISO 8601 de los catálogos."""
+    if isinstance(argument, (datetime.date, datetime.datetime)):
+        return argument.isoformat()
+    return argument
@@ -9,62 +9,97 @@ catálogos de metadatos, en distintos fomatos.
 
 from __future__ import unicode_literals, print_function, with_statement, absolute_import
 
+import codecs
 import io
 import json
 import logging
 import os.path
+import re
+import tempfile
+import threading
+import time
 import warnings
+from collections import Counter
 
 import openpyxl as pyxl
-import requests
 import unicodecsv as csv
 from six import string_types, text_type, iteritems
+from six.moves import queue
 from six.moves.urllib_parse import urlparse
 from unidecode import unidecode
 
+from . import cache
+from . import compression
 from . import custom_exceptions as ce
+from . import download
 from . import helpers
+from . import json_backend
 
 global_logger = logging.getLogger()
 
+# tamaño (en caracteres o bytes) de los bloques leídos por iter_datasets
+JSON_STREAM_CHUNK_SIZE = 64 * 1024
+# niveles de objetos y listas que `read_json` recorre por partes al leer un
+# JSON comprimido: el catálogo y sus listas (ej.: "dataset"). Cada elemento de
+# esas listas se decodifica de una vez.
+JSON_STREAM_DEPTH = 2
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
 
-def read_catalog(catalog, default_values=None):
+# lecturas simultáneas de read_catalogs, en total y por servidor
+READ_CATALOGS_WORKERS = 8
+READ_CATALOGS_MAX_PER_HOST = 2
+
+# tamaño (en bytes) a partir del cual los XLSX remotos se descargan a un
+# archivo temporal en lugar de a memoria
+XLSX_SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+# campos de texto separado por comas que los catálogos XLSX guardan como listas
+CATALOG_ARRAY_FIELDS = ["language"]
+DATASET_ARRAY_FIELDS = ["superTheme", "theme", "tags", "keyword", "language"]
+
+# cache de los catálogos leídos por read_catalog (ver configure_catalog_cache)
+_catalog_cache = None
+_catalog_cache_read_only = False
+
+
+def read_catalog(catalog, default_values=None, writable=False):
     """Toma una representación cualquiera de un catálogo, y devuelve su
     representación interna (un diccionario de Python con su metadata.)
 
     Si recibe una representación _interna_ (un diccionario), lo devuelve
     intacto. Si recibe una representación _externa_ (path/URL a un archivo
     JSON/XLSX), devuelve su represetación interna, es decir, un diccionario.
+    Las representaciones externas pueden guardarse en una cache en memoria
+    (ver `configure_catalog_cache`).
 
     Args:
         catalog (dict or str): Representación externa/interna de un catálogo.
         Una representación _externa_ es un path local o una URL remota a un
         archivo con la metadata de un catálogo, en formato JSON o XLSX. La
         representación _interna_ de un catálogo es un diccionario.
+        default_values (dict): Valores default a aplicar al catálogo.
+        writable (bool): Si es True, devuelve un catálogo modificable aunque
+            la cache sea de sólo lectura (ver `configure_catalog_cache`).
 
     Returns:
         dict: Representación interna de un catálogo para uso en las funciones
         de esta librería.
     """
+    # el mensaje se arma sólo si falla la validación, para no convertir a
+    # texto catálogos grandes
     unknown_catalog_repr_msg = """
 No se pudo inferir una representación válida de un catálogo del parámetro
-provisto: {}.""".format(catalog)
-    assert isinstance(catalog, string_types + (dict,)), unknown_catalog_repr_msg
+provisto: {}."""
+    assert isinstance(catalog, string_types + (dict,)), \
+        unknown_catalog_repr_msg.format(catalog)
 
+    writable = writable or bool(default_values)
     if isinstance(catalog, dict):
         catalog_dict = catalog
+        if writable and isinstance(catalog, ReadOnlyDict):
+            catalog_dict = _writable_copy(catalog)
     else:
-        # catalog es una URL remota o un path local
-        suffix = catalog.split(".")[-1].strip("/")
-        unknown_suffix_msg = """
-{} no es un sufijo conocido. Pruebe con 'json' o  'xlsx'""".format(suffix)
-        assert suffix in ["json", "xlsx"], unknown_suffix_msg
-
-        if suffix == "json":
-            catalog_dict = read_json(catalog)
-        else:
-            # El archivo está en formato XLSX
-            catalog_dict = read_xlsx_catalog(catalog)
+        catalog_dict = _read_cached_catalog(catalog, writable=writable)
 
     # si se pasaron valores default, los aplica al catálogo leído
     if default_values:
@@ -73,6 +108,282 @@ provisto: {}.""".format(catalog)
     return catalog_dict
 
 
+def read_catalogs(catalogs, default_values=None,
+                  workers=READ_CATALOGS_WORKERS,
+                  max_per_host=READ_CATALOGS_MAX_PER_HOST, timeout=None):
+    """Lee varios catálogos en simultáneo (ver `read_catalog` y
+    `map_catalogs`).
+
+    Args:
+        catalogs (list): Representaciones externas y/o internas de catálogos.
+        default_values (dict): Valores default a aplicar a cada catálogo.
+        workers (int): Cantidad máxima de lecturas simultáneas.
+        max_per_host (int): Cantidad máxima de lecturas simultáneas contra un
+            mismo servidor.
+        timeout (int o float): Segundos a esperar la lectura de cada
+            catálogo. Si es None, se espera indefinidamente.
+
+    Returns:
+        list: Una tupla (catálogo, error) por cada elemento de `catalogs`, en
+            el mismo orden. Si el catálogo se leyó, `error` es None; si no,
+            `catálogo` es None y `error` es la excepción que lo impidió.
+    """
+    def read(index, catalog):
+        return read_catalog(catalog, default_values)
+
+    return map_catalogs(read, catalogs, workers, max_per_host, timeout)
+
+
+def map_catalogs(function, catalogs, workers=READ_CATALOGS_WORKERS,
+                 max_per_host=READ_CATALOGS_MAX_PER_HOST, timeout=None):
+    """Aplica `function(index, catalog)` a cada catálogo, en simultáneo.
+
+    Cada llamada se hace en un thread, sin superar `workers` llamadas en
+    total ni `max_per_host` sobre catálogos de un mismo servidor. Un error en
+    un catálogo no interrumpe el procesamiento del resto.
+
+    Args:
+        function (callable): Función que recibe el índice de un catálogo en
+            `catalogs` y el catálogo.
+        catalogs (list): Representaciones externas y/o internas de catálogos.
+        workers (int): Cantidad máxima de llamadas simultáneas.
+        max_per_host (int): Cantidad máxima de llamadas simultáneas sobre
+            catálogos (URLs) de un mismo servidor.
+        timeout (int o float): Segundos a esperar cada llamada. Si es None,
+            se espera indefinidamente.
+
+    Returns:
+        list: Una tupla (resultado, error) por cada elemento de `catalogs`, en
+            el mismo orden. Si la llamada falló, `resultado` es None y `error`
+            es la excepción que lanzó (o CatalogReadTimeoutError).
+    """
+    results = [None] * len(catalogs)
+    pending = list(range(len(catalogs)))
+    finished = queue.Queue()
+    # índice de cada llamada en curso -> (servidor, momento de inicio)
+    running = {}
+    while pending or running:
+        # inicia llamadas mientras haya lugar, respetando el límite por host
+        hosts = Counter(host for host, _ in running.values())
+        for index in list(pending):
+            if len(running) >= workers:
+                break
+            host = _catalog_host(catalogs[index])
+            if host and hosts[host] >= max_per_host:
+                continue
+
+            pending.remove(index)
+            hosts[host] += 1
+            running[index] = (host, time.time())
+            thread = threading.Thread(
+                target=_map_catalog_worker,
+                args=(function, index, catalogs[index], finished))
+            thread.daemon = True
+            thread.start()
+
+        wait = None
+        if timeout is not None:
+            deadline = min(start for _, start in running.values()) + timeout
+            wait = max(deadline - time.time(), 0)
+        try:
+            index, result = finished.get(timeout=wait)
+            # descarta los resultados de llamadas ya abandonadas
+            if running.pop(index, None):
+                results[index] = result
+        except queue.Empty:
+            pass
+
+        # abandona las llamadas que superaron el timeout
+        for index, (_, start) in list(running.items()):
+            if timeout is not None and time.time() - start >= timeout:
+                del running[index]
+                results[index] = (None, ce.CatalogReadTimeoutError(
+                    catalogs[index], timeout))
+
+    return results
+
+
+def _catalog_host(catalog):
+    if isinstance(catalog, string_types):
+        return urlparse(catalog).netloc
+    return ""
+
+
+def _map_catalog_worker(function, index, catalog, finished):
+    try:
+        result = (function(index, catalog), None)
+    except Exception as e:
+        result = (None, e)
+    finished.put((index, result))
+
+
+def _read_catalog_file(catalog):
+    """Lee un catálogo desde una URL remota o un path local."""
+    suffix = compression.strip_compression_suffix(catalog).split(".")[-1]
+    suffix = suffix.strip("/")
+    unknown_suffix_msg = """
+{} no es un sufijo conocido. Pruebe con 'json' o  'xlsx'""".format(suffix)
+    assert suffix in ["json", "xlsx"], unknown_suffix_msg
+    assert suffix == "json" or not compression.get_compression(catalog), """
+Sólo se admiten catálogos comprimidos en formato JSON."""
+
+    if suffix == "json":
+        return read_json(catalog)
+    else:
+        # El archivo está en formato XLSX
+        return read_xlsx_catalog(catalog)
+
+
+def configure_catalog_cache(max_items=None, max_bytes=None, ttl=None,
+                            read_only=False):
+    """Activa (o desactiva) una cache en memoria de los catálogos leídos por
+    `read_catalog` desde un path o una URL.
+
+    Los catálogos remotos se identifican por su URL y los locales por su path,
+    fecha de modificación y tamaño, por lo que un archivo modificado se vuelve
+    a leer.
+
+    Args:
+        max_items (int): Cantidad máxima de catálogos a conservar. Si es None
+            o 0, se desactiva la cache.
+        max_bytes (int): Tamaño máximo (aproximado, como JSON serializado) de
+            la suma de los catálogos a conservar. Si es None, no se acota.
+        ttl (int o float): Segundos durante los que un catálogo leído es
+            válido. Si es None, no vencen.
+        read_only (bool): Si es True, `read_catalog` devuelve el mismo
+            diccionario guardado en la cache, que no puede modificarse (lanza
+            TypeError). Si es False, devuelve una copia. `DataJson` siempre
+            trabaja sobre una copia, y las funciones `get_*` de `search`
+            devuelven copias de las entidades de sólo lectura.
+    """
+    global _catalog_cache, _catalog_cache_read_only
+
+    if max_items:
+        _catalog_cache = cache.BoundedMemoryStore(max_items, max_bytes, ttl)
+    else:
+        _catalog_cache = None
+    _catalog_cache_read_only = read_only
+
+
+def invalidate_catalog_cache(catalog=None):
+    """Elimina de la cache de catálogos el catálogo leído desde `catalog` (un
+    path o una URL), o todos si no se pasa ninguno."""
+    if _catalog_cache is None:
+        return
+    if catalog is None:
+        _catalog_cache.invalidate()
+        return
+
+    location = _catalog_location(catalog)
+    for key in _catalog_cache.keys():
+        if key[0] == location:
+            _catalog_cache.invalidate(key)
+
+
+def catalog_cache_stats():
+    """Devuelve un resumen de uso de la cache de catálogos, o None si no
+    está activa."""
+    return _catalog_cache.stats() if _catalog_cache is not None else None
+
+
+def _catalog_location(catalog):
+    if urlparse(catalog).scheme in ["http", "https"]:
+        return catalog
+    return os.path.abspath(catalog)
+
+
+def _catalog_cache_key(catalog):
+    location = _catalog_location(catalog)
+    if location == catalog:
+        return (location,)
+    stat = os.stat(location)
+    return (location, stat.st_mtime, stat.st_size)
+
+
+def _read_cached_catalog(catalog, writable=False):
+    """Lee un catálogo a través de la cache de catálogos, si está activa.
+
+    Args:
+        catalog (str): Path o URL al catálogo.
+        writable (bool): Si es True, devuelve una copia modificable del
+            catálogo aunque la cache sea de sólo lectura.
+    """
+    if _catalog_cache is None:
+        return _read_catalog_file(catalog)
+
+    catalog_cache = _catalog_cache
+    key = _catalog_cache_key(catalog)
+    catalog_dict = catalog_cache.get(key)
+    if catalog_dict is None:
+        catalog_dict = _read_catalog_file(catalog)
+        size = 0
+        if catalog_cache.max_bytes is not None:
+            size = len(json_backend.dumps(catalog_dict))
+        catalog_dict = _read_only_copy(catalog_dict)
+        catalog_cache.set(key, catalog_dict, size)
+
+    if writable or not _catalog_cache_read_only:
+        return _writable_copy(catalog_dict)
+    return catalog_dict
+
+
+def _read_only_error(*args, **kwargs):
+    raise TypeError("El catálogo es de sólo lectura. Use "
+                    "configure_catalog_cache(read_only=False) para obtener "
+                    "copias modificables.")
+
+
+class ReadOnlyDict(dict):
+    """Diccionario que no puede modificarse, usado para compartir los
+    catálogos guardados en la cache de `read_catalog`."""
+
+    __setitem__ = __delitem__ = _read_only_error
+    clear = pop = popitem = setdefault = update = _read_only_error
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return _writable_copy(self)
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class ReadOnlyList(list):
+    """Lista que no puede modificarse (ver `ReadOnlyDict`)."""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only_error
+    append = extend = insert = pop = remove = _read_only_error
+    reverse = sort = clear = _read_only_error
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return _writable_copy(self)
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def _read_only_copy(obj):
+    if isinstance(obj, dict):
+        return ReadOnlyDict(
+            (key, _read_only_copy(value)) for key, value in iteritems(obj))
+    if isinstance(obj, list):
+        return ReadOnlyList(_read_only_copy(value) for value in obj)
+    return obj
+
+
+def _writable_copy(obj):
+    if isinstance(obj, dict):
+        return {key: _writable_copy(value) for key, value in iteritems(obj)}
+    if isinstance(obj, list):
+        return [_writable_copy(value) for value in obj]
+    return obj
+
+
 def apply_default_values(catalog, default_values):
     """Aplica valores default a los campos de un catálogo.
 
@@ -152,11 +463,12 @@ def read_json(json_path_or_url):
     """Toma el path a un JSON y devuelve el diccionario que representa.
 
     Se asume que el parámetro es una URL si comienza con 'http' o 'https', o
-    un path local de lo contrario.
+    un path local de lo contrario. Si termina en ".gz", ".bz2", ".xz" o ".zst"
+    el archivo se descomprime a medida que se lee.
 
     Args:
         json_path_or_url (str): Path local o URL remota a un archivo de texto
-            plano en formato JSON.
+            plano en formato JSON, posiblemente comprimido.
 
     Returns:
         dict: El diccionario que resulta de deserializar json_path_or_url.
@@ -165,9 +477,18 @@ def read_json(json_path_or_url):
     assert isinstance(json_path_or_url, string_types)
 
     parsed_url = urlparse(json_path_or_url)
-    if parsed_url.scheme in ["http", "https"]:
-        res = requests.get(json_path_or_url, verify=False)
-        json_dict = json.loads(res.content, encoding='utf-8')
+    if compression.get_compression(json_path_or_url):
+        # se decodifica a medida que se descomprime, sin armar el texto
+        # completo en memoria
+        stream = _JSONStream(_iter_json_chunks(json_path_or_url))
+        json_dict = stream.read_nested_value(JSON_STREAM_DEPTH)
+        if stream.peek():
+            raise ValueError("JSON inválido: hay contenido después del valor "
+                             "en {}".format(json_path_or_url))
+
+    elif parsed_url.scheme in ["http", "https"]:
+        content = download.get_content(json_path_or_url)
+        json_dict = json_backend.loads(content)
 
     else:
         # Si json_path_or_url parece ser una URL remota, lo advierto.
@@ -178,12 +499,201 @@ La dirección del archivo JSON ingresada parece una URL, pero no comienza
 con 'http' o 'https' así que será tratada como una dirección local. ¿Tal vez
 quiso decir 'http://{}'?""".format(json_path_or_url).encode("utf-8"))
 
-        with io.open(json_path_or_url, encoding='utf-8') as json_file:
-            json_dict = json.load(json_file)
+        with io.open(json_path_or_url, "rb") as json_file:
+            json_dict = json_backend.load(json_file)
 
     return json_dict
 
 
+def iter_datasets(catalog, catalog_fields=None):
+    """Genera los datasets de un catálogo de a uno por vez.
+
+    Si el catálogo es un path local o una URL remota a un archivo JSON, se
+    lee en forma incremental: nunca se tiene en memoria el archivo completo
+    ni más de un dataset a la vez. Cualquier otra representación del
+    catálogo (XLSX o diccionario) se lee con `read_catalog`.
+
+    Args:
+        catalog (dict or str): Representación externa/interna de un catálogo.
+        catalog_fields (dict): Si se pasa, se completa con los campos a nivel
+            catálogo a medida que se leen. Los que aparecen después de la
+            lista de datasets en el JSON sólo están disponibles al terminar
+            de recorrerla. Si "dataset" es una lista, se guarda vacía.
+
+    Yields:
+        dict: Cada uno de los datasets de la lista catalog["dataset"].
+    """
+    catalog_fields = catalog_fields if catalog_fields is not None else {}
+
+    if not is_json_path_or_url(catalog):
+        catalog = read_catalog(catalog)
+        for key, value in iteritems(catalog):
+            if key != "dataset" or not isinstance(value, list):
+                catalog_fields[key] = value
+        if isinstance(catalog.get("dataset"), list):
+            catalog_fields["dataset"] = []
+            for dataset in catalog["dataset"]:
+                yield dataset
+        return
+
+    stream = _JSONStream(_iter_json_chunks(catalog))
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.read_value()
+        stream.expect(":")
+
+        if key == "dataset" and stream.peek() == "[":
+            catalog_fields["dataset"] = []
+            stream.expect("[")
+            if stream.peek() == "]":
+                stream.expect("]")
+            else:
+                while True:
+                    yield stream.read_value()
+                    if stream.peek() == "]":
+                        stream.expect("]")
+                        break
+                    stream.expect(",")
+        else:
+            catalog_fields[key] = stream.read_value()
+
+        if stream.peek() == "}":
+            return
+        stream.expect(",")
+
+
+def is_json_path_or_url(catalog):
+    """Indica si un catálogo es un path o URL a un archivo JSON (comprimido
+    o no), que puede leerse en forma incremental con `iter_datasets`."""
+    return (isinstance(catalog, string_types) and
+            compression.strip_compression_suffix(catalog).split(".")[-1]
+            .strip("/") == "json")
+
+
+def _iter_json_chunks(json_path_or_url):
+    """Genera el texto de un archivo JSON local o remoto en bloques,
+    descomprimiéndolo si corresponde."""
+    parsed_url = urlparse(json_path_or_url)
+    if parsed_url.scheme in ["http", "https"]:
+        chunks = download.iter_content(json_path_or_url,
+                                       JSON_STREAM_CHUNK_SIZE)
+    else:
+        chunks = _iter_file_chunks(json_path_or_url)
+
+    file_compression = compression.get_compression(json_path_or_url)
+    if file_compression:
+        chunks = compression.iter_decompressed(chunks, file_compression)
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in chunks:
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def _iter_file_chunks(path):
+    with io.open(path, "rb") as binary_file:
+        chunk = binary_file.read(JSON_STREAM_CHUNK_SIZE)
+        while chunk:
+            yield chunk
+            chunk = binary_file.read(JSON_STREAM_CHUNK_SIZE)
+
+
+class _JSONStream(object):
+    """Lector incremental de un texto JSON que llega en bloques.
+
+    Permite recorrer la estructura de los objetos y listas exteriores
+    caracter por caracter, y decodificar de una vez los valores interiores
+    (datasets, campos), leyendo sólo los bloques necesarios para cada uno.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _read_chunk(self, min_size=1):
+        """Agrega al menos `min_size` caracteres al buffer. Devuelve False si
+        no quedan más bloques por leer."""
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        read = 0
+        while read < min_size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._eof = True
+                return read > 0
+            self._buffer += chunk
+            read += len(chunk)
+        return True
+
+    def peek(self):
+        """Devuelve el próximo caracter significativo, sin consumirlo."""
+        while True:
+            match = JSON_WHITESPACE.match(self._buffer, self._pos)
+            self._pos = match.end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_chunk():
+                return ""
+
+    def expect(self, char):
+        """Consume el próximo caracter significativo, que debe ser `char`."""
+        found = self.peek()
+        if found != char:
+            raise ValueError(
+                "JSON inválido: se esperaba '{}' y se encontró '{}'".format(
+                    char, found))
+        self._pos += 1
+
+    def read_nested_value(self, depth):
+        """Decodifica y consume el próximo valor JSON, recorriendo por partes
+        sus primeros `depth` niveles de objetos y listas: sólo se tiene en
+        memoria el texto de un valor interior por vez."""
+        opening = self.peek()
+        if not depth or opening not in ["{", "["]:
+            return self.read_value()
+
+        closing = "}" if opening == "{" else "]"
+        value = {} if opening == "{" else []
+        self.expect(opening)
+        if self.peek() == closing:
+            self.expect(closing)
+            return value
+        while True:
+            if opening == "{":
+                key = self.read_value()
+                self.expect(":")
+                value[key] = self.read_nested_value(depth - 1)
+            else:
+                value.append(self.read_nested_value(depth - 1))
+            if self.peek() == closing:
+                self.expect(closing)
+                return value
+            self.expect(",")
+
+    def read_value(self):
+        """Decodifica y consume el próximo valor JSON completo."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # un valor que termina con el buffer puede estar incompleto
+                # (ej.: un número), salvo que ya no quede nada por leer
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except ValueError:
+                if self._eof:
+                    raise
+            # duplica lo leído, para no decodificar el mismo texto muchas veces
+            self._read_chunk(max(len(self._buffer) - self._pos,
+                                 JSON_STREAM_CHUNK_SIZE))
+
+
 def read_xlsx_catalog(xlsx_path_or_url, logger=None):
     """Toma el path a un catálogo en formato XLSX y devuelve el diccionario
     que representa.
@@ -204,12 +714,13 @@ def read_xlsx_catalog(xlsx_path_or_url, logger=None):
 
     parsed_url = urlparse(xlsx_path_or_url)
     if parsed_url.scheme in ["http", "https"]:
-        res = requests.get(xlsx_path_or_url, verify=False)
-        tmpfilename = ".tmpfile.xlsx"
-        with io.open(tmpfilename, 'wb') as tmpfile:
-            tmpfile.write(res.content)
-        catalog_dict = read_local_xlsx_catalog(tmpfilename, logger)
-        os.remove(tmpfilename)
+        # el libro se descarga en memoria (o a un archivo temporal propio, si
+        # supera XLSX_SPOOL_MAX_SIZE) y se lee directamente desde ahí
+        xlsx_file = _download_xlsx(xlsx_path_or_url)
+        try:
+            catalog_dict = _read_xlsx_catalog_file(xlsx_file, logger)
+        finally:
+            xlsx_file.close()
     else:
         # Si xlsx_path_or_url parece ser una URL remota, lo advierto.
         path_start = parsed_url.path.split(".")[0]
@@ -225,6 +736,32 @@ quiso decir 'http://{}'?
     return catalog_dict
 
 
+def _download_xlsx(url):
+    """Descarga un libro XLSX a un buffer en memoria, que pasa a un archivo
+    temporal si la descarga supera XLSX_SPOOL_MAX_SIZE.
+
+    No se usa tempfile.SpooledTemporaryFile porque antes de Python 3.11 no
+    implementa `seekable`, que openpyxl necesita.
+
+    Returns:
+        file: Archivo binario posicionado al comienzo del libro.
+    """
+    xlsx_file = io.BytesIO()
+    try:
+        for chunk in download.iter_content(url):
+            xlsx_file.write(chunk)
+            if (isinstance(xlsx_file, io.BytesIO) and
+                    xlsx_file.tell() > XLSX_SPOOL_MAX_SIZE):
+                disk_file = tempfile.TemporaryFile()
+                disk_file.write(xlsx_file.getvalue())
+                xlsx_file = disk_file
+        xlsx_file.seek(0)
+    except Exception:
+        xlsx_file.close()
+        raise
+    return xlsx_file
+
+
 def _make_publisher(catalog_or_dataset):
     """De estar presentes las claves necesarias, genera el diccionario
     "publisher" a nivel catálogo o dataset."""
@@ -249,25 +786,34 @@ def _make_contact_point(dataset):
     return dataset
 
 
-def _get_dataset_index(catalog, dataset_identifier, dataset_title,
-                       logger=None):
+def _index_by(items, key):
+    """Devuelve un diccionario de cada valor de `key` en `items` a la lista de
+    índices de los elementos que lo tienen."""
+    index = {}
+    for idx, item in enumerate(items):
+        index.setdefault(item[key], []).append(idx)
+    return index
+
+
+def _get_dataset_index(datasets, datasets_index, dataset_identifier,
+                       dataset_title, logger=None):
     """Devuelve el índice de un dataset en el catálogo en función de su
-    identificador"""
+    identificador, buscándolo en `datasets_index` (ver `_index_by`)."""
     logger = logger or global_logger
     matching_datasets = []
 
-    for idx, dataset in enumerate(catalog["catalog_dataset"]):
-        if dataset["dataset_identifier"] == dataset_identifier:
-            if dataset["dataset_title"] == dataset_title:
-                matching_datasets.append(idx)
-            else:
-                logger.warning(
-                    ce.DatasetUnexpectedTitle(
-                        dataset_identifier,
-                        dataset["dataset_title"],
-                        dataset_title
-                    )
+    for idx in datasets_index.get(dataset_identifier, []):
+        dataset = datasets[idx]
+        if dataset["title"] == dataset_title:
+            matching_datasets.append(idx)
+        else:
+            logger.warning(
+                ce.DatasetUnexpectedTitle(
+                    dataset_identifier,
+                    dataset["title"],
+                    dataset_title
                 )
+            )
 
     # Debe haber exactamente un dataset con el identificador provisto.
     no_dsets_msg = "No hay ningun dataset con el identifier {}".format(
@@ -284,34 +830,38 @@ def _get_dataset_index(catalog, dataset_identifier, dataset_title,
         return matching_datasets[0]
 
 
-def _get_distribution_indexes(catalog, dataset_identifier, dataset_title,
+def _get_distribution_indexes(datasets, datasets_index, distributions_index,
+                              dataset_identifier, dataset_title,
                               distribution_identifier, distribution_title,
                               logger=None):
     """Devuelve el índice de una distribución en su dataset en función de su
     título, junto con el índice de su dataset padre en el catálogo, en
-    función de su identificador"""
+    función de su identificador. `distributions_index` va de cada par
+    (índice de dataset, identificador de distribución) a los índices de las
+    distribuciones del dataset con ese identificador."""
     logger = logger or global_logger
     dataset_index = _get_dataset_index(
-        catalog, dataset_identifier, dataset_title)
+        datasets, datasets_index, dataset_identifier, dataset_title, logger)
     if dataset_index is None:
         return None, None
     else:
-        dataset = catalog["catalog_dataset"][dataset_index]
+        dataset = datasets[dataset_index]
 
     matching_distributions = []
 
-    for idx, distribution in enumerate(dataset["dataset_distribution"]):
-        if distribution["distribution_identifier"] == distribution_identifier:
-            if distribution["distribution_title"] == distribution_title:
-                matching_distributions.append(idx)
-            else:
-                logger.warning(
-                    ce.DistributionUnexpectedTitle(
-                        distribution_identifier,
-                        distribution["distribution_title"],
-                        distribution_title
-                    )
+    for idx in distributions_index.get(
+            (dataset_index, distribution_identifier), []):
+        distribution = dataset["distribution"][idx]
+        if distribution["title"] == distribution_title:
+            matching_distributions.append(idx)
+        else:
+            logger.warning(
+                ce.DistributionUnexpectedTitle(
+                    distribution_identifier,
+                    distribution["title"],
+                    distribution_title
                 )
+            )
 
     # Debe haber exactamente una distribución con los identicadores provistos
     if len(matching_distributions) == 0:
@@ -343,165 +893,135 @@ def read_local_xlsx_catalog(xlsx_path, logger=None):
     Returns:
         dict: Diccionario con los metadatos de un catálogo.
     """
-    logger = logger or global_logger
     assert xlsx_path.endswith(".xlsx"), """
 El archivo a leer debe tener extensión XLSX."""
 
-    wb = pyxl.load_workbook(xlsx_path, data_only=True, read_only=True)
+    return _read_xlsx_catalog_file(xlsx_path, logger)
 
-    # Toma las hojas del modelo, resistente a mayúsuculas/minúsculas
-    ws_catalog = helpers.get_ws_case_insensitive(wb, "catalog")
-    ws_dataset = helpers.get_ws_case_insensitive(wb, "dataset")
-    ws_distribution = helpers.get_ws_case_insensitive(wb, "distribution")
-    ws_theme = helpers.get_ws_case_insensitive(wb, "theme")
-    ws_field = helpers.get_ws_case_insensitive(wb, "field")
 
-    catalogs = helpers.sheet_to_table(ws_catalog)
+def _read_xlsx_catalog_file(xlsx_file, logger=None):
+    """Genera un diccionario de metadatos de catálogo a partir de un XLSX bien
+    formado, dado como path o como archivo abierto en modo binario."""
+    logger = logger or global_logger
+    wb = pyxl.load_workbook(xlsx_file, data_only=True, read_only=True)
+
+    # Lee las hojas del modelo, resistente a mayúsuculas/minúsculas. En modo
+    # read_only el libro mantiene abierto el archivo hasta que se lo cierra
+    try:
+        catalogs, dataset_rows, distribution_rows, theme_rows, field_rows = [
+            helpers.sheet_to_table(
+                helpers.get_ws_case_insensitive(wb, sheet_name))
+            for sheet_name in ["catalog", "dataset", "distribution", "theme",
+                               "field"]
+        ]
+    finally:
+        wb.close()
+
     # Debe haber exactamente un catálogo en la hoja 'Catalog'
     assert (len(catalogs) != 0), "No hay ningun catálogo en la hoja 'Catalog'"
     assert (len(catalogs) < 2), "Hay mas de un catálogo en la hoja 'Catalog'"
     # Genero el catálogo base
-    catalog = catalogs[0]
-
-    # Agrego themes y datasets al catálogo
-    catalog["catalog_dataset"] = helpers.sheet_to_table(ws_dataset)
-
-    # Me aseguro que los identificadores de dataset se guarden como cadenas
-    for dataset in catalog["catalog_dataset"]:
-        dataset["dataset_identifier"] = text_type(dataset["dataset_identifier"])
-
-    catalog["catalog_themeTaxonomy"] = (
-        helpers.sheet_to_table(ws_theme))
-
-    # Agrego lista de distribuciones vacía a cada dataset
-    for dataset in catalog["catalog_dataset"]:
-        dataset["dataset_distribution"] = []
+    catalog = _xlsx_row_to_dict(catalogs[0], "catalog_",
+                                CATALOG_ARRAY_FIELDS)
+
+    # Agrego datasets y themes al catálogo, cada uno con su forma final
+    datasets = []
+    for row in dataset_rows:
+        # Me aseguro que los identificadores de dataset se guarden como cadenas
+        row["dataset_identifier"] = text_type(row["dataset_identifier"])
+        dataset = _xlsx_row_to_dict(row, "dataset_", DATASET_ARRAY_FIELDS)
+        # Agrego lista de distribuciones vacía a cada dataset
+        dataset["distribution"] = []
+        # Agrupo las claves de "publisher" y "contactPoint" en diccionarios
+        datasets.append(_make_contact_point(_make_publisher(dataset)))
+    catalog["dataset"] = datasets
+
+    catalog["themeTaxonomy"] = [
+        _xlsx_row_to_dict(row, "theme_")
+        for row in theme_rows
+    ]
+
+    # Indexo los datasets por identificador, para ubicar sus distribuciones
+    datasets_index = _index_by(datasets, "identifier")
 
     # Ubico cada distribución en su dataset
-    distributions = helpers.sheet_to_table(ws_distribution)
-    for distribution in distributions:
+    for row in distribution_rows:
         # Me aseguro que los identificadores se guarden como cadenas
-        distribution["dataset_identifier"] = text_type(
-            distribution["dataset_identifier"])
-        distribution["distribution_identifier"] = text_type(
-            distribution["distribution_identifier"])
+        row["dataset_identifier"] = text_type(row["dataset_identifier"])
+        row["distribution_identifier"] = text_type(
+            row["distribution_identifier"])
 
         dataset_index = _get_dataset_index(
-            catalog, distribution["dataset_identifier"],
-            distribution["dataset_title"], logger)
+            datasets, datasets_index, row["dataset_identifier"],
+            row["dataset_title"], logger)
         if dataset_index is None:
             print("""La distribucion con ID '{}' y titulo '{}' no se
 pudo asignar a un dataset, y no figurara en el data.json de salida.""".format(
-                distribution["distribution_identifier"],
-                distribution["distribution_title"]))
+                row["distribution_identifier"],
+                row["distribution_title"]))
         else:
-            dataset = catalog["catalog_dataset"][dataset_index]
-            dataset["dataset_distribution"].append(distribution)
+            datasets[dataset_index]["distribution"].append(
+                _xlsx_row_to_dict(row, "distribution_"))
+
+    # Indexo las distribuciones de cada dataset por identificador, para
+    # ubicar sus campos
+    distributions_index = {}
+    for dataset_index, dataset in enumerate(datasets):
+        for identifier, indexes in iteritems(_index_by(
+                dataset["distribution"], "identifier")):
+            distributions_index[(dataset_index, identifier)] = indexes
 
     # Ubico cada campo en su distribución
-    fields = helpers.sheet_to_table(ws_field)
-    for idx, field in enumerate(fields):
+    for idx, row in enumerate(field_rows):
         # Me aseguro que los identificadores se guarden como cadenas
-        field["dataset_identifier"] = text_type(field["dataset_identifier"])
-        field["distribution_identifier"] = text_type(
-            field["distribution_identifier"])
+        row["dataset_identifier"] = text_type(row["dataset_identifier"])
+        row["distribution_identifier"] = text_type(
+            row["distribution_identifier"])
 
         dataset_index, distribution_index = _get_distribution_indexes(
-            catalog, field["dataset_identifier"], field["dataset_title"],
-            field["distribution_identifier"], field["distribution_title"],
+            datasets, datasets_index, distributions_index,
+            row["dataset_identifier"], row["dataset_title"],
+            row["distribution_identifier"], row["distribution_title"],
             logger)
 
         if dataset_index is None:
             print("""No se encontro el dataset '{}' especificado para el campo
 '{}' (fila #{} de la hoja "Field"). Este campo no figurara en el data.json de salida.""".format(
-                unidecode(field["dataset_title"]),
-                unidecode(field["field_title"]),
+                unidecode(row["dataset_title"]),
+                unidecode(row["field_title"]),
                 idx + 2))
 
         elif distribution_index is None:
             print("""No se encontro la distribucion '{}' especificada para el campo
 '{}' (fila #{} de la hoja "Field"). Este campo no figurara en el data.json de salida.""".format(
-                unidecode(field["distribution_title"]),
-                unidecode(field["field_title"]),
+                unidecode(row["distribution_title"]),
+                unidecode(row["field_title"]),
                 idx + 2))
 
         else:
-            dataset = catalog["catalog_dataset"][dataset_index]
-            distribution = dataset["dataset_distribution"][distribution_index]
+            distribution = datasets[dataset_index]["distribution"][
+                distribution_index]
+            distribution.setdefault("field", []).append(
+                _xlsx_row_to_dict(row, "field_"))
 
-            if "distribution_field" in distribution:
-                distribution["distribution_field"].append(field)
-            else:
-                distribution["distribution_field"] = [field]
-
-    # Transformo campos de texto separado por comas en listas
-    if "catalog_language" in catalog:
-        catalog["catalog_language"] = helpers.string_to_list(
-            catalog["catalog_language"])
-
-    for dataset in catalog["catalog_dataset"]:
-        array_fields = ["dataset_superTheme", "dataset_theme", "dataset_tags",
-                        "dataset_keyword", "dataset_language"]
-        for field in array_fields:
-            if field in dataset:
-                dataset[field] = helpers.string_to_list(dataset[field])
-
-    # Elimino los prefijos de los campos a nivel catálogo
-    for old_key in list(catalog.keys()):
-        if old_key.startswith("catalog_"):
-            new_key = old_key.replace("catalog_", "")
-            catalog[new_key] = catalog.pop(old_key)
-        else:
-            catalog.pop(old_key)
-
-    # Elimino los prefijos de los campos a nivel tema
-    for theme in catalog["themeTaxonomy"]:
-        for old_key in theme.keys():
-            if old_key.startswith("theme_"):
-                new_key = old_key.replace("theme_", "")
-                theme[new_key] = theme.pop(old_key)
-            else:
-                theme.pop(old_key)
-
-    # Elimino los prefijos de los campos a nivel dataset
-    for dataset in catalog["dataset"]:
-        for old_key in list(dataset.keys()):
-            if old_key.startswith("dataset_"):
-                new_key = old_key.replace("dataset_", "")
-                dataset[new_key] = dataset.pop(old_key)
-            else:
-                dataset.pop(old_key)
-
-    # Elimino los campos auxiliares y los prefijos de los campos a nivel
-    # distribución
-    for dataset in catalog["dataset"]:
-        for distribution in dataset["distribution"]:
-            for old_key in list(distribution.keys()):
-                if old_key.startswith("distribution_"):
-                    new_key = old_key.replace("distribution_", "")
-                    distribution[new_key] = distribution.pop(old_key)
-                else:
-                    distribution.pop(old_key)
-
-    # Elimino campos auxiliares y los prefijos de los campos a nivel "campo"
-    for dataset in catalog["dataset"]:
-        for distribution in dataset["distribution"]:
-            if "field" in distribution:
-                for field in distribution["field"]:
-                    for old_key in list(field.keys()):
-                        if old_key.startswith("field_"):
-                            new_key = old_key.replace("field_", "")
-                            field[new_key] = field.pop(old_key)
-                        else:
-                            field.pop(old_key)
-
-    # Agrupo las claves de "publisher" y "contactPoint" en sendos diccionarios
-    catalog = _make_publisher(catalog)
-    for dataset in catalog["dataset"]:
-        dataset = _make_publisher(dataset)
-        dataset = _make_contact_point(dataset)
-
-    return catalog
+    # Agrupo las claves de "publisher" del catálogo en un diccionario
+    return _make_publisher(catalog)
+
+
+def _xlsx_row_to_dict(row, prefix, array_fields=()):
+    """Convierte una fila de una hoja del XLSX en el diccionario que la
+    representa en el data.json: conserva sólo las claves que comienzan con
+    `prefix`, sin él, y transforma los campos de `array_fields` de texto
+    separado por comas a listas."""
+    result = {}
+    for key, value in iteritems(row):
+        if key.startswith(prefix):
+            key = key.replace(prefix, "")
+            if key in array_fields:
+                value = helpers.string_to_list(value)
+            result[key] = value
+
+    return result
 
 
 def read_table(path):
@@ -533,29 +1053,46 @@ def read_table(path):
             raise ValueError("""
 La lista ingresada no esta formada por diccionarios con las mismas claves.""")
 
+    return list(iter_table(path))
+
+
+def iter_table(path):
+    """Lee un archivo tabular (CSV o XLSX) de a una fila por vez, sin
+    cargarlo entero en memoria (ver `read_table`).
+
+    Los archivos XLSX se leen en modo de sólo lectura, recorriendo su hoja
+    activa.
+
+    Args:
+        path(str o list): Como 'str', path a un archivo CSV o XLSX. Si es una
+            lista de diccionarios con las mismas claves, recorre sus
+            elementos.
+
+    Yields:
+        dict: Cada fila del archivo, con los encabezados como claves.
+    """
+    assert isinstance(path, string_types + (list,)), """
+{} no es un `path` valido""".format(path)
+
+    if isinstance(path, list):
+        for row in read_table(path):
+            yield row
+        return
+
     # Deduzco el formato de archivo de `path` y redirijo según corresponda.
     suffix = path.split(".")[-1]
     if suffix == "csv":
-        return _read_csv_table(path)
+        with open(path, 'rb') as csvfile:
+            for row in csv.DictReader(csvfile):
+                yield row
     elif suffix == "xlsx":
-        return _read_xlsx_table(path)
+        with io.open(path, 'rb') as xlsx_file:
+            workbook = pyxl.load_workbook(xlsx_file, read_only=True)
+            try:
+                for row in helpers.iter_sheet_rows(workbook.active):
+                    yield row
+            finally:
+                workbook.close()
     else:
         raise ValueError("""
 {} no es un sufijo reconocido. Pruebe con .csv o .xlsx""".format(suffix))
-
-
-def _read_csv_table(path):
-    """Lee un CSV a una lista de diccionarios."""
-    with open(path, 'rb') as csvfile:
-        reader = csv.DictReader(csvfile)
-        table = list(reader)
-    return table
-
-
-def _read_xlsx_table(path):
-    """Lee la hoja activa de un archivo XLSX a una lista de diccionarios."""
-    workbook = pyxl.load_workbook(path)
-    worksheet = workbook.active
-    table = helpers.sheet_to_table(worksheet)
-
-    return table
@@ -11,7 +11,7 @@ from __future__ import unicode_literals, print_function, with_statement, absolut
 from collections import OrderedDict
 
 from pydatajson import writers
-from .validation import validate_catalog
+from .validation import validate_catalog, iter_validated_datasets
 
 from . import readers
 
@@ -53,20 +53,51 @@ def generate_datasets_summary(catalog, export_path=None, validator=None):
     validation = validate_catalog(
         catalog, validator=validator)["error"]["dataset"]
 
-    def info_dataset(index, dataset):
-        """Recolecta información básica de un dataset."""
-        info = OrderedDict()
-        info["indice"] = index
-        info["titulo"] = dataset.get("title")
-        info["identificador"] = dataset.get("identifier")
-        info["estado_metadatos"] = validation[index]["status"]
-        info["cant_errores"] = len(validation[index]["errors"])
-        info["cant_distribuciones"] = len(dataset["distribution"])
-
-        return info
-
-    summary = [info_dataset(i, ds) for i, ds in enumerate(datasets)]
+    summary = [dataset_summary(i, ds, validation[i])
+               for i, ds in enumerate(datasets)]
     if export_path:
         writers.write_table(summary, export_path)
     else:
         return summary
+
+
+def iter_datasets_summary(catalog, validator=None):
+    """Versión de `generate_datasets_summary` que genera el informe de cada
+    dataset a medida que se lee y valida.
+
+    Si el catálogo es un path o URL a un archivo JSON, se lee en forma
+    incremental (ver `validation.iter_validate_catalog`), por lo que puede
+    procesar catálogos que no entran en memoria.
+
+    Yields:
+        OrderedDict: El informe de cada dataset, con los mismos datos que
+            `generate_datasets_summary`.
+    """
+    for level, dataset, result in iter_validated_datasets(catalog, validator):
+        if level == "dataset":
+            dataset = dataset if isinstance(dataset, dict) else {}
+            yield dataset_summary(result["list_index"], dataset, result)
+
+
+def dataset_summary(index, dataset, dataset_validation):
+    """Recolecta información básica de un dataset.
+
+    Args:
+        index (int): Posición del dataset en el catálogo.
+        dataset (dict): El dataset.
+        dataset_validation (dict): Resultado de la validación del dataset
+            (ver `validation.validate_catalog`).
+
+    Returns:
+        OrderedDict: El informe del dataset, como los de
+            `generate_datasets_summary`.
+    """
+    info = OrderedDict()
+    info["indice"] = index
+    info["titulo"] = dataset.get("title")
+    info["identificador"] = dataset.get("identifier")
+    info["estado_metadatos"] = dataset_validation["status"]
+    info["cant_errores"] = len(dataset_validation["errors"])
+    info["cant_distribuciones"] = len(dataset["distribution"])
+
+    return info
@@ -0,0 +1,343 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Módulo 'schema_compiler' de Pydatajson
+
+Contiene un motor de validación alternativo a jsonschema, que traduce los
+esquemas JSONSchema Draft #4 a funciones de Python especializadas una única
+vez, en lugar de interpretar el esquema en cada validación.
+
+Los errores que genera son idénticos (y en el mismo orden) a los que genera
+`jsonschema.Draft4Validator` con el mismo esquema.
+"""
+
+from __future__ import unicode_literals, print_function, with_statement, absolute_import
+
+import numbers
+import re
+
+import jsonschema
+import six
+from jsonschema import _utils
+
+from . import custom_exceptions as ce
+
+# palabras clave que se traducen a código; el resto de las que entiende
+# Draft4Validator se delegan en las funciones de jsonschema
+COMPILED_KEYWORDS = [
+    "$ref", "type", "required", "properties", "items", "uniqueItems", "anyOf",
+    "allOf", "not", "format", "minLength", "maxLength", "pattern"
+]
+
+TYPE_CHECKS = {
+    "string": "isinstance({0}, string_types)",
+    "object": "isinstance({0}, dict)",
+    "array": "isinstance({0}, list)",
+    "null": "{0} is None",
+    "boolean": "isinstance({0}, bool)",
+    "integer": ("(isinstance({0}, integer_types) and "
+                "not isinstance({0}, bool))"),
+    "number": ("(isinstance({0}, numbers.Number) and "
+               "not isinstance({0}, bool))"),
+}
+
+
+class CompiledValidator(object):
+    """Validador de JSONSchema Draft #4 compilado a código Python.
+
+    Tiene la misma interfaz que `jsonschema.Draft4Validator` en lo que usa
+    pydatajson (`iter_errors`, `is_valid`, `schema`, `resolver` y
+    `format_checker`), por lo que puede usarse en su lugar.
+
+    Args:
+        schema (dict): Esquema a compilar.
+        resolver (jsonschema.RefResolver): Resolvedor de las referencias
+            (`$ref`) del esquema.
+        format_checker (jsonschema.FormatChecker): Validador de formatos. Si
+            es None, no se validan los formatos.
+    """
+
+    def __init__(self, schema, resolver=None, format_checker=None):
+        self.schema = schema
+        self.resolver = resolver or jsonschema.RefResolver.from_schema(schema)
+        self.format_checker = format_checker
+
+        compiler = _SchemaCompiler(self.resolver, format_checker)
+        entry_point = compiler.compile_schema(schema)
+        self.source = compiler.source()
+
+        namespace = compiler.namespace()
+        six.exec_(compile(self.source, "<pydatajson schema>", "exec"),
+                  namespace)
+        self._validate = namespace[entry_point]
+
+    def iter_errors(self, instance):
+        """Genera los errores de validación de `instance`."""
+        errors = []
+        self._validate(instance, (), errors)
+        return iter(errors)
+
+    def is_valid(self, instance):
+        """Indica si `instance` cumple con el esquema. Deja de validar en el
+        primer error."""
+        try:
+            self._validate(instance, (), _FirstErrorList())
+        except _InvalidInstance:
+            return False
+        return True
+
+
+class _SchemaCompiler(object):
+    """Traduce un esquema (y los que referencia) a un módulo de funciones
+    `validate_N(instance, path, errors)`, una por cada subesquema, que
+    agregan a `errors` los errores que encuentran."""
+
+    def __init__(self, resolver, format_checker):
+        self.resolver = resolver
+        self.format_checker = format_checker
+        self.constants = []
+        self.functions = {}
+        self.lines = []
+
+    def source(self):
+        return "\n".join(self.lines) + "\n"
+
+    def namespace(self):
+        return {
+            "C": self.constants,
+            "FC": self.format_checker,
+            "FormatError": jsonschema.FormatError,
+            "string_types": six.string_types,
+            "integer_types": six.integer_types,
+            "numbers": numbers,
+            "uniq": _utils.uniq,
+            "any_valid": _any_valid,
+            "error": _error,
+            "fallback": _fallback,
+            "JV": jsonschema.Draft4Validator(
+                {}, resolver=self.resolver,
+                format_checker=self.format_checker),
+        }
+
+    def const(self, value):
+        """Guarda un valor para usarlo desde el código generado y devuelve
+        la expresión que lo accede."""
+        self.constants.append(value)
+        return "C[{}]".format(len(self.constants) - 1)
+
+    def compile_schema(self, schema):
+        """Genera la función que valida `schema` y devuelve su nombre."""
+        key = (self.resolver.resolution_scope, id(schema))
+        if key in self.functions:
+            return self.functions[key]
+        name = "validate_{}".format(len(self.functions))
+        self.functions[key] = name
+        # mantiene vivo el esquema para que su id() no se reutilice
+        self.const(schema)
+
+        scope = schema.get("id") if isinstance(schema, dict) else None
+        if scope:
+            self.resolver.push_scope(scope)
+        try:
+            body = self._compile_body(schema)
+        finally:
+            if scope:
+                self.resolver.pop_scope()
+
+        self.lines.append("def {}(instance, path, errors):".format(name))
+        self.lines.extend("    " + line for line in body or ["pass"])
+        self.lines.append("")
+        return name
+
+    def _compile_body(self, schema):
+        if not isinstance(schema, dict):
+            return []
+        if schema.get("$ref") is not None:
+            keywords = [("$ref", schema["$ref"])]
+        else:
+            keywords = list(schema.items())
+
+        body = []
+        for keyword, value in keywords:
+            if keyword in COMPILED_KEYWORDS:
+                method = "_compile_" + keyword.strip("$")
+                body.extend(getattr(self, method)(value))
+            elif keyword in jsonschema.Draft4Validator.VALIDATORS:
+                body.append("fallback(JV, {}, {}, {}, {}, instance, path, "
+                            "errors)".format(
+                                self.const(keyword), self.const(value),
+                                self.const(schema),
+                                self.const(self.resolver.resolution_scope)))
+        return body
+
+    def _error(self, keyword, value, message, instance="instance"):
+        return "errors.append(error({}, {}, {}, path, {}))".format(
+            self.const(keyword), self.const(value), message, instance)
+
+    def _compile_ref(self, ref):
+        url, resolved = self.resolver.resolve(ref)
+        self.resolver.push_scope(url)
+        try:
+            function = self.compile_schema(resolved)
+        finally:
+            self.resolver.pop_scope()
+        return ["{}(instance, path, errors)".format(function)]
+
+    def _compile_type(self, type_value):
+        types = _utils.ensure_list(type_value)
+        checks = []
+        for type_name in types:
+            if type_name not in TYPE_CHECKS:
+                raise jsonschema.exceptions.UnknownType(
+                    type_name, None, types)
+            checks.append(TYPE_CHECKS[type_name].format("instance"))
+        # mismo mensaje que jsonschema._utils.types_msg
+        reprs = ", ".join(repr(type_name) for type_name in types)
+        message = "'%r is not of type ' % (instance,) + {}".format(
+            self.const(reprs))
+        return ["if not ({}):".format(" or ".join(checks)),
+                "    " + self._error("type", type_value, message)]
+
+    def _compile_required(self, required):
+        if not required:
+            return []
+        messages = [(prop, "%r is a required property" % prop)
+                    for prop in required]
+        return ["if isinstance(instance, dict):",
+                "    for prop, message in {}:".format(self.const(messages)),
+                "        if prop not in instance:",
+                "            " + self._error("required", required, "message")]
+
+    def _compile_properties(self, properties):
+        body = []
+        for prop, subschema in properties.items():
+            function = self.compile_schema(subschema)
+            prop_const = self.const(prop)
+            body.extend([
+                "    if {} in instance:".format(prop_const),
+                "        {0}(instance[{1}], path + ({1},), errors)".format(
+                    function, prop_const)
+            ])
+        return ["if isinstance(instance, dict):"] + body if body else []
+
+    def _compile_items(self, items):
+        if isinstance(items, dict):
+            function = self.compile_schema(items)
+            return [
+                "if isinstance(instance, list):",
+                "    for index, item in enumerate(instance):",
+                "        {}(item, path + (index,), errors)".format(function)
+            ]
+
+        body = ["if isinstance(instance, list):"]
+        for index, subschema in enumerate(items):
+            function = self.compile_schema(subschema)
+            body.extend([
+                "    if len(instance) > {}:".format(index),
+                "        {0}(instance[{1}], path + ({1},), errors)".format(
+                    function, index)
+            ])
+        return body
+
+    def _compile_uniqueItems(self, unique_items):
+        if not unique_items:
+            return []
+        message = "'%r has non-unique elements' % (instance,)"
+        return ["if isinstance(instance, list) and not uniq(instance):",
+                "    " + self._error("uniqueItems", unique_items, message)]
+
+    def _compile_anyOf(self, any_of):
+        functions = [self.compile_schema(subschema) for subschema in any_of]
+        message = ("'%r is not valid under any of the given schemas' "
+                   "% (instance,)")
+        return ["if not any_valid(instance, path, ({},)):".format(
+                    ", ".join(functions)),
+                "    " + self._error("anyOf", any_of, message)]
+
+    def _compile_allOf(self, all_of):
+        return ["{}(instance, path, errors)".format(
+            self.compile_schema(subschema)) for subschema in all_of]
+
+    def _compile_not(self, not_schema):
+        function = self.compile_schema(not_schema)
+        message = "'%r is not allowed for %r' % ({}, instance)".format(
+            self.const(not_schema))
+        return ["if any_valid(instance, path, ({},)):".format(function),
+                "    " + self._error("not", not_schema, message)]
+
+    def _compile_format(self, format_name):
+        if self.format_checker is None:
+            return []
+        return ["try:",
+                "    FC.check(instance, {})".format(self.const(format_name)),
+                "except FormatError as format_error:",
+                "    " + self._error("format", format_name,
+                                     "format_error.message")]
+
+    def _compile_minLength(self, min_length):
+        message = "'%r is too short' % (instance,)"
+        return ["if isinstance(instance, string_types) and "
+                "len(instance) < {}:".format(self.const(min_length)),
+                "    " + self._error("minLength", min_length, message)]
+
+    def _compile_maxLength(self, max_length):
+        message = "'%r is too long' % (instance,)"
+        return ["if isinstance(instance, string_types) and "
+                "len(instance) > {}:".format(self.const(max_length)),
+                "    " + self._error("maxLength", max_length, message)]
+
+    def _compile_pattern(self, pattern):
+        message = "'%r does not match %r' % (instance, {})".format(
+            self.const(pattern))
+        return ["if isinstance(instance, string_types) and "
+                "not {}.search(instance):".format(
+                    self.const(re.compile(pattern))),
+                "    " + self._error("pattern", pattern, message)]
+
+
+def _error(keyword, value, message, path, instance):
+    return ce.BaseValidationError(keyword, message, value, list(path),
+                                  instance=instance)
+
+
+class _InvalidInstance(Exception):
+    pass
+
+
+class _FirstErrorList(list):
+    """Lista de errores que interrumpe la validación al recibir el primero,
+    cuando sólo interesa saber si la instancia es válida."""
+
+    def append(self, error):
+        raise _InvalidInstance()
+
+
+def _any_valid(instance, path, functions):
+    """Indica si `instance` cumple con alguno de los subesquemas."""
+    for function in functions:
+        try:
+            function(instance, path, _FirstErrorList())
+        except _InvalidInstance:
+            continue
+        return True
+    return False
+
+
+def _fallback(validator, keyword, value, schema, scope, instance, path,
+              errors):
+    """Valida una palabra clave no compilada con la implementación de
+    jsonschema."""
+    validator.resolver.push_scope(scope)
+    try:
+        keyword_errors = list(jsonschema.Draft4Validator.VALIDATORS[keyword](
+            validator, value, instance, schema) or ())
+    finally:
+        validator.resolver.pop_scope()
+
+    for keyword_error in keyword_errors:
+        keyword_error._set(validator=keyword, validator_value=value,
+                           instance=instance, schema=schema)
+        errors.append(_error(
+            keyword_error.validator, keyword_error.validator_value,
+            keyword_error.message, list(path) + list(keyword_error.path),
+            keyword_error.instance))
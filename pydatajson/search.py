@@ -9,13 +9,190 @@ un catálogo.
 
 from __future__ import unicode_literals, print_function, with_statement, absolute_import
 
+from collections import OrderedDict
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
 from six import iteritems
 
 from pydatajson.custom_exceptions import ThemeIdRepeated, ThemeLabelRepeated
 from . import custom_exceptions as ce
+from . import fulltext
+from . import query
+from . import readers
 from .readers import read_catalog
 from .time_series import distribution_has_time_index, dataset_has_time_series, field_is_time_series
 
+# índices que arma `CatalogIndex`: para cada tipo de entidad, los campos por
+# los que se la busca
+INDEXED_FIELDS = {
+    "dataset": [("identifier",), ("title",)],
+    "distribution": [("identifier",), ("title",),
+                     ("dataset_identifier", "title")],
+    "field": [("id",), ("title",), ("distribution_identifier", "title")],
+    "theme": [("id",), ("label",)],
+}
+# campos que cuenta `facets` si no se indican otros
+DEFAULT_FACETS = ["superTheme", "theme", "publisher.name",
+                  "distribution.format", "accrualPeriodicity", "language",
+                  "license"]
+
+
+class CatalogIndex(object):
+    """Índices de las entidades de un catálogo por sus identificadores y
+    títulos, para que `get_dataset`, `get_distribution`, `get_field` y
+    `get_theme` no recorran el catálogo entero en cada búsqueda.
+
+    Los índices de cada tipo de entidad se arman recién cuando se los
+    necesita, con vistas de las entidades (como las de `iter_datasets`,
+    `iter_distributions`, `iter_fields` y `get_themes`), y se descartan
+    cuando:
+
+        - Se reemplaza la lista de datasets o de temas, o cambia su
+          cantidad.
+        - Una entidad encontrada ya no tiene el valor buscado, o ya no está
+          en la posición del catálogo en la que se la indexó (por ejemplo,
+          porque se la quitó o se la reemplazó por otra).
+        - Se llama a `invalidate`.
+
+    Una búsqueda que no encuentra nada no rearma el índice, para que buscar
+    identificadores inexistentes no recorra el catálogo cada vez. Tras
+    agregar, reemplazar o renombrar entidades sin cambiar la cantidad de
+    datasets ni de temas (por ejemplo, al agregar una distribución a un
+    dataset), debe llamarse a `invalidate`. Los métodos de `DataJson` que
+    modifican el catálogo lo hacen.
+
+    Args:
+        catalog (dict): Representación interna del catálogo.
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self._indexes = {}
+        self._signature = None
+
+    def invalidate(self):
+        """Descarta todos los índices."""
+        self._indexes = {}
+
+    def lookup(self, entity, fields, key):
+        """Busca las entidades cuyos `fields` valen `key`.
+
+        Args:
+            entity (str): "dataset", "distribution", "field" o "theme".
+            fields (tuple): Campos indexados de la entidad (ver
+                `INDEXED_FIELDS`).
+            key (tuple): Valores buscados de esos campos.
+
+        Returns:
+            list: Las entidades encontradas, en el orden del catálogo (ver
+                `EntityView.to_catalog_entity`).
+        """
+        signature = self._catalog_signature()
+        if not _same_signature(signature, self._signature):
+            self._indexes = {}
+            self._signature = signature
+
+        rebuilt = entity not in self._indexes
+        if rebuilt:
+            self._build(entity)
+
+        found = self._indexes[entity][fields].get(key, [])
+        is_stale = any(_index_key(entity, found_entity, fields) != key or
+                       not _is_at_location(location)
+                       for found_entity, location in found)
+        if is_stale and not rebuilt:
+            self._build(entity)
+            found = self._indexes[entity][fields].get(key, [])
+        return [_to_catalog_entity(found_entity) for found_entity, _ in found]
+
+    def _catalog_signature(self):
+        datasets = self.catalog.get("dataset")
+        themes = self.catalog.get("themeTaxonomy")
+        return (datasets, len(datasets or []), themes, len(themes or []))
+
+    def _build(self, entity):
+        indexes = {fields: {} for fields in INDEXED_FIELDS[entity]}
+        for indexed_entity, location in self._iter_located(entity):
+            for fields, index in iteritems(indexes):
+                key = _index_key(entity, indexed_entity, fields)
+                index.setdefault(key, []).append((indexed_entity, location))
+        self._indexes[entity] = indexes
+
+    def _iter_located(self, entity):
+        """Genera las vistas de las entidades de un tipo con su ubicación en
+        el catálogo: las ternas (lista, posición, elemento) que llevan a
+        ellas."""
+        if entity == "theme":
+            themes = get_themes(self.catalog) or []
+            for position, theme in enumerate(themes):
+                yield theme, ((themes, position, theme),)
+            return
+
+        datasets = self.catalog["dataset"]
+        for dataset_position, dataset in enumerate(datasets):
+            dataset_location = ((datasets, dataset_position, dataset),)
+            if entity == "dataset":
+                yield EntityView(dataset), dataset_location
+                continue
+
+            distributions = dataset["distribution"]
+            for position, distribution in enumerate(distributions):
+                distribution_location = dataset_location + (
+                    (distributions, position, distribution),)
+                if entity == "distribution":
+                    yield EntityView(distribution, {
+                        "dataset_identifier": dataset["identifier"]
+                    }), distribution_location
+                    continue
+
+                fields = distribution.get("field")
+                if not isinstance(fields, list):
+                    continue
+                for field_position, field in enumerate(fields):
+                    yield EntityView(field, OrderedDict([
+                        ("dataset_identifier", dataset["identifier"]),
+                        ("distribution_identifier",
+                         distribution["identifier"])
+                    ])), distribution_location + (
+                        (fields, field_position, field),)
+
+
+def _same_signature(signature, other):
+    # las listas se comparan por identidad: compararlas por valor costaría
+    # tanto como rearmar los índices
+    return (other is not None and
+            all(value is other_value if isinstance(value, list)
+                else value == other_value
+                for value, other_value in zip(signature, other)))
+
+
+def _is_at_location(location):
+    return all(position < len(container) and container[position] is element
+               for container, position, element in location)
+
+
+def _index_key(entity, indexed_entity, fields):
+    key = tuple(indexed_entity.get(field) for field in fields)
+    # los temas se buscan por id sin distinguir mayúsculas
+    if entity == "theme" and fields == ("id",) and key[0] is not None:
+        key = (key[0].lower(),)
+    return key
+
+
+def _to_catalog_entity(entity):
+    if isinstance(entity, EntityView):
+        return entity.to_catalog_entity()
+    return entity
+
+
+def _catalog_index(catalog):
+    """Devuelve los índices de un catálogo, si los tiene (ver
+    `CatalogIndex`)."""
+    return getattr(catalog, "search_index", None)
+
 
 def get_themes(catalog):
     catalog = read_catalog(catalog)
@@ -24,109 +201,271 @@ def get_themes(catalog):
 
 def get_datasets(catalog, filter_in=None, filter_out=None, meta_field=None,
                  exclude_meta_fields=None, only_time_series=False):
-    filter_in = filter_in or {}
-    filter_out = filter_out or {}
+    return _materialize(
+        iter_datasets(catalog, filter_in, filter_out, exclude_meta_fields,
+                      only_time_series), meta_field)
+
+
+def iter_datasets(catalog, filter_in=None, filter_out=None,
+                  exclude_meta_fields=None, only_time_series=False):
+    """Versión de `get_datasets` que genera vistas de los datasets, sin
+    copiarlos (ver `EntityView`).
+
+    Los filtros admiten operadores y caminos anidados (ver el módulo
+    `query`).
+
+    Yields:
+        EntityView: Cada dataset que pasa los filtros.
+    """
     catalog = read_catalog(catalog)
+    return _iter_dataset_views(
+        catalog["dataset"], query.compile_filters(filter_in, filter_out),
+        exclude_meta_fields, only_time_series)
 
-    filtered_datasets = [
-        dataset for dataset in catalog["dataset"] if
-        _filter_dictionary(dataset, filter_in.get("dataset"), filter_out.get("dataset"))
-    ]
 
-    # realiza filtros especiales
-    if only_time_series:
-        filtered_datasets = [dataset for dataset in filtered_datasets if dataset_has_time_series(dataset)]
+def stream_datasets(catalog, filter_in=None, filter_out=None, meta_field=None,
+                    exclude_meta_fields=None, only_time_series=False):
+    """Versión de `get_datasets` que genera los datasets de a uno.
 
-    if meta_field:
-        return [dataset[meta_field] for dataset in filtered_datasets if meta_field in dataset]
+    Si el catálogo es un path o URL a un archivo JSON, se lee en forma
+    incremental (ver `readers.iter_datasets`), por lo que puede recorrer
+    catálogos que no entran en memoria.
 
-    if exclude_meta_fields:
-        meta_filtered_datasets = []
-        for dataset in filtered_datasets:
-            dataset_meta_filtered = dataset.copy()
-            for excluded_meta_field in exclude_meta_fields:
-                dataset_meta_filtered.pop(excluded_meta_field, None)
-            meta_filtered_datasets.append(dataset_meta_filtered)
+    Yields:
+        dict: Cada dataset que pasa los filtros (o el valor de su campo
+            `meta_field`).
+    """
+    views = _iter_dataset_views(
+        readers.iter_datasets(catalog),
+        query.compile_filters(filter_in, filter_out), exclude_meta_fields,
+        only_time_series)
+    for value in _iter_materialized(views, meta_field):
+        yield value
 
-        return meta_filtered_datasets
 
-    else:
-        return filtered_datasets
+def _iter_dataset_views(datasets, filters, exclude_meta_fields=None,
+                        only_time_series=False):
+    dataset_filter = filters["dataset"]
+
+    for dataset in datasets:
+        if dataset_filter and not dataset_filter(dataset):
+            continue
+
+        # realiza filtros especiales
+        if only_time_series and not dataset_has_time_series(dataset):
+            continue
+
+        yield EntityView(dataset, excluded=exclude_meta_fields)
 
 
 def get_distributions(catalog, filter_in=None, filter_out=None,
                       meta_field=None, exclude_meta_fields=None,
                       only_time_series=False):
-    filter_in = filter_in or {}
-    filter_out = filter_out or {}
+    return _materialize(
+        iter_distributions(catalog, filter_in, filter_out,
+                           exclude_meta_fields, only_time_series), meta_field)
+
+
+def iter_distributions(catalog, filter_in=None, filter_out=None,
+                       exclude_meta_fields=None, only_time_series=False):
+    """Versión de `get_distributions` que genera vistas de las
+    distribuciones, sin copiarlas ni modificarlas (ver `EntityView`).
+
+    Yields:
+        EntityView: Cada distribución que pasa los filtros, con el campo
+            "dataset_identifier" de su dataset.
+    """
     catalog = read_catalog(catalog)
+    return _iter_distribution_views(
+        catalog["dataset"], query.compile_filters(filter_in, filter_out),
+        exclude_meta_fields, only_time_series)
+
 
-    distributions = []
-    for dataset in get_datasets(catalog, filter_in, filter_out):
+def _iter_distribution_views(datasets, filters, exclude_meta_fields=None,
+                             only_time_series=False):
+    distribution_filter = filters["distribution"]
+
+    for dataset in _iter_dataset_views(datasets, filters):
         for distribution in dataset["distribution"]:
-            # agrega el id del dataset
-            distribution["dataset_identifier"] = dataset["identifier"]
-            distributions.append(distribution)
-
-    filtered_distributions = [
-        distribution for distribution in distributions if
-        _filter_dictionary(distribution, filter_in.get("distribution"),
-                           filter_out.get("distribution"))
-    ]
-
-    # realiza filtros especiales
-    if only_time_series:
-        filtered_distributions = [distribution for distribution in filtered_distributions if
-                                  distribution_has_time_index(distribution)]
-
-    if meta_field:
-        return [distribution[meta_field]
-                for distribution in filtered_distributions
-                if meta_field in distribution]
-
-    if exclude_meta_fields:
-        meta_filtered_distributions = []
-        for distribution in filtered_distributions:
-            distribution_meta_filtered = distribution.copy()
-            for excluded_meta_field in exclude_meta_fields:
-                distribution_meta_filtered.pop(excluded_meta_field, None)
-            meta_filtered_distributions.append(distribution_meta_filtered)
-
-        return meta_filtered_distributions
+            # agrega el id del dataset, que también puede filtrarse
+            extra = {"dataset_identifier": dataset["identifier"]}
+            view = EntityView(distribution, extra)
+            if distribution_filter and not distribution_filter(view):
+                continue
 
-    else:
-        return filtered_distributions
+            # realiza filtros especiales
+            if (only_time_series and
+                    not distribution_has_time_index(distribution)):
+                continue
+
+            if exclude_meta_fields:
+                view = EntityView(distribution, extra, exclude_meta_fields)
+            yield view
 
 
 def get_fields(catalog, filter_in=None, filter_out=None, meta_field=None,
                only_time_series=False):
-    filter_in = filter_in or {}
-    filter_out = filter_out or {}
+    return _materialize(
+        iter_fields(catalog, filter_in, filter_out, only_time_series),
+        meta_field)
+
+
+def iter_fields(catalog, filter_in=None, filter_out=None,
+                only_time_series=False):
+    """Versión de `get_fields` que genera vistas de los campos, sin
+    copiarlos ni modificarlos (ver `EntityView`).
+
+    Yields:
+        EntityView: Cada campo que pasa los filtros, con los campos
+            "dataset_identifier" y "distribution_identifier" de su dataset y
+            su distribución.
+    """
     catalog = read_catalog(catalog)
+    filters = query.compile_filters(filter_in, filter_out)
+    field_filter = filters["field"]
 
-    fields = []
-    for distribution in get_distributions(catalog, filter_in, filter_out,
-                                          only_time_series=only_time_series):
+    for distribution in _iter_distribution_views(
+            catalog["dataset"], filters, only_time_series=only_time_series):
         if "field" in distribution and isinstance(distribution["field"], list):
             for field in distribution["field"]:
-                if not only_time_series or field_is_time_series(field,
-                                                                distribution):
-                    # agrega el id del dataset
-                    field["dataset_identifier"] = distribution[
-                        "dataset_identifier"]
-                    # agrega el id de la distribución
-                    field["distribution_identifier"] = distribution[
-                        "identifier"]
-                    fields.append(field)
-
-    filtered_fields = [field for field in fields if
-                       _filter_dictionary(field, filter_in.get("field"), filter_out.get("field"))]
-
-    if meta_field:
-        return [field[meta_field] for field in filtered_fields
-                if meta_field in field]
-    else:
-        return filtered_fields
+                if only_time_series and not field_is_time_series(
+                        field, distribution):
+                    continue
+
+                # agrega los ids del dataset y de la distribución
+                view = EntityView(field, OrderedDict([
+                    ("dataset_identifier", distribution["dataset_identifier"]),
+                    ("distribution_identifier", distribution["identifier"])
+                ]))
+                if field_filter and not field_filter(view):
+                    continue
+                yield view
+
+
+class EntityView(Mapping):
+    """Vista de sólo lectura de una entidad de un catálogo (dataset,
+    distribución o campo), que no copia ni modifica su diccionario.
+
+    Se comporta como un diccionario con las claves de la entidad, salvo las
+    excluidas, más las claves agregadas (por ejemplo, los identificadores de
+    las entidades que la contienen). No admite asignaciones; sus valores son
+    los de la entidad, así que tampoco deben modificarse.
+
+    Args:
+        entity (dict): Diccionario de la entidad.
+        extra (dict): Claves a agregar a las de la entidad (o a reemplazar,
+            si ya las tiene).
+        excluded (list): Claves de la entidad a ocultar.
+    """
+
+    __slots__ = ("entity", "_extra", "_excluded")
+
+    def __init__(self, entity, extra=None, excluded=None):
+        self.entity = entity
+        self._extra = extra or {}
+        self._excluded = frozenset(excluded or ())
+
+    def __getitem__(self, key):
+        if key in self._extra:
+            return self._extra[key]
+        if key in self._excluded:
+            raise KeyError(key)
+        return self.entity[key]
+
+    def __contains__(self, key):
+        return (key in self._extra or
+                key not in self._excluded and key in self.entity)
+
+    def __iter__(self):
+        for key in self.entity:
+            if key not in self._excluded and key not in self._extra:
+                yield key
+        for key in self._extra:
+            yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return "EntityView({!r})".format(self.to_dict())
+
+    def copy(self):
+        return dict(self)
+
+    def to_dict(self):
+        """Devuelve la entidad como diccionario: la propia entidad si la
+        vista no agrega ni oculta claves, o una copia si lo hace."""
+        if not self._extra and not self._excluded:
+            return self.entity
+        return dict((key, self[key]) for key in self)
+
+    def to_catalog_entity(self):
+        """Devuelve la entidad como la devuelven las funciones `get_*`: el
+        propio diccionario del catálogo, en el que se escriben las claves
+        agregadas (ej.: "dataset_identifier"), o una copia si la vista
+        oculta claves o la entidad es de sólo lectura (ver
+        `readers.configure_catalog_cache`)."""
+        if isinstance(self.entity, readers.ReadOnlyDict):
+            return self.to_dict()
+        if self._extra:
+            self.entity.update(self._extra)
+        return self.to_dict() if self._excluded else self.entity
+
+
+def _materialize(views, meta_field=None):
+    return list(_iter_materialized(views, meta_field))
+
+
+def _iter_materialized(views, meta_field=None):
+    """Convierte vistas de entidades en los diccionarios (o los valores de
+    su campo `meta_field`) que devuelven las funciones `get_*`."""
+    for view in views:
+        if meta_field:
+            if meta_field in view:
+                yield view[meta_field]
+        else:
+            yield view.to_catalog_entity()
+
+
+def get_fulltext_index(catalog):
+    """Devuelve el índice para buscar texto libre en la metadata de un
+    catálogo (ver `fulltext.FullTextIndex`).
+
+    Un `DataJson` arma su índice la primera vez y lo reutiliza: sus métodos
+    `remove_dataset` y `remove_distribution` lo mantienen actualizado. Tras
+    modificar sus datasets de cualquier otra forma, deben volver a
+    indexarse con `add_dataset`.
+
+    Args:
+        catalog (dict or str): Representación externa/interna de un
+            catálogo.
+    """
+    catalog = read_catalog(catalog)
+    if not hasattr(catalog, "fulltext_index"):
+        return fulltext.FullTextIndex.from_catalog(catalog)
+    if catalog.fulltext_index is None:
+        catalog.fulltext_index = fulltext.FullTextIndex.from_catalog(catalog)
+    return catalog.fulltext_index
+
+
+def search_text(catalog, query, limit=10, prefix=False, types=None):
+    """Busca texto libre en los títulos, descripciones, palabras clave y
+    temas de los datasets, distribuciones y campos de un catálogo (ver
+    `get_fulltext_index` y `fulltext.FullTextIndex.search`).
+
+    Args:
+        catalog (dict or str): Representación externa/interna de un
+            catálogo.
+        query (str): Texto a buscar.
+        limit (int): Cantidad máxima de resultados.
+        prefix (bool): Si es True, el último término se busca como prefijo.
+        types (list): Tipos de entidades a devolver ("dataset",
+            "distribution" y/o "field"). Si es None, todos.
+
+    Returns:
+        list: Las entidades encontradas, de la más a la menos relevante.
+    """
+    return get_fulltext_index(catalog).search(query, limit, prefix, types)
 
 
 def get_time_series(catalog, **kwargs):
@@ -134,14 +473,106 @@ def get_time_series(catalog, **kwargs):
     return get_fields(catalog, **kwargs)
 
 
+def facets(catalog, fields=None, filter_in=None, filter_out=None):
+    """Cuenta cuántas entidades del catálogo tienen cada valor de uno o más
+    campos, en un único recorrido del catálogo.
+
+    Cada campo es un camino como los de los filtros (ver el módulo `query`).
+    Si empieza con "distribution." o "field.", se cuentan las distribuciones
+    o los campos ("distribution.format", "field.type"); si no, los datasets
+    ("theme", "publisher.name"). En los campos con listas de valores
+    ("theme", "keyword"), cada valor distinto de la lista suma uno.
+
+    Args:
+        catalog (dict or str): Representación externa/interna de un
+            catálogo.
+        fields (list): Campos a contar. Si es None, se cuentan los de
+            `DEFAULT_FACETS`.
+        filter_in (dict): Condiciones que deben cumplir las entidades
+            contadas, como en `get_datasets`.
+        filter_out (dict): Condiciones que no deben cumplir las entidades
+            contadas.
+
+    Returns:
+        dict: Para cada campo, un diccionario con la cantidad de entidades
+            de cada valor.
+
+    Example:
+        >>> facets(catalog, ["theme", "distribution.format"])
+        {"theme": {"compras": 2}, "distribution.format": {"CSV": 3}}
+    """
+    catalog = read_catalog(catalog)
+    fields = fields or DEFAULT_FACETS
+    filters = query.compile_filters(filter_in, filter_out)
+
+    getters = {level: [] for level in query.LEVELS}
+    for field in fields:
+        level, path = "dataset", field
+        prefix, _, rest = field.partition(query.PATH_SEPARATOR)
+        if prefix in getters and prefix != "dataset" and rest:
+            level, path = prefix, rest
+        getters[level].append((field, query.compile_getter(path)))
+    counts = {field: {} for field in fields}
+
+    for dataset in _iter_dataset_views(catalog.get("dataset", []), filters):
+        _count_facets(dataset, getters["dataset"], counts)
+        if not getters["distribution"] and not getters["field"]:
+            continue
+
+        for distribution in dataset.get("distribution") or []:
+            extra = {"dataset_identifier": dataset.get("identifier")}
+            distribution = EntityView(distribution, extra)
+            if (filters["distribution"] and
+                    not filters["distribution"](distribution)):
+                continue
+            _count_facets(distribution, getters["distribution"], counts)
+            if not getters["field"]:
+                continue
+
+            for field in distribution.get("field") or []:
+                field = EntityView(field, OrderedDict([
+                    ("dataset_identifier", dataset.get("identifier")),
+                    ("distribution_identifier",
+                     distribution.get("identifier"))
+                ]))
+                if filters["field"] and not filters["field"](field):
+                    continue
+                _count_facets(field, getters["field"], counts)
+
+    return counts
+
+
+def _count_facets(entity, getters, counts):
+    for field, get_value in getters:
+        value = get_value(entity)
+        values = value if isinstance(value, list) else [value]
+        field_counts = counts[field]
+        counted = set()
+        for value in values:
+            # no se cuentan los valores vacíos ni los que no son contables
+            # (ej.: diccionarios), ni dos veces el mismo valor de una lista
+            if value is None or value == "" or isinstance(value, (dict, list)):
+                continue
+            if value in counted:
+                continue
+            counted.add(value)
+            field_counts[value] = field_counts.get(value, 0) + 1
+
+
 def get_dataset(catalog, identifier=None, title=None):
     msg = "Se requiere un 'identifier' o 'title' para buscar el dataset."
     assert identifier or title, msg
     catalog = read_catalog(catalog)
 
-    if identifier:
+    index = _catalog_index(catalog)
+    if identifier and index:
+        filtered_datasets = index.lookup(
+            "dataset", ("identifier",), (identifier,))
+    elif identifier:
         filtered_datasets = get_datasets(
             catalog, {"dataset": {"identifier": identifier}})
+    elif title and index:
+        filtered_datasets = index.lookup("dataset", ("title",), (title,))
     elif title:  # TODO: is this required?
         filtered_datasets = get_datasets(
             catalog, {"dataset": {"title": title}})
@@ -166,8 +597,12 @@ def get_distribution(catalog, identifier=None, title=None,
     catalog = read_catalog(catalog)
 
     # 1. BUSCA las distribuciones en el catálogo
+    index = _catalog_index(catalog)
+    if index:
+        filtered_distributions = _lookup_distributions(
+            index, identifier, title, dataset_identifier)
     # toma la distribution que tenga el id único
-    if identifier:
+    elif identifier:
         filtered_distributions = get_distributions(
             catalog, {"distribution": {"identifier": identifier}})
     # toma la distribution que tenga el título único, dentro de un dataset
@@ -237,7 +672,11 @@ def get_field(catalog, identifier=None, title=None,
     assert identifier or title, msg
 
     # 1. BUSCA los fields en el catálogo
-    if identifier:
+    index = _catalog_index(catalog)
+    if index:
+        filtered_fields = _lookup_fields(
+            index, identifier, title, distribution_identifier)
+    elif identifier:
         filtered_fields = get_fields(
             catalog, {"field": {"id": identifier}})
     elif title and distribution_identifier:
@@ -279,13 +718,21 @@ def get_theme(catalog, identifier=None, label=None):
         raise ce.ThemeTaxonomyNonExistentError()
 
     # filtra por id (preferentemente) o label
+    index = _catalog_index(catalog)
     if identifier:
-        filtered_themes = [theme for theme in themes if theme["id"].lower() == identifier.lower()]
+        if index:
+            filtered_themes = index.lookup("theme", ("id",),
+                                           (identifier.lower(),))
+        else:
+            filtered_themes = [theme for theme in themes if theme["id"].lower() == identifier.lower()]
         if len(filtered_themes) > 1:
             raise ThemeIdRepeated([x["id"] for x in filtered_themes])
 
     elif label:
-        filtered_themes = [theme for theme in themes if theme["label"] == label]
+        if index:
+            filtered_themes = index.lookup("theme", ("label",), (label,))
+        else:
+            filtered_themes = [theme for theme in themes if theme["label"] == label]
         if len(filtered_themes) > 1:
             raise ThemeLabelRepeated([x["label"] for x in filtered_themes])
 
@@ -298,6 +745,24 @@ def get_theme(catalog, identifier=None, label=None):
         return filtered_themes[0]
 
 
+def _lookup_distributions(index, identifier, title, dataset_identifier):
+    if identifier:
+        return index.lookup("distribution", ("identifier",), (identifier,))
+    elif title and dataset_identifier:
+        return index.lookup("distribution", ("dataset_identifier", "title"),
+                            (dataset_identifier, title))
+    return index.lookup("distribution", ("title",), (title,))
+
+
+def _lookup_fields(index, identifier, title, distribution_identifier):
+    if identifier:
+        return index.lookup("field", ("id",), (identifier,))
+    elif title and distribution_identifier:
+        return index.lookup("field", ("distribution_identifier", "title"),
+                            (distribution_identifier, title))
+    return index.lookup("field", ("title",), (title,))
+
+
 def get_catalog_metadata(catalog, exclude_meta_fields=None):
     """Devuelve sólo la metadata de nivel catálogo."""
     exclude_meta_fields = exclude_meta_fields or []
@@ -308,20 +773,3 @@ def get_catalog_metadata(catalog, exclude_meta_fields=None):
         catalog_dict_copy.pop(excluded_meta_field, None)
 
     return catalog_dict_copy
-
-
-def _filter_dictionary(dictionary, filter_in=None, filter_out=None):
-    # print(filter_in, filter_out)
-    if filter_in:
-        # chequea que el objeto tenga las propiedades de filtro positivo
-        for key, value in iteritems(filter_in):
-            if dictionary.get(key) != value:
-                return False
-
-    if filter_out:
-        # chequea que el objeto NO tenga las propiedades de filtro negativo
-        for key, value in iteritems(filter_out):
-            if dictionary.get(key) == value:
-                return False
-
-    return True
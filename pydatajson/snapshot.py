@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Módulo 'snapshot' de Pydatajson
+
+Contiene los métodos para guardar un catálogo ya leído en un archivo binario
+(un "snapshot") y volver a cargarlo sin parsear de nuevo su JSON o XLSX.
+
+Un snapshot es un archivo con la firma `SNAPSHOT_MAGIC`, seguida de un
+encabezado y del catálogo, ambos serializados con pickle. El encabezado
+guarda la versión del formato, la versión de pydatajson y una huella del
+archivo de origen, para detectar snapshots desactualizados. Sólo se guardan
+snapshots de catálogos remotos cuyo servidor informa ETag o Last-Modified.
+"""
+
+from __future__ import unicode_literals, print_function, with_statement, absolute_import
+
+import io
+import mmap
+import os
+
+from six import string_types
+from six.moves import cPickle as pickle
+from six.moves.urllib_parse import urlparse
+
+from . import custom_exceptions as ce
+from . import download
+from . import helpers
+
+SNAPSHOT_MAGIC = b"PYDATAJSON-SNAPSHOT\n"
+# se incrementa cada vez que cambia el contenido del snapshot
+SNAPSHOT_FORMAT_VERSION = 1
+# el encabezado usa el protocolo 2 para que cualquier versión de Python pueda
+# leerlo, aunque el catálogo esté guardado con un protocolo más nuevo
+SNAPSHOT_HEADER_PROTOCOL = 2
+
+
+def write_snapshot(catalog, path, source=None, default_values=None):
+    """Guarda un catálogo en un snapshot.
+
+    El archivo se escribe en un temporal que luego se renombra, para que
+    otros procesos nunca lean un snapshot a medio escribir.
+
+    Args:
+        catalog (dict): Representación interna de un catálogo.
+        path (str): Path del snapshot a escribir.
+        source (str): Path o URL del que se leyó el catálogo, si lo hay.
+        default_values (dict): Valores default con los que se leyó el
+            catálogo, si los hay.
+
+    Raises:
+        ValueError: Si `source` es una URL cuyo servidor no informa ETag ni
+            Last-Modified: no habría forma de saber cuándo el snapshot
+            queda desactualizado.
+    """
+    header = _snapshot_header(source, default_values)
+    if not _is_verifiable(header["fingerprint"]):
+        raise ValueError(
+            "No se puede guardar un snapshot de {}: el servidor no informa "
+            "ETag ni Last-Modified, por lo que no podría saberse cuándo queda "
+            "desactualizado.".format(source))
+    header["protocol"] = pickle.HIGHEST_PROTOCOL
+
+    temp_path = helpers.make_temp_file(path)
+    try:
+        with io.open(temp_path, "wb") as snapshot_file:
+            snapshot_file.write(SNAPSHOT_MAGIC)
+            pickle.dump(header, snapshot_file, SNAPSHOT_HEADER_PROTOCOL)
+            pickle.dump(dict(catalog), snapshot_file,
+                        pickle.HIGHEST_PROTOCOL)
+        helpers.replace_file(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def read_snapshot(path, source=None, default_values=None):
+    """Carga un catálogo de un snapshot, mapeando el archivo en memoria.
+
+    Args:
+        path (str): Path del snapshot a leer.
+        source (str): Path o URL del que debería haberse leído el catálogo.
+            Si es distinto al guardado en el snapshot, o si el archivo
+            cambió desde que se escribió el snapshot, este se considera
+            desactualizado. Si es None, se verifica el origen guardado en
+            el snapshot.
+        default_values (dict): Valores default con los que debería haberse
+            leído el catálogo.
+
+    Returns:
+        dict: Representación interna del catálogo guardado.
+
+    Raises:
+        StaleSnapshotError: Si el snapshot no existe, no es válido o está
+            desactualizado.
+    """
+    if not os.path.isfile(path):
+        raise ce.StaleSnapshotError(path, "el archivo no existe")
+
+    with io.open(path, "rb") as snapshot_file:
+        if os.fstat(snapshot_file.fileno()).st_size == 0:
+            raise ce.StaleSnapshotError(path, "el archivo está vacío")
+        snapshot_map = mmap.mmap(snapshot_file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+        try:
+            if snapshot_map.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                raise ce.StaleSnapshotError(path, "no es un snapshot")
+            header = pickle.load(snapshot_map)
+            _check_header(path, header, source, default_values)
+            return helpers.load_pickle_without_gc(snapshot_map)
+        finally:
+            snapshot_map.close()
+
+
+def source_fingerprint(source):
+    """Devuelve una huella del origen de un catálogo, que cambia cuando el
+    archivo se modifica.
+
+    Para archivos locales es su path absoluto, su fecha de modificación y su
+    tamaño. Para URLs es la URL y los validadores HTTP (ETag y
+    Last-Modified) de su contenido actual (ver `download.get_validators`).
+
+    Args:
+        source (str): Path o URL de un catálogo. Si es None (por ejemplo,
+            porque el catálogo se creó a partir de un diccionario), la huella
+            es None.
+    """
+    if not isinstance(source, string_types):
+        return None
+    if urlparse(source).scheme in ["http", "https"]:
+        validators = download.get_validators(source)
+        return [source, validators["etag"], validators["last_modified"]]
+    location = os.path.abspath(source)
+    stat = os.stat(location)
+    return [location, stat.st_mtime, stat.st_size]
+
+
+def _is_verifiable(fingerprint):
+    """Una huella de URL sin ETag ni Last-Modified no cambia aunque cambie
+    el catálogo."""
+    return not fingerprint or any(value is not None
+                                  for value in fingerprint[1:])
+
+
+def _library_version():
+    # se importa acá porque el paquete importa este módulo antes de definir
+    # su versión
+    from . import __version__
+    return __version__
+
+
+def _snapshot_header(source, default_values):
+    return {
+        "format": SNAPSHOT_FORMAT_VERSION,
+        "version": _library_version(),
+        "fingerprint": source_fingerprint(source),
+        "default_values": default_values or None,
+    }
+
+
+def _check_header(path, header, source, default_values):
+    if not isinstance(header, dict):
+        raise ce.StaleSnapshotError(path, "el encabezado no es válido")
+    if header.get("protocol", 0) > pickle.HIGHEST_PROTOCOL:
+        raise ce.StaleSnapshotError(
+            path, "fue escrito con una versión más nueva de Python")
+
+    stored_fingerprint = header.get("fingerprint")
+    if source is None and isinstance(stored_fingerprint, list):
+        # sin un origen indicado, se verifica que no haya cambiado el
+        # archivo o la URL de la que se escribió el snapshot
+        source = stored_fingerprint[0]
+
+    try:
+        expected = _snapshot_header(source, default_values)
+    except Exception as e:
+        # sin poder consultar el origen no puede saberse si cambió
+        raise ce.StaleSnapshotError(
+            path, "no se pudo consultar su origen: {}".format(e))
+    if not _is_verifiable(expected["fingerprint"]):
+        raise ce.StaleSnapshotError(
+            path, "el servidor de su origen no informa ETag ni "
+                  "Last-Modified")
+    for key in ["format", "version", "fingerprint", "default_values"]:
+        if header.get(key) != expected[key]:
+            raise ce.StaleSnapshotError(
+                path, "cambió su '{}': {} != {}".format(
+                    key, header.get(key), expected[key]))
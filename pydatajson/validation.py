@@ -8,10 +8,16 @@ Contiene los métodos para validar el perfil de metadatos de un catálogo.
 
 from __future__ import unicode_literals, print_function, with_statement, absolute_import
 
+import copy
+import itertools
+import logging
+import math
+import multiprocessing
 import os
 import platform
 import mimetypes
-from collections import Counter
+import weakref
+from collections import Counter, OrderedDict
 
 try:
     from urlparse import urlparse
@@ -20,17 +26,152 @@ except ImportError:
 
 import jsonschema
 from openpyxl.styles import Alignment, Font
+from six import string_types
 
+from . import cache
 from . import custom_exceptions as ce
 from . import readers
+from . import schema_compiler
 from . import writers
 
 ABSOLUTE_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
 ABSOLUTE_SCHEMA_DIR = os.path.join(ABSOLUTE_PROJECT_DIR, "schemas")
 DEFAULT_CATALOG_SCHEMA_FILENAME = "catalog.json"
 
+# motores de validación disponibles para create_validator
+VALIDATION_ENGINES = {
+    "jsonschema": jsonschema.Draft4Validator,
+    "compiled": schema_compiler.CompiledValidator
+}
+DEFAULT_VALIDATION_ENGINE = "jsonschema"
+
+logger = logging.getLogger(__name__)
+
+# validadores ya construidos, compartidos por todo el proceso
+_VALIDATORS_CACHE = {}
+_SPLIT_VALIDATORS_CACHE = weakref.WeakKeyDictionary()
+_FINGERPRINTS_CACHE = weakref.WeakKeyDictionary()
+
+# últimas validaciones realizadas, por contenido del catálogo
+VALIDATIONS_MEMO_SIZE = 32
+_VALIDATIONS_MEMO = cache.MemoryStore(max_items=VALIDATIONS_MEMO_SIZE)
+
+# cantidad de bloques de datasets por proceso al validar en paralelo
+DATASETS_CHUNKS_PER_WORKER = 4
+# validador de datasets de cada proceso de un pool de validación
+_WORKER_DATASET_VALIDATOR = None
+
+# orden en que is_valid_catalog evalúa las palabras clave de cada esquema:
+# primero las más baratas, después las que recorren subesquemas y por último
+# las expresiones regulares y los formatos
+FAIL_FAST_KEYWORDS_ORDER = [
+    "$ref", "required", "type", "enum", "minLength", "maxLength", "minItems",
+    "maxItems", "minProperties", "maxProperties", "minimum", "maximum",
+    "multipleOf", "dependencies", "additionalProperties", "properties",
+    "patternProperties", "additionalItems", "items", "allOf", "anyOf",
+    "oneOf", "not", "pattern", "format", "uniqueItems"
+]
+_FAIL_FAST_VALIDATORS_CACHE = weakref.WeakKeyDictionary()
+
+# columnas de los reportes de validación exportados a CSV o XLSX
+VALIDATION_TABLES_FIELDS = OrderedDict([
+    ("catalog", ["catalog_title", "catalog_status", "catalog_error_message",
+                 "catalog_error_location"]),
+    ("dataset", ["dataset_title", "dataset_identifier", "dataset_list_index",
+                 "dataset_status", "dataset_error_message",
+                 "dataset_error_location"])
+])
+VALIDATION_COLUMN_STYLES = {
+    "catalog": {
+        "catalog_status": {"width": 20},
+        "catalog_error_location": {"width": 40},
+        "catalog_error_message": {"width": 40},
+        "catalog_title": {"width": 20},
+    },
+    "dataset": {
+        "dataset_error_location": {"width": 20},
+        "dataset_identifier": {"width": 40},
+        "dataset_status": {"width": 20},
+        "dataset_title": {"width": 40},
+        "dataset_list_index": {"width": 20},
+        "dataset_error_message": {"width": 40},
+    }
+}
+
+# cantidad máxima de valores recordados por CachedFormatChecker, por formato
+FORMAT_CACHE_SIZE = 10000
+
+
+class CachedFormatChecker(jsonschema.FormatChecker):
+    """FormatChecker que recuerda el resultado de los últimos valores
+    chequeados para cada formato.
+
+    Los catálogos repiten muchas veces las mismas URIs (licencias,
+    taxonomías), direcciones de mail y fechas; cada valor repetido se
+    chequea una única vez. Sólo se recuerdan valores de tipo string.
+
+    Args:
+        formats (list): Formatos a chequear. Por default, todos los que
+            conoce jsonschema.
+        max_items (int): Cantidad máxima de valores recordados por formato.
+    """
+
+    def __init__(self, formats=None, max_items=FORMAT_CACHE_SIZE):
+        super(CachedFormatChecker, self).__init__(formats)
+        self.max_items = max_items
+        self._caches = {}
+
+    def check(self, instance, format):
+        if (format not in self.checkers or
+                not isinstance(instance, string_types)):
+            return super(CachedFormatChecker, self).check(instance, format)
+
+        format_cache = self._caches.get(format)
+        if format_cache is None:
+            format_cache = self._caches.setdefault(
+                format, cache.MemoryStore(max_items=self.max_items))
+
+        result = format_cache.get(instance)
+        if result is None:
+            try:
+                super(CachedFormatChecker, self).check(instance, format)
+                result = (None, None)
+            except jsonschema.FormatError as error:
+                result = (error.message, error.cause)
+            format_cache.set(instance, result)
+
+        message, cause = result
+        if message is not None:
+            raise jsonschema.FormatError(message, cause=cause)
+
+    def stats(self):
+        """Devuelve los aciertos y fallos del caché de cada formato, y el
+        total en la clave "all".
+
+        Returns:
+            dict: {formato: {"hits": int, "misses": int, "hit_rate": float,
+                "items": int}}
+        """
+        stats = {format: format_cache.stats()
+                 for format, format_cache in self._caches.items()}
+        hits = sum(format_stats["hits"] for format_stats in stats.values())
+        misses = sum(format_stats["misses"]
+                     for format_stats in stats.values())
+        stats["all"] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": float(hits) / (hits + misses) if hits + misses else 0.0,
+            "items": sum(format_stats["items"]
+                         for format_stats in stats.values())
+        }
+        return stats
+
+    def clear(self):
+        """Olvida todos los valores chequeados."""
+        self._caches.clear()
 
-def create_validator(schema_filename=None, schema_dir=None):
+
+def create_validator(schema_filename=None, schema_dir=None, engine=None):
     """Crea el validador necesario para inicializar un objeto DataJson.
 
     Para poder resolver referencias inter-esquemas, un Validador requiere
@@ -39,14 +180,26 @@ def create_validator(schema_filename=None, schema_dir=None):
     directorio.
 
     Para poder validar formatos, un Validador requiere que se provea
-    explícitamente un FormatChecker. Actualmente se usa el default de la
-    librería, jsonschema.FormatChecker().
+    explícitamente un FormatChecker. Se usa un CachedFormatChecker, que
+    chequea los formatos igual que jsonschema.FormatChecker() pero recuerda
+    los resultados de los valores repetidos (ver
+    `validator.format_checker.stats()`).
+
+    Los validadores se guardan en un caché a nivel proceso, indexado por
+    `schema_dir`, `schema_filename` y la fecha de modificación de los
+    esquemas. Pedir un validador ya creado no vuelve a leer ningún esquema
+    de disco, y modificar un esquema invalida el validador anterior.
 
     Args:
         schema_filename (str): Nombre del archivo que contiene el esquema
             validador "maestro".
         schema_dir (str): Directorio (absoluto) donde se encuentra el
             esquema validador maestro y sus referencias, de tenerlas.
+        engine (str): Motor de validación a usar. "jsonschema" (default)
+            interpreta el esquema con jsonschema.Draft4Validator;
+            "compiled" lo traduce una única vez a funciones de Python
+            (ver `schema_compiler`), generando los mismos errores más
+            rápido.
 
     Returns:
         Draft4Validator: Un validador de JSONSchema Draft #4. El validador
@@ -55,23 +208,74 @@ def create_validator(schema_filename=None, schema_dir=None):
     """
     schema_filename = schema_filename or DEFAULT_CATALOG_SCHEMA_FILENAME
     schema_dir = schema_dir or ABSOLUTE_SCHEMA_DIR
+    engine = engine or DEFAULT_VALIDATION_ENGINE
+    if engine not in VALIDATION_ENGINES:
+        raise ValueError("No se reconoce el motor de validación {}".format(
+            engine))
+    cache_key = (schema_dir, schema_filename, engine,
+                 _schemas_mtimes(schema_dir))
+
+    if cache_key not in _VALIDATORS_CACHE:
+        # descarta validadores creados con versiones anteriores del esquema
+        for key in list(_VALIDATORS_CACHE.keys()):
+            if key[:3] == cache_key[:3]:
+                _VALIDATORS_CACHE.pop(key)
+        _VALIDATORS_CACHE[cache_key] = _build_validator(
+            schema_filename, schema_dir, VALIDATION_ENGINES[engine])
+
+    return _VALIDATORS_CACHE[cache_key]
+
+
+def _build_validator(schema_filename, schema_dir,
+                     validator_class=jsonschema.Draft4Validator):
+    """Construye un validador nuevo, con todos los esquemas de `schema_dir`
+    precargados en el RefResolver."""
     schema_path = os.path.join(schema_dir, schema_filename)
-    schema = readers.read_json(schema_path)
+    store = {
+        _schema_uri(os.path.join(schema_dir, filename)): readers.read_json(
+            os.path.join(schema_dir, filename))
+        for filename in _list_schemas(schema_dir)
+    }
+    base_uri = _schema_uri(schema_path)
+    schema = store.get(base_uri) or readers.read_json(schema_path)
+
+    return _assemble_validator(
+        schema, base_uri, store, validator_class, CachedFormatChecker())
+
 
+def _assemble_validator(schema, base_uri, store, validator_class,
+                        format_checker):
+    """Arma un validador a partir de esquemas ya leídos."""
     # Según https://github.com/Julian/jsonschema/issues/98
     # Permite resolver referencias locales a otros esquemas.
+    resolver = jsonschema.RefResolver(
+        base_uri=base_uri, referrer=schema, store=store)
+
+    return validator_class(
+        schema=schema, resolver=resolver, format_checker=format_checker)
+
+
+def _schema_uri(schema_path):
+    """Devuelve la URI absoluta con la que el RefResolver identifica a un
+    esquema local."""
     if platform.system() == 'Windows':
-        base_uri = "file:///" + schema_path.replace("\\", "/")
+        return "file:///" + schema_path.replace("\\", "/")
     else:
-        base_uri = "file://" + schema_path
-    resolver = jsonschema.RefResolver(base_uri=base_uri, referrer=schema)
+        return "file://" + schema_path
 
-    format_checker = jsonschema.FormatChecker()
 
-    validator = jsonschema.Draft4Validator(
-        schema=schema, resolver=resolver, format_checker=format_checker)
+def _list_schemas(schema_dir):
+    return sorted(filename for filename in os.listdir(schema_dir)
+                  if filename.endswith(".json"))
 
-    return validator
+
+def _schemas_mtimes(schema_dir):
+    """Devuelve las fechas de modificación de los esquemas de un directorio,
+    para detectar validadores desactualizados."""
+    return tuple(
+        (filename, os.path.getmtime(os.path.join(schema_dir, filename)))
+        for filename in _list_schemas(schema_dir)
+    )
 
 
 def is_valid_catalog(catalog, validator=None):
@@ -81,6 +285,12 @@ def is_valid_catalog(catalog, validator=None):
     tanto los campos obligatorios como los opcionales siguen la estructura
     definida en el schema.
 
+    La validación termina en el primer error que encuentra, en una única
+    pasada por el catálogo. En cada esquema se chequean primero los campos
+    obligatorios y los tipos, y por último las expresiones regulares y los
+    formatos (ver FAIL_FAST_KEYWORDS_ORDER). Las validaciones propias de
+    pydatajson se corren sólo si el catálogo cumple con el esquema.
+
     Args:
         catalog (str o dict): Catálogo (dict, JSON o XLSX) a ser validado.
 
@@ -94,14 +304,73 @@ def is_valid_catalog(catalog, validator=None):
         else:
             validator = create_validator()
 
-    jsonschema_res = validator.is_valid(catalog)
-    custom_errors = iter_custom_errors(catalog)
+    if not _fail_fast_validator(validator).is_valid(catalog):
+        return False
+
+    for _ in iter_custom_errors(catalog):
+        return False
+
+    return True
+
 
-    return jsonschema_res and len(list(custom_errors)) == 0
+def _fail_fast_validator(validator):
+    """Arma el validador que usa is_valid_catalog a partir de un validador
+    de catálogos: evalúa las palabras clave de cada esquema en el orden de
+    FAIL_FAST_KEYWORDS_ORDER."""
+    if validator in _FAIL_FAST_VALIDATORS_CACHE:
+        return _FAIL_FAST_VALIDATORS_CACHE[validator]
+
+    resolver = validator.resolver
+    store = {uri: _fail_fast_schema(resolver.store[uri])
+             for uri in resolver.store}
+    referrer = (store.get(resolver.base_uri) or
+                _fail_fast_schema(resolver.referrer))
+    _FAIL_FAST_VALIDATORS_CACHE[validator] = validator.__class__(
+        schema=_fail_fast_schema(validator.schema),
+        resolver=jsonschema.RefResolver(
+            base_uri=resolver.base_uri, referrer=referrer, store=store),
+        format_checker=validator.format_checker)
+    return _FAIL_FAST_VALIDATORS_CACHE[validator]
+
+
+def _fail_fast_schema(schema):
+    """Copia un esquema (y sus subesquemas) ordenando sus palabras clave
+    según FAIL_FAST_KEYWORDS_ORDER."""
+    if not isinstance(schema, dict):
+        return schema
+
+    def subschema(value):
+        if isinstance(value, list):
+            return [_fail_fast_schema(item) for item in value]
+        return _fail_fast_schema(value)
+
+    keywords = []
+    for keyword, value in schema.items():
+        if (keyword in ["properties", "patternProperties", "definitions",
+                        "dependencies"] and isinstance(value, dict)):
+            value = OrderedDict(
+                (name, subschema(item)) for name, item in value.items())
+        elif keyword in ["items", "additionalItems", "additionalProperties",
+                         "allOf", "anyOf", "oneOf", "not"]:
+            value = subschema(value)
+        elif (keyword not in jsonschema.Draft4Validator.VALIDATORS and
+              isinstance(value, dict)):
+            # subesquemas con nombre, referenciados como "archivo.json#nombre"
+            value = subschema(value)
+        keywords.append((keyword, value))
+
+    def keyword_order(item):
+        if item[0] in FAIL_FAST_KEYWORDS_ORDER:
+            return FAIL_FAST_KEYWORDS_ORDER.index(item[0])
+        return len(FAIL_FAST_KEYWORDS_ORDER)
+
+    return OrderedDict(sorted(keywords, key=keyword_order))
 
 
 def validate_catalog(catalog, only_errors=False, fmt="dict",
-                     export_path=None, validator=None):
+                     export_path=None, validator=None, validation_cache=None,
+                     workers=None, max_errors_per_dataset=None,
+                     max_total_errors=None, streaming=False):
     """Analiza un data.json registrando los errores que encuentra.
 
     Chequea que el data.json tiene todos los campos obligatorios y que
@@ -119,6 +388,26 @@ def validate_catalog(catalog, only_errors=False, fmt="dict",
         export_path (str): Path donde exportar el reporte generado (en
             formato XLSX o CSV). Si se especifica, el método no devolverá
             nada, a pesar de que se pase algún argumento en `fmt`.
+        validation_cache (cache.BaseStore): Almacén de resultados de
+            validaciones anteriores (ej.: `cache.MemoryStore()` o
+            `cache.SQLiteStore(path)`). Si se especifica, sólo se validan
+            contra el esquema los datasets nuevos o modificados desde la
+            última validación guardada en él.
+        workers (int): Cantidad de procesos entre los que repartir la
+            validación de los datasets. Los campos a nivel catálogo y las
+            validaciones que cruzan datasets se hacen una única vez sobre el
+            catálogo entero.
+        max_errors_per_dataset (int): Cantidad máxima de errores a reportar
+            para cada dataset (y para el catálogo). Los errores que superan
+            el límite se cuentan en la clave "omitted_errors".
+        max_total_errors (int): Cantidad máxima de errores a reportar en
+            total. Los errores que superan el límite se cuentan en la clave
+            "omitted_errors" del catálogo o dataset en el que ocurren.
+        streaming (bool): Si es True y se especifica `export_path`, el
+            reporte se escribe fila por fila a medida que se valida cada
+            dataset (ver `iter_validate_catalog`), sin armar el reporte
+            completo en memoria. Los reportes XLSX se escriben sin estilos de
+            celda.
 
     Returns:
         dict: Diccionario resumen de los errores encontrados::
@@ -150,48 +439,44 @@ def validate_catalog(catalog, only_errors=False, fmt="dict",
         "message", "validator", "validator_value", "error_code".
 
     """
-    catalog = readers.read_catalog(catalog)
+    if export_path and streaming:
+        results = iter_validate_catalog(catalog, validator)
+        if only_errors:
+            results = (result for result in results
+                       if result[0] == "catalog" or
+                       result[1]["status"] == "ERROR")
+        writers.write_tables_rows(
+            _iter_validation_rows(results), export_path,
+            VALIDATION_TABLES_FIELDS, column_styles=VALIDATION_COLUMN_STYLES)
+        return
 
-    # La respuesta por default se devuelve si no hay errores
-    default_response = {
-        "status": "OK",
-        "error": {
-            "catalog": {
-                "status": "OK",
-                "title": catalog.get("title"),
-                "errors": []
-            },
-            # "dataset" contiene lista de rtas default si el catálogo
-            # contiene la clave "dataset" y además su valor es una lista.
-            # En caso contrario "dataset" es None.
-            "dataset": [
-                {
-                    "status": "OK",
-                    "title": dataset.get("title"),
-                    "identifier": dataset.get("identifier"),
-                    "list_index": index,
-                    "errors": []
-                } for index, dataset in enumerate(catalog["dataset"])
-            ] if ("dataset" in catalog and
-                  isinstance(catalog["dataset"], list)) else None
-        }
-    }
+    catalog = readers.read_catalog(catalog)
 
-    # Genero la lista de errores en la instancia a validar
     if not validator:
         if hasattr(catalog, "validator"):
             validator = catalog.validator
         else:
             validator = create_validator()
-    jsonschema_errors = list(validator.iter_errors(catalog))
-    custom_errors = list(iter_custom_errors(catalog))
-
-    errors = jsonschema_errors + custom_errors
 
-    response = default_response.copy()
-    for error in errors:
-        response = _update_validation_response(
-            error, response)
+    # reutiliza la validación de un catálogo con el mismo contenido. La clave
+    # es el contenido y no la identidad del objeto: un catálogo que se lee en
+    # cada llamada es un objeto nuevo, cuyo id() puede coincidir con el de
+    # otro ya descartado. Si se pasa un `validation_cache`, es éste el que
+    # decide qué se vuelve a validar.
+    response = None
+    if validation_cache is None:
+        memo_key = (cache.fingerprint(catalog),
+                    _validator_fingerprint(validator),
+                    max_errors_per_dataset, max_total_errors)
+        response = _VALIDATIONS_MEMO.get(memo_key)
+    if response is None:
+        response = _generate_validation_response(
+            catalog, validator, validation_cache, workers,
+            max_errors_per_dataset, max_total_errors)
+        if validation_cache is None:
+            _VALIDATIONS_MEMO.set(memo_key, response)
+    # cada llamada recibe su propia copia, que puede modificar libremente
+    response = copy.deepcopy(response)
 
     # filtra los resultados que están ok, para hacerlo más compacto
     if only_errors:
@@ -210,22 +495,6 @@ def validate_catalog(catalog, only_errors=False, fmt="dict",
             shrink_to_fit=True,
             vertical="center"
         )
-        column_styles = {
-            "catalog": {
-                "catalog_status": {"width": 20},
-                "catalog_error_location": {"width": 40},
-                "catalog_error_message": {"width": 40},
-                "catalog_title": {"width": 20},
-            },
-            "dataset": {
-                "dataset_error_location": {"width": 20},
-                "dataset_identifier": {"width": 40},
-                "dataset_status": {"width": 20},
-                "dataset_title": {"width": 40},
-                "dataset_list_index": {"width": 20},
-                "dataset_error_message": {"width": 40},
-            }
-        }
         cell_styles = {
             "catalog": [
                 {"alignment": Alignment(vertical="center")},
@@ -240,7 +509,7 @@ def validate_catalog(catalog, only_errors=False, fmt="dict",
         # crea tablas en un sólo excel o varios CSVs
         writers.write_tables(
             tables=validation_lists, path=export_path,
-            column_styles=column_styles, cell_styles=cell_styles
+            column_styles=VALIDATION_COLUMN_STYLES, cell_styles=cell_styles
         )
 
     elif fmt == "dict":
@@ -261,56 +530,236 @@ def validate_catalog(catalog, only_errors=False, fmt="dict",
         raise Exception("No se reconoce el formato {}".format(fmt))
 
 
-def iter_custom_errors(catalog):
-    """Realiza validaciones sin usar el jsonschema.
+def _generate_validation_response(catalog, validator, validation_cache=None,
+                                  workers=None, max_errors_per_dataset=None,
+                                  max_total_errors=None):
+    """Valida un catálogo y arma la respuesta completa de validate_catalog,
+    antes de filtrarla o darle formato."""
+    # Genero los errores en la instancia a validar
+    if validation_cache is not None or workers:
+        jsonschema_errors = _iter_split_jsonschema_errors(
+            catalog, validator, validation_cache, workers)
+    else:
+        jsonschema_errors = validator.iter_errors(catalog)
+    custom_errors = iter_custom_errors(catalog)
 
-    En esta función se agregan bloques de código en python que realizan
-    validaciones complicadas o imposibles de especificar usando jsonschema.
+    accumulator = ValidationErrorsAccumulator(
+        catalog, max_errors_per_dataset, max_total_errors)
+    for error in itertools.chain(jsonschema_errors, custom_errors):
+        accumulator.add(error)
+
+    return accumulator.response
+
+
+def iter_validate_catalog(catalog, validator=None):
+    """Valida un catálogo generando el resultado de cada dataset a medida
+    que se valida.
+
+    Primero se genera el resultado de cada dataset, en orden, y al final el
+    del catálogo, que incluye los errores de los campos a nivel catálogo y
+    de las validaciones que cruzan datasets. Los resultados tienen la misma
+    estructura y los mismos errores que los de `validate_catalog`.
+
+    Si el catálogo es un path o URL a un archivo JSON, se lee en forma
+    incremental con `readers.iter_datasets`, sin tener en memoria más de un
+    dataset a la vez. En ese caso, si hay datasets repetidos, el error de
+    "uniqueItems" los muestra por su hash en lugar de su contenido.
+
+    Args:
+        catalog (str o dict): Catálogo (dict, JSON o XLSX) a ser validado.
+        validator (Draft4Validator): Validador a usar. Por default, el del
+            catálogo o el que devuelve `create_validator()`.
+
+    Yields:
+        tuple: ("dataset", resultado) por cada dataset y, por último,
+            ("catalog", resultado), donde resultado es un dict con las claves
+            "status", "title" y "errors" (y "identifier" y "list_index" para
+            los datasets).
     """
+    for level, _, result in iter_validated_datasets(catalog, validator):
+        yield level, result
 
-    try:
-        # chequea que no se repiten los ids de la taxonomía específica
-        if "themeTaxonomy" in catalog:
-            theme_ids = [theme["id"] for theme in catalog["themeTaxonomy"]]
-            dups = _find_dups(theme_ids)
-            if len(dups) > 0:
-                yield ce.ThemeIdRepeated(dups)
-        # chequea que la extensión de fileName, downloadURL y format sean consistentes
-        for dataset_idx, dataset in enumerate(catalog["dataset"]):
-            for distribution_idx, distribution in enumerate(dataset["distribution"]):
-                for attribute in ['downloadURL', 'fileName']:
-                    if not format_matches_extension(distribution, attribute):
-                        yield ce.ExtensionError(dataset_idx, distribution_idx, distribution, attribute)
 
-        # chequea que no haya duplicados en los downloadURL de las distribuciones
-        urls = []
-        for dataset in catalog["dataset"]:
-            urls += [distribution['downloadURL'] for distribution in dataset['distribution']
-                     if distribution.get('downloadURL')]
-        dups = _find_dups(urls)
-        if len(dups) > 0:
-            yield ce.DownloadURLRepetitionError(dups)
+def iter_validated_datasets(catalog, validator=None):
+    """Versión de `iter_validate_catalog` que genera además el dataset (o
+    el catálogo, sin sus datasets si se lee en forma incremental) al que
+    corresponde cada resultado.
+
+    Args:
+        catalog (str o dict): Catálogo (dict, JSON o XLSX) a ser validado.
+        validator (Draft4Validator): Validador a usar. Por default, el del
+            catálogo o el que devuelve `create_validator()`.
+
+    Yields:
+        tuple: (nivel, dataset o catálogo, resultado)
+    """
+    streaming = readers.is_json_path_or_url(catalog)
+    if not streaming:
+        catalog = readers.read_catalog(catalog)
 
+    if not validator:
+        if hasattr(catalog, "validator"):
+            validator = catalog.validator
+        else:
+            validator = create_validator()
+
+    split_validators = _split_validator(validator)
+    if split_validators is None or (
+            not streaming and not isinstance(catalog.get("dataset"), list)):
+        catalog = readers.read_catalog(catalog)
+        response = _generate_validation_response(catalog, validator)
+        datasets = catalog["dataset"] if response["error"]["dataset"] else []
+        for dataset, dataset_result in zip(datasets,
+                                           response["error"]["dataset"] or []):
+            yield "dataset", dataset, dataset_result
+        yield "catalog", catalog, response["error"]["catalog"]
+        return
+
+    catalog_validator, dataset_validator = split_validators
+    if streaming:
+        catalog_fields = {}
+        datasets = readers.iter_datasets(catalog, catalog_fields)
+        datasets_fingerprints = []
+    else:
+        catalog_fields = catalog
+        datasets = catalog["dataset"]
+
+    download_urls = []
+    custom_checks_ok = True
+    for dataset_idx, dataset in enumerate(datasets):
+        if streaming:
+            datasets_fingerprints.append(cache.fingerprint(dataset))
+
+        errors = [
+            ce.BaseValidationError(
+                error["validator"], error["message"],
+                error["validator_value"],
+                ["dataset", dataset_idx] + error["path"],
+                instance=error["instance"])
+            for error in _dataset_errors(dataset_validator, dataset)
+        ]
+        if custom_checks_ok:
+            try:
+                errors.extend(_iter_dataset_custom_errors(dataset_idx, dataset))
+                download_urls.extend(_download_urls(dataset))
+            except Exception as e:
+                logger.warning(
+                    "No se pudieron correr las validaciones propias de "
+                    "pydatajson sobre el dataset %s: %s", dataset_idx, e)
+                custom_checks_ok = False
+
+        errors_info = [_error_info(error) for error in errors]
+        yield "dataset", dataset, {
+            "status": "ERROR" if errors_info else "OK",
+            "title": dataset.get("title"),
+            "identifier": dataset.get("identifier"),
+            "list_index": dataset_idx,
+            "errors": errors_info
+        }
+
+    if streaming and isinstance(catalog_fields.get("dataset"), list):
+        # los datasets se reemplazan por su hash para chequear "uniqueItems"
+        catalog = dict(catalog_fields, dataset=datasets_fingerprints)
+    else:
+        catalog = catalog_fields
+
+    errors = list(catalog_validator.iter_errors(catalog))
+    try:
+        errors.extend(_iter_theme_taxonomy_errors(catalog))
+        if custom_checks_ok:
+            errors.extend(_iter_download_urls_errors(download_urls))
     except Exception as e:
-        print(e)
+        logger.warning("No se pudieron correr las validaciones propias de "
+                       "pydatajson sobre el catálogo: %s", e)
+
+    errors_info = [_error_info(error) for error in errors]
+    yield "catalog", catalog_fields, {
+        "status": "ERROR" if errors_info else "OK",
+        "title": catalog.get("title"),
+        "errors": errors_info
+    }
 
 
-def _find_dups(elements):
-    return [item for item, count in Counter(elements).items()
-            if count > 1]
+class ValidationErrorsAccumulator(object):
+    """Arma la respuesta de validate_catalog agregando los errores de
+    validación a medida que se generan, en una única pasada.
 
+    Los errores se agrupan en el catálogo o en el dataset en el que
+    ocurrieron. Si se supera alguno de los límites, los errores siguientes
+    no se guardan, pero se siguen marcando los status correspondientes como
+    "ERROR" y se cuentan en la clave "omitted_errors" del catálogo o dataset.
 
-def _update_validation_response(error, response):
-    """Actualiza la respuesta por default acorde a un error de
-    validación."""
-    new_response = response.copy()
+    Args:
+        catalog (dict): Catálogo validado.
+        max_errors_per_dataset (int): Cantidad máxima de errores a guardar
+            por dataset (y para el catálogo).
+        max_total_errors (int): Cantidad máxima de errores a guardar en
+            total.
+    """
 
-    # El status del catálogo entero será ERROR
-    new_response["status"] = "ERROR"
+    def __init__(self, catalog, max_errors_per_dataset=None,
+                 max_total_errors=None):
+        self.max_errors_per_dataset = max_errors_per_dataset
+        self.max_total_errors = max_total_errors
+        self.total_errors = 0
+
+        # La respuesta por default se devuelve si no hay errores
+        self.response = {
+            "status": "OK",
+            "error": {
+                "catalog": {
+                    "status": "OK",
+                    "title": catalog.get("title"),
+                    "errors": []
+                },
+                # "dataset" contiene lista de rtas default si el catálogo
+                # contiene la clave "dataset" y además su valor es una lista.
+                # En caso contrario "dataset" es None.
+                "dataset": [
+                    {
+                        "status": "OK",
+                        "title": dataset.get("title"),
+                        "identifier": dataset.get("identifier"),
+                        "list_index": index,
+                        "errors": []
+                    } for index, dataset in enumerate(catalog["dataset"])
+                ] if ("dataset" in catalog and
+                      isinstance(catalog["dataset"], list)) else None
+            }
+        }
+        self._catalog_position = self.response["error"]["catalog"]
+        self._dataset_positions = self.response["error"]["dataset"]
+
+    def add(self, error):
+        """Registra un error de validación en la respuesta."""
+        # El status del catálogo entero será ERROR
+        self.response["status"] = "ERROR"
+
+        # Identifico a qué nivel de jerarquía sucedió el error.
+        path = error.path
+        if len(path) >= 2 and path[0] == "dataset":
+            # El error está a nivel de un dataset particular o inferior
+            position = self._dataset_positions[path[1]]
+        else:
+            # El error está a nivel de catálogo
+            position = self._catalog_position
+        position["status"] = "ERROR"
 
-    # Adapto la información del ValidationError recibido a los fines
-    # del validador de DataJsons
-    error_info = {
+        if ((self.max_total_errors is not None and
+             self.total_errors >= self.max_total_errors) or
+                (self.max_errors_per_dataset is not None and
+                 len(position["errors"]) >= self.max_errors_per_dataset)):
+            position["omitted_errors"] = position.get("omitted_errors", 0) + 1
+            return
+
+        self.total_errors += 1
+        position["errors"].append(_error_info(error))
+
+
+def _error_info(error):
+    """Adapta la información de un error de validación a los fines del
+    validador de DataJsons."""
+    return {
         # Error Code 1 para "campo obligatorio faltante"
         # Error Code 2 para "error en tipo o formato de campo"
         "error_code": 1 if error.validator == "required" else 2,
@@ -319,21 +768,307 @@ def _update_validation_response(error, response):
         "validator_value": error.validator_value,
         "path": list(error.path),
         # La instancia validada es irrelevante si el error es de tipo 1
-        "instance": (None if error.validator == "required" else error.instance)
+        "instance": (None if error.validator == "required" else
+                     error.instance)
     }
 
-    # Identifico a qué nivel de jerarquía sucedió el error.
-    if len(error.path) >= 2 and error.path[0] == "dataset":
-        # El error está a nivel de un dataset particular o inferior
-        position = new_response["error"]["dataset"][error.path[1]]
+
+def invalidate_validation_memo(catalog=None):
+    """Descarta las validaciones memorizadas de un catálogo, o de todos los
+    catálogos si no se especifica ninguno.
+
+    Las validaciones se memorizan por el contenido del catálogo, así que uno
+    modificado nunca reutiliza la validación de su contenido anterior: esta
+    función sólo libera la memoria que ocupan.
+
+    Args:
+        catalog (dict): Catálogo (ya leído) cuya validación se descarta.
+    """
+    if catalog is None:
+        _VALIDATIONS_MEMO.invalidate()
     else:
-        # El error está a nivel de catálogo
-        position = new_response["error"]["catalog"]
+        catalog_fingerprint = cache.fingerprint(catalog)
+        for key in _VALIDATIONS_MEMO.keys():
+            if key[0] == catalog_fingerprint:
+                _VALIDATIONS_MEMO.invalidate(key)
+
+
+def _split_validator(validator):
+    """Separa un validador de catálogos en un validador de los campos a
+    nivel catálogo y otro que valida un dataset individual.
 
-    position["status"] = "ERROR"
-    position["errors"].append(error_info)
+    Returns:
+        tuple: (catalog_validator, dataset_validator), o None si el esquema
+            del validador no describe a los datasets en
+            `properties.dataset.items`.
+    """
+    if validator in _SPLIT_VALIDATORS_CACHE:
+        return _SPLIT_VALIDATORS_CACHE[validator]
 
-    return new_response
+    dataset_property = validator.schema.get(
+        "properties", {}).get("dataset", {})
+    if "items" not in dataset_property:
+        split_validators = None
+    else:
+        # el esquema del catálogo conserva todo, salvo la validación de cada
+        # dataset de la lista (incluye chequeos sobre toda la lista, como
+        # "uniqueItems")
+        catalog_schema = dict(validator.schema)
+        catalog_schema["properties"] = dict(catalog_schema["properties"])
+        catalog_schema["properties"]["dataset"] = {
+            key: value for key, value in dataset_property.items()
+            if key != "items"
+        }
+        split_validators = tuple(
+            validator.__class__(
+                schema=schema, resolver=validator.resolver,
+                format_checker=validator.format_checker)
+            for schema in [catalog_schema, dataset_property["items"]]
+        )
+
+    _SPLIT_VALIDATORS_CACHE[validator] = split_validators
+    return split_validators
+
+
+def _validator_fingerprint(validator):
+    """Hash de los esquemas, la clase y los formatos que chequea un
+    validador, para no reutilizar resultados obtenidos con otra versión del
+    esquema o con otro validador."""
+    if validator not in _FINGERPRINTS_CACHE:
+        store = validator.resolver.store
+        _FINGERPRINTS_CACHE[validator] = cache.fingerprint([
+            validator.schema, [[uri, store[uri]] for uri in sorted(store)],
+            _qualified_name(validator.__class__),
+            _format_checker_fingerprint(validator.format_checker)
+        ])
+    return _FINGERPRINTS_CACHE[validator]
+
+
+def _format_checker_fingerprint(format_checker):
+    """Describe los formatos que chequea un FormatChecker y las funciones con
+    las que lo hace."""
+    if format_checker is None:
+        return None
+    return [_qualified_name(format_checker.__class__), [
+        [format, _qualified_name(checker[0])]
+        for format, checker in sorted(format_checker.checkers.items())
+    ]]
+
+
+def _qualified_name(obj):
+    # las clases de jsonschema comparten el __qualname__
+    # "create.<locals>.Validator", pero no el __name__
+    return "{}.{}".format(obj.__module__, obj.__name__)
+
+
+def _iter_split_jsonschema_errors(catalog, validator, validation_cache=None,
+                                  workers=None):
+    """Genera los errores de jsonschema de un catálogo validando por separado
+    los campos a nivel catálogo y cada uno de sus datasets.
+
+    Los campos a nivel catálogo siempre se validan. Si se pasa un
+    `validation_cache`, se reutilizan los errores guardados para los datasets
+    que no cambiaron (cada dataset se identifica por un hash de su contenido
+    en forma canónica y del esquema). Si se pasa `workers`, los datasets a
+    validar se reparten en bloques entre esa cantidad de procesos.
+
+    Los errores generados respetan el orden y los caminos (`path`) de los
+    que genera `validator.iter_errors(catalog)`.
+    """
+    split_validators = _split_validator(validator)
+    if (split_validators is None or
+            not isinstance(catalog.get("dataset"), list)):
+        for error in validator.iter_errors(catalog):
+            yield error
+        return
+
+    catalog_validator, dataset_validator = split_validators
+    for error in catalog_validator.iter_errors(catalog):
+        yield error
+
+    datasets = catalog["dataset"]
+    datasets_errors = [None] * len(datasets)
+
+    if validation_cache is not None:
+        schema_fingerprint = _validator_fingerprint(validator)
+        keys = [cache.fingerprint([schema_fingerprint, dataset])
+                for dataset in datasets]
+        datasets_errors = [validation_cache.get(key) for key in keys]
+
+    pending = [idx for idx, errors in enumerate(datasets_errors)
+               if errors is None]
+    if workers and workers > 1 and len(pending) > 1:
+        new_errors = _validate_datasets_in_pool(
+            validator, [datasets[idx] for idx in pending], workers)
+    else:
+        new_errors = [_dataset_errors(dataset_validator, datasets[idx])
+                      for idx in pending]
+
+    for idx, dataset_errors in zip(pending, new_errors):
+        datasets_errors[idx] = dataset_errors
+        if validation_cache is not None:
+            validation_cache.set(keys[idx], dataset_errors)
+
+    for dataset_idx, dataset_errors in enumerate(datasets_errors):
+        for error in dataset_errors:
+            yield ce.BaseValidationError(
+                error["validator"], error["message"],
+                error["validator_value"],
+                ["dataset", dataset_idx] + error["path"],
+                instance=error["instance"])
+
+
+def _dataset_errors(dataset_validator, dataset):
+    """Valida un dataset y devuelve sus errores como diccionarios
+    serializables, con caminos relativos al dataset."""
+    return [
+        {
+            "validator": error.validator,
+            "message": error.message,
+            "validator_value": error.validator_value,
+            "path": list(error.path),
+            "instance": copy.deepcopy(error.instance)
+        } for error in dataset_validator.iter_errors(dataset)
+    ]
+
+
+def _validate_datasets_in_pool(validator, datasets, workers):
+    """Valida una lista de datasets repartiéndola en bloques entre un pool de
+    `workers` procesos. Devuelve los errores de cada dataset, en orden.
+
+    Los procesos reconstruyen el validador a partir de datos serializables
+    (los esquemas, el motor y los formatos a chequear), ya que las clases de
+    jsonschema no se pueden serializar y los procesos pueden no heredar la
+    memoria del proceso principal (ej.: en Windows y macOS). Si el
+    validador no se puede reconstruir, los datasets se validan en este
+    proceso.
+    """
+    worker_args = _validator_worker_args(validator)
+    if worker_args is None:
+        dataset_validator = _split_validator(validator)[1]
+        return [_dataset_errors(dataset_validator, dataset)
+                for dataset in datasets]
+
+    chunk_size = int(math.ceil(
+        float(len(datasets)) / (workers * DATASETS_CHUNKS_PER_WORKER)))
+    chunks = [datasets[i:i + chunk_size]
+              for i in range(0, len(datasets), chunk_size)]
+
+    pool = multiprocessing.Pool(
+        workers, initializer=_init_validation_worker, initargs=worker_args)
+    try:
+        chunks_errors = pool.map(_validate_datasets_chunk, chunks)
+    finally:
+        pool.close()
+        pool.join()
+
+    return [errors for chunk_errors in chunks_errors
+            for errors in chunk_errors]
+
+
+def _validator_worker_args(validator):
+    """Devuelve los argumentos serializables con los que un proceso del pool
+    reconstruye `validator`, o None si no es posible: el motor no es uno de
+    VALIDATION_ENGINES o algún formato se chequea con una función propia."""
+    engines = [name for name, validator_class in VALIDATION_ENGINES.items()
+               if validator.__class__ is validator_class]
+    if not engines:
+        return None
+
+    format_checker = validator.format_checker
+    if format_checker is None:
+        formats = None
+    else:
+        formats = list(format_checker.checkers)
+        default_checkers = jsonschema.FormatChecker.checkers
+        if any(format_checker.checkers[format] is not
+               default_checkers.get(format) for format in formats):
+            return None
+
+    store = validator.resolver.store
+    return (
+        engines[0], validator.schema, validator.resolver.base_uri,
+        {uri: store[uri] for uri in store},
+        formats, isinstance(format_checker, CachedFormatChecker)
+    )
+
+
+def _init_validation_worker(engine, schema, base_uri, store, formats,
+                            cached_formats):
+    global _WORKER_DATASET_VALIDATOR
+    if formats is None:
+        format_checker = None
+    elif cached_formats:
+        format_checker = CachedFormatChecker(formats)
+    else:
+        format_checker = jsonschema.FormatChecker(formats)
+    validator = _assemble_validator(
+        schema, base_uri, store, VALIDATION_ENGINES[engine], format_checker)
+    _WORKER_DATASET_VALIDATOR = _split_validator(validator)[1]
+
+
+def _validate_datasets_chunk(datasets):
+    return [_dataset_errors(_WORKER_DATASET_VALIDATOR, dataset)
+            for dataset in datasets]
+
+
+def iter_custom_errors(catalog):
+    """Realiza validaciones sin usar el jsonschema.
+
+    En esta función se agregan bloques de código en python que realizan
+    validaciones complicadas o imposibles de especificar usando jsonschema.
+    """
+
+    try:
+        for error in _iter_theme_taxonomy_errors(catalog):
+            yield error
+
+        for dataset_idx, dataset in enumerate(catalog["dataset"]):
+            for error in _iter_dataset_custom_errors(dataset_idx, dataset):
+                yield error
+
+        urls = []
+        for dataset in catalog["dataset"]:
+            urls += _download_urls(dataset)
+        for error in _iter_download_urls_errors(urls):
+            yield error
+
+    except Exception as e:
+        print(e)
+
+
+def _iter_theme_taxonomy_errors(catalog):
+    # chequea que no se repiten los ids de la taxonomía específica
+    if "themeTaxonomy" in catalog:
+        theme_ids = [theme["id"] for theme in catalog["themeTaxonomy"]]
+        dups = _find_dups(theme_ids)
+        if len(dups) > 0:
+            yield ce.ThemeIdRepeated(dups)
+
+
+def _iter_dataset_custom_errors(dataset_idx, dataset):
+    # chequea que la extensión de fileName, downloadURL y format sean consistentes
+    for distribution_idx, distribution in enumerate(dataset["distribution"]):
+        for attribute in ['downloadURL', 'fileName']:
+            if not format_matches_extension(distribution, attribute):
+                yield ce.ExtensionError(dataset_idx, distribution_idx, distribution, attribute)
+
+
+def _download_urls(dataset):
+    return [distribution['downloadURL'] for distribution in dataset['distribution']
+            if distribution.get('downloadURL')]
+
+
+def _iter_download_urls_errors(urls):
+    # chequea que no haya duplicados en los downloadURL de las distribuciones
+    dups = _find_dups(urls)
+    if len(dups) > 0:
+        yield ce.DownloadURLRepetitionError(dups)
+
+
+def _find_dups(elements):
+    return [item for item, count in Counter(elements).items()
+            if count > 1]
 
 
 def _catalog_validation_to_list(response):
@@ -341,47 +1076,72 @@ def _catalog_validation_to_list(response):
 
     Una lista de errores para "catalog" y otra para "dataset".
     """
+    rows_catalog = _catalog_validation_rows(response["error"]["catalog"])
+    rows_dataset = []
+    for dataset in response["error"]["dataset"]:
+        rows_dataset.extend(_dataset_validation_rows(dataset))
+
+    return {"catalog": rows_catalog, "dataset": rows_dataset}
+
+
+def _iter_validation_rows(results):
+    """Genera las filas de las tablas de un reporte de validación a partir
+    de los resultados de `iter_validate_catalog`.
+
+    Yields:
+        tuple: (nombre_tabla, fila)
+    """
+    for level, result in results:
+        if level == "dataset":
+            rows = _dataset_validation_rows(result)
+        else:
+            rows = _catalog_validation_rows(result)
+        for row in rows:
+            yield level, row
 
+
+def _catalog_validation_rows(catalog_result):
     # crea una lista de dicts para volcarse en una tabla  (catalog)
-    rows_catalog = []
     validation_result = {
-        "catalog_title": response["error"]["catalog"]["title"],
-        "catalog_status": response["error"]["catalog"]["status"]
+        "catalog_title": catalog_result["title"],
+        "catalog_status": catalog_result["status"]
     }
-    for error in response["error"]["catalog"]["errors"]:
-        validation_result[
-            "catalog_error_message"] = error["message"]
-        validation_result[
-            "catalog_error_location"] = ", ".join(error["path"])
-        rows_catalog.append(validation_result)
-
-    if len(response["error"]["catalog"]["errors"]) == 0:
+    rows = []
+    for error in catalog_result["errors"]:
+        row = dict(validation_result)
+        row["catalog_error_message"] = error["message"]
+        row["catalog_error_location"] = ", ".join(error["path"])
+        rows.append(row)
+
+    if len(catalog_result["errors"]) == 0:
         validation_result["catalog_error_message"] = None
         validation_result["catalog_error_location"] = None
-        rows_catalog.append(validation_result)
+        rows.append(validation_result)
 
-    # crea una lista de dicts para volcarse en una tabla (dataset)
-    rows_dataset = []
-    for dataset in response["error"]["dataset"]:
-        validation_result = {
-            "dataset_title": dataset["title"],
-            "dataset_identifier": dataset["identifier"],
-            "dataset_list_index": dataset["list_index"],
-            "dataset_status": dataset["status"]
-        }
-        for error in dataset["errors"]:
-            validation_result[
-                "dataset_error_message"] = error["message"]
-            validation_result[
-                "dataset_error_location"] = error["path"][-1]
-            rows_dataset.append(validation_result)
-
-        if len(dataset["errors"]) == 0:
-            validation_result["dataset_error_message"] = None
-            validation_result["dataset_error_location"] = None
-            rows_dataset.append(validation_result)
+    return rows
 
-    return {"catalog": rows_catalog, "dataset": rows_dataset}
+
+def _dataset_validation_rows(dataset_result):
+    # crea una lista de dicts para volcarse en una tabla (dataset)
+    validation_result = {
+        "dataset_title": dataset_result["title"],
+        "dataset_identifier": dataset_result["identifier"],
+        "dataset_list_index": dataset_result["list_index"],
+        "dataset_status": dataset_result["status"]
+    }
+    rows = []
+    for error in dataset_result["errors"]:
+        row = dict(validation_result)
+        row["dataset_error_message"] = error["message"]
+        row["dataset_error_location"] = error["path"][-1]
+        rows.append(row)
+
+    if len(dataset_result["errors"]) == 0:
+        validation_result["dataset_error_message"] = None
+        validation_result["dataset_error_location"] = None
+        rows.append(validation_result)
+
+    return rows
 
 
 def format_matches_extension(distribution, attribute):
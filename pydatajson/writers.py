@@ -11,17 +11,19 @@ Contiene los métodos para escribir
 from __future__ import print_function, unicode_literals, with_statement
 
 import io
-import json
 import logging
 import os
 
 import openpyxl as pyxl
 import unicodecsv as csv
 from openpyxl.styles import Font
-from openpyxl.utils import column_index_from_string
-from six import string_types, text_type, moves, iteritems
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.writer.write_only import WriteOnlyCell
+from six import string_types, moves, iteritems
 
+from . import compression
 from . import helpers
+from . import json_backend
 
 
 def write_tables(tables, path, column_styles=None, cell_styles=None,
@@ -64,6 +66,92 @@ def write_tables(tables, path, column_styles=None, cell_styles=None,
 {} no es un sufijo reconocido. Pruebe con .csv o.xlsx""".format(suffix))
 
 
+def write_tables_rows(rows, path, tables_fields, column_styles=None):
+    """ Exporta un reporte con varias tablas en CSV o XLSX, escribiendo las
+    filas a medida que se generan.
+
+    A diferencia de `write_tables`, nunca se tiene en memoria la tabla
+    completa. Las tablas se escriben con los mismos nombres de archivo u
+    hojas que en `write_tables`, pero sin estilos de celda.
+
+    Args:
+        rows (iterable): Filas a exportar, como tuplas (nombre_tabla, fila)
+            donde fila es un dict {"field_name": "field_value"}.
+        path (str): Path al archivo CSV o XLSX de exportación.
+        tables_fields (dict): Campos (columnas) de cada tabla, en el orden
+            en que se escriben las tablas:
+            {"table_name": ["field_name1", "field_name2"]}.
+        column_styles (dict): Estilos de las columnas de cada tabla:
+            {"table_name": {"field_name": {"width": 20}}}.
+    """
+    assert isinstance(path, string_types), "`path` debe ser un string"
+
+    # Deduzco el formato de archivo de `path` y redirijo según corresponda.
+    suffix = path.split(".")[-1]
+    if suffix == "csv":
+        _write_csv_tables_rows(rows, path, tables_fields)
+    elif suffix == "xlsx":
+        _write_xlsx_tables_rows(rows, path, tables_fields, column_styles)
+    else:
+        raise ValueError("""
+{} no es un sufijo reconocido. Pruebe con .csv o.xlsx""".format(suffix))
+
+
+def _write_csv_tables_rows(rows, path, tables_fields):
+    root_path = "".join(path.split(".")[:-1])
+    files = {}
+    writers = {}
+    try:
+        for table_name, fields in iteritems(tables_fields):
+            table_path = "{}_{}.csv".format(root_path, table_name)
+            files[table_name] = open(table_path, 'wb')
+            writers[table_name] = csv.DictWriter(
+                csvfile=files[table_name], fieldnames=fields,
+                lineterminator="\n", encoding='utf-8', extrasaction="ignore")
+            writers[table_name].writeheader()
+
+        for table_name, row in rows:
+            writers[table_name].writerow(row)
+    finally:
+        for target_file in files.values():
+            target_file.close()
+
+
+def _write_xlsx_tables_rows(rows, path, tables_fields, column_styles=None):
+    column_styles = column_styles or {}
+    wb = pyxl.Workbook(write_only=True)
+
+    worksheets = {}
+    for table_name, fields in iteritems(tables_fields):
+        ws = wb.create_sheet(title=table_name)
+        # aplica estilos de columnas (deben definirse antes de escribir)
+        for field, properties in iteritems(column_styles.get(table_name, {})):
+            if field in fields:
+                col = get_column_letter(fields.index(field) + 1)
+                for prop_name, prop_value in iteritems(properties):
+                    setattr(ws.column_dimensions[col], prop_name, prop_value)
+
+        headers = []
+        for field in fields:
+            cell = WriteOnlyCell(ws, value=field)
+            cell.font = Font(bold=True)
+            headers.append(cell)
+        ws.append(headers)
+        worksheets[table_name] = ws
+
+    for table_name, row in rows:
+        row_values = []
+        for field in tables_fields[table_name]:
+            value = row.get(field)
+            if isinstance(value, list):
+                row_values.append(",".join(value))
+            else:
+                row_values.append(value)
+        worksheets[table_name].append(row_values)
+
+    wb.save(path)
+
+
 def write_table(table, path, column_styles=None, cell_styles=None):
     """ Exporta una tabla en el formato deseado (CSV o XLSX).
 
@@ -241,14 +329,33 @@ def _list_table_to_ws(wb, table, table_name=None, column_styles=None,
 
 
 def write_json(obj, path):
-    """Escribo un objeto a un archivo JSON con codificación UTF-8."""
-    obj_str = text_type(json.dumps(obj, indent=4, separators=(",", ": "),
-                                   ensure_ascii=False))
+    """Escribo un objeto a un archivo JSON con codificación UTF-8. Si `path`
+    termina en ".gz", ".bz2", ".xz" o ".zst", el archivo se comprime.
 
+    El texto se genera y se escribe de a bloques con el backend de JSON en
+    uso (ver `json_backend`), sin armarlo completo en memoria. Se escribe en
+    un archivo temporal propio de esta escritura, que reemplaza a `path` al
+    terminar, para no dejar un JSON incompleto si falla la codificación.
+    """
     helpers.ensure_dir_exists(os.path.dirname(path))
-
-    with io.open(path, "w", encoding='utf-8') as target:
-        target.write(obj_str)
+    # el temporal conserva el sufijo, que indica la compresión
+    temp_path = helpers.make_temp_file(
+        path, suffix=".tmp" + os.path.splitext(path)[1])
+
+    chunks = json_backend.iter_dumps(obj, indent=4)
+    try:
+        if compression.get_compression(path):
+            with compression.open_compressed(temp_path, "wb") as target:
+                for chunk in chunks:
+                    target.write(chunk.encode("utf-8"))
+        else:
+            with io.open(temp_path, "w", encoding='utf-8') as target:
+                for chunk in chunks:
+                    target.write(chunk)
+        helpers.replace_file(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
 
 
 def write_json_catalog(catalog, path):
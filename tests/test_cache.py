@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests del modulo 'cache'."""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import with_statement
+
+import os.path
+import time
+import unittest
+
+import nose
+
+from .context import pydatajson
+from pydatajson.cache import BoundedMemoryStore, MemoryStore, SQLiteStore, \
+    fingerprint
+from pydatajson.helpers import ensure_dir_exists
+
+
+class CacheTestCase(unittest.TestCase):
+    TEMP_DIR = os.path.join("tests", "temp")
+
+    def test_fingerprint_ignores_key_order(self):
+        self.assertEqual(fingerprint({"a": 1, "b": [1, 2]}),
+                         fingerprint({"b": [1, 2], "a": 1}))
+        self.assertNotEqual(fingerprint({"a": 1}), fingerprint({"a": 2}))
+
+    def test_memory_store_evicts_least_recently_used(self):
+        store = MemoryStore(max_items=2)
+        store.set("a", 1)
+        store.set("b", 2)
+        store.get("a")
+        store.set("c", 3)
+
+        self.assertEqual(store.get("a"), 1)
+        self.assertIsNone(store.get("b"))
+        self.assertEqual(store.stats()["hits"], 2)
+        self.assertEqual(store.stats()["misses"], 1)
+
+    def test_bounded_memory_store_evicts_by_size(self):
+        store = BoundedMemoryStore(max_items=10, max_bytes=10)
+        store.set("a", 1, size=4)
+        store.set("b", 2, size=4)
+        store.get("a")
+        store.set("c", 3, size=4)
+        store.set("d", 4, size=11)
+
+        self.assertEqual(store.get("a"), 1)
+        self.assertIsNone(store.get("b"))
+        self.assertIsNone(store.get("d"))
+        self.assertEqual(store.stats()["bytes"], 8)
+
+    def test_bounded_memory_store_expires(self):
+        store = BoundedMemoryStore(ttl=0.01)
+        store.set("a", 1)
+        self.assertEqual(store.get("a"), 1)
+        time.sleep(0.02)
+        self.assertIsNone(store.get("a"))
+        self.assertEqual(len(store), 0)
+
+    def test_sqlite_store_evicts_least_recently_used(self):
+        ensure_dir_exists(self.TEMP_DIR)
+        path = os.path.join(self.TEMP_DIR, "store.sqlite")
+        if os.path.exists(path):
+            os.remove(path)
+
+        store = SQLiteStore(path, max_items=2)
+        store.set("a", [1])
+        store.set("b", [2])
+        store.get("a")
+        store.set("c", [3])
+
+        self.assertEqual(store.get("a"), [1])
+        self.assertIsNone(store.get("b"))
+        self.assertEqual(len(store), 2)
+
+        store.invalidate()
+        self.assertEqual(len(store), 0)
+        store.close()
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    nose.run(defaultTest=__name__)
@@ -4,11 +4,14 @@
 
 from __future__ import print_function, unicode_literals, with_statement
 
+import copy
 import os.path
+import warnings
 from collections import OrderedDict
 from pprint import pprint
 
 import nose
+import jsonschema
 import vcr
 from nose.tools import assert_true, assert_false, assert_equal, assert_list_equal, assert_raises
 from six import iteritems
@@ -282,6 +285,36 @@ class TestDataJsonTestCase(object):
 
         assert_equal(actual, expected)
 
+    def test_generate_datasets_report_unreadable_catalog(self):
+        """Un catálogo que no se puede leer genera una única fila con el
+        error, sin interrumpir el reporte del resto."""
+        catalog = os.path.join(self.SAMPLES_DIR, "full_data.json")
+        missing = os.path.join(self.SAMPLES_DIR, "no_existe.json")
+
+        report = self.dj.generate_datasets_report(
+            [missing, catalog], catalog_ids=["roto", "full"])
+
+        assert_equal(report[1:], self.dj.catalog_report(
+            catalog, harvest="valid", catalog_id="full"))
+        assert_equal(report[0]["catalog_metadata_url"], missing)
+        assert_equal(report[0]["catalog_federation_id"], "roto")
+        assert_equal(report[0]["harvest"], 0)
+        assert_true(report[0]["notas"].startswith("No se pudo procesar"))
+        assert_equal(list(report[0].keys()), list(report[1].keys()))
+
+    def test_generate_catalogs_indicators_unreadable_catalog(self):
+        catalog = os.path.join(self.SAMPLES_DIR, "several_datasets.json")
+        missing = os.path.join(self.SAMPLES_DIR, "no_existe.json")
+
+        indicators, network_indicators = \
+            self.dj.generate_catalogs_indicators([missing, catalog], catalog)
+        expected, _ = self.dj.generate_catalogs_indicators(catalog, catalog)
+
+        assert_equal(indicators[1:], expected)
+        assert_true("catalogo_error" in indicators[0])
+        assert_equal(network_indicators["catalogos_cant"], 2)
+        assert_equal(network_indicators["catalogos_error_cant"], 1)
+
     def test_generate_datasets_report_single_catalog(self):
         """Invocar generate_datasets_report con una str que sea la ruta a un
         catálogo, o con una lista que sólo contenga esa misma string dan el
@@ -426,6 +459,24 @@ class TestDataJsonTestCase(object):
 
         assert_list_equal(actual_config, expected_config)
 
+    def test_generate_harvester_config_from_report_file(self):
+        """generate_harvester_config() lee de a una fila un reporte guardado
+        en CSV o XLSX."""
+        catalog = os.path.join(self.SAMPLES_DIR, "full_data.json")
+        report = self.dj.generate_datasets_report(
+            catalog, harvest='all', catalog_ids="id", catalog_orgs="org")
+        expected_config = self.dj.generate_harvester_config(
+            harvest='report', report=report)
+
+        for extension in ["csv", "xlsx"]:
+            report_path = os.path.join(self.TEMP_DIR,
+                                       "report." + extension)
+            pydatajson.writers.write_table(report, report_path)
+            assert_equal(
+                [dict(row) for row in self.dj.generate_harvester_config(
+                    harvest='report', report=report_path)],
+                [dict(row) for row in expected_config])
+
     # TESTS DE GENERATE_HARVESTABLE_CATALOGS
 
     CATALOG = {
@@ -493,12 +544,16 @@ class TestDataJsonTestCase(object):
         }
     ]
 
-    @mock.patch('pydatajson.DataJson.generate_datasets_report',
-                return_value=REPORT)
+    VALIDATION = {"error": {"dataset": [{"status": "OK"},
+                                        {"status": "ERROR"}]}}
+
+    @mock.patch('pydatajson.DataJson.validate_catalog',
+                return_value=VALIDATION)
     @mock.patch('pydatajson.readers.read_catalog',
-                return_value=CATALOG.copy())
+                side_effect=lambda *args: copy.deepcopy(
+                    TestDataJsonTestCase.CATALOG))
     def test_generate_harvestable_catalogs_valid(self, mock_read_catalog,
-                                                 mock_gen_dsets_report):
+                                                 mock_validate_catalog):
 
         catalogs = ["URL Catalogo A", "URL Catalogo B"]
 
@@ -518,6 +573,26 @@ class TestDataJsonTestCase(object):
             catalogs, harvest='valid')
 
         assert_list_equal(actual, expected)
+        # cada catálogo se lee una única vez
+        assert_equal(mock_read_catalog.call_count, len(catalogs))
+
+    @mock.patch('pydatajson.readers.read_catalog')
+    def test_generate_harvestable_catalogs_unreadable(self,
+                                                      mock_read_catalog):
+        def read_catalog(catalog, *args):
+            if catalog == "URL Catalogo B":
+                raise IOError("sin conexión")
+            return copy.deepcopy(self.CATALOG)
+        mock_read_catalog.side_effect = read_catalog
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            actual = self.dj.generate_harvestable_catalogs(
+                ["URL Catalogo A", "URL Catalogo B"], harvest='all')
+
+        assert_list_equal(actual, [self.CATALOG])
+        assert_equal(len(caught), 1)
+        assert_true("sin conexión" in str(caught[0].message))
 
     @mock.patch('pydatajson.DataJson.generate_datasets_report',
                 return_value=REPORT)
@@ -578,6 +653,27 @@ class TestDataJsonTestCase(object):
 
         assert_list_equal(actual, expected)
 
+    def test_iter_datasets_summary(self):
+        """El informe generado de a un dataset es igual al completo."""
+        catalog = os.path.join(self.SAMPLES_DIR,
+                               "several_datasets_for_harvest.json")
+        assert_list_equal(
+            list(pydatajson.reporting.iter_datasets_summary(catalog)),
+            self.dj.generate_datasets_summary(catalog))
+
+    def test_generate_catalogs_indicators_streaming(self):
+        """Los indicadores calculados leyendo los catálogos de a un dataset
+        son iguales a los calculados con los catálogos completos."""
+        catalogs = [os.path.join(self.SAMPLES_DIR, sample) for sample in
+                    ["several_datasets.json", "full_data.json",
+                     "several_assorted_errors.json"]]
+        central = os.path.join(self.SAMPLES_DIR, "full_data.json")
+
+        assert_equal(
+            self.dj.generate_catalogs_indicators(catalogs, central),
+            self.dj.generate_catalogs_indicators(catalogs, central,
+                                                 streaming=True))
+
     @my_vcr.use_cassette()
     def test_generate_catalog_readme(self):
         """Genera README para presentar un catálogo."""
@@ -993,6 +1089,129 @@ revíselo manualmente""".format(actual_filename)
             dj = pydatajson.DataJson()
             fields = dj.fields
 
+    def test_validation_is_memoized_across_reports(self):
+        """Un mismo catálogo se valida una única vez entre los distintos
+        reportes que lo necesitan."""
+        pydatajson.validation.invalidate_validation_memo()
+        catalog = pydatajson.readers.read_catalog(
+            os.path.join(self.SAMPLES_DIR, "several_datasets_for_harvest.json"))
+        generate_response = pydatajson.validation._generate_validation_response
+
+        with mock.patch("pydatajson.validation._generate_validation_response",
+                        wraps=generate_response) as validate:
+            self.dj.catalog_report(catalog)
+            self.dj.generate_datasets_summary(catalog)
+            validation = self.dj.validate_catalog(catalog)
+
+        assert_equal(validate.call_count, 1)
+        # cada llamada recibe una copia propia del resultado
+        validation["error"]["dataset"].pop()
+        assert_equal(len(self.dj.validate_catalog(catalog)["error"]["dataset"]),
+                     len(catalog["dataset"]))
+
+    def test_validation_of_paths_is_memoized(self):
+        """Un catálogo leído en cada llamada reutiliza la validación de su
+        contenido."""
+        pydatajson.validation.invalidate_validation_memo()
+        catalog = os.path.join(self.SAMPLES_DIR, "several_datasets.json")
+        generate_response = pydatajson.validation._generate_validation_response
+
+        with mock.patch("pydatajson.validation._generate_validation_response",
+                        wraps=generate_response) as validate:
+            first = self.dj.validate_catalog(catalog)
+            second = self.dj.validate_catalog(catalog)
+            self.dj.validate_catalog(catalog, max_errors_per_dataset=1)
+
+        assert_equal(validate.call_count, 2)
+        assert_equal(first, second)
+
+    def test_validation_memo_distinguishes_format_checkers(self):
+        """Un validador que no chequea formatos no reutiliza la validación
+        de otro que sí lo hace."""
+        pydatajson.validation.invalidate_validation_memo()
+        catalog = os.path.join(self.SAMPLES_DIR, "malformed_email.json")
+        validator = pydatajson.validation.create_validator()
+        without_formats = jsonschema.Draft4Validator(
+            validator.schema, resolver=validator.resolver,
+            format_checker=None)
+
+        assert_equal(pydatajson.validation.validate_catalog(
+            catalog, validator=validator)["status"], "ERROR")
+        assert_equal(pydatajson.validation.validate_catalog(
+            catalog, validator=without_formats)["status"], "OK")
+
+    def test_remove_dataset_invalidates_validation_memo(self):
+        dj = pydatajson.DataJson(
+            os.path.join(self.SAMPLES_DIR, "several_datasets_for_harvest.json"))
+        assert_equal(dj.validate_catalog()["error"]["dataset"][0]["status"],
+                     "ERROR")
+
+        dj["dataset"][0]["identifier"] = "id_1"
+        dj.remove_dataset("id_1")
+
+        assert_equal(dj.validate_catalog()["error"]["dataset"][0]["status"],
+                     "OK")
+
+    def test_snapshot_loop(self):
+        snapshot_path = os.path.join(self.TEMP_DIR, "full_data.snapshot")
+        self.dj.to_snapshot(snapshot_path)
+
+        dj = pydatajson.DataJson.from_snapshot(
+            snapshot_path, self.get_sample("full_data.json"))
+
+        assert_equal(dj, self.dj)
+        assert_true(dj.has_catalog)
+        assert_equal(dj.datasets, self.dj.datasets)
+
+    def test_stale_snapshot_is_rebuilt(self):
+        catalog_path = os.path.join(self.TEMP_DIR, "snapshot_source.json")
+        snapshot_path = os.path.join(self.TEMP_DIR, "snapshot_source.snapshot")
+        pydatajson.writers.write_json(self.catalog, catalog_path)
+        pydatajson.DataJson(catalog_path).to_snapshot(snapshot_path)
+
+        catalog = pydatajson.readers.read_catalog(catalog_path)
+        catalog["title"] = "Otro titulo"
+        pydatajson.writers.write_json(catalog, catalog_path)
+        # fuerza una fecha de modificación distinta a la del snapshot
+        os.utime(catalog_path, (0, 0))
+
+        dj = pydatajson.DataJson.from_snapshot(snapshot_path, catalog_path)
+        assert_equal(dj["title"], "Otro titulo")
+
+        with mock.patch("pydatajson.readers._read_catalog_file") as read_file:
+            dj = pydatajson.DataJson.from_snapshot(snapshot_path,
+                                                   catalog_path)
+            read_file.assert_not_called()
+        assert_equal(dj["title"], "Otro titulo")
+
+    def test_snapshot_without_source(self):
+        """Sin indicar el origen, se usa el guardado en el snapshot para
+        saber si está desactualizado."""
+        catalog_path = os.path.join(self.TEMP_DIR, "snapshot_source.json")
+        snapshot_path = os.path.join(self.TEMP_DIR, "snapshot_source.snapshot")
+        pydatajson.writers.write_json(self.catalog, catalog_path)
+        pydatajson.DataJson(catalog_path).to_snapshot(snapshot_path)
+
+        dj = pydatajson.DataJson.from_snapshot(snapshot_path)
+        assert_equal(dj["title"], self.catalog["title"])
+
+        os.utime(catalog_path, (0, 0))
+        assert_raises(pydatajson.custom_exceptions.StaleSnapshotError,
+                      pydatajson.DataJson.from_snapshot, snapshot_path)
+
+    def test_snapshot_of_other_version_is_stale(self):
+        snapshot_path = os.path.join(self.TEMP_DIR, "full_data.snapshot")
+        self.dj.to_snapshot(snapshot_path)
+
+        with mock.patch("pydatajson.__version__", "0.0.1"):
+            assert_raises(pydatajson.custom_exceptions.StaleSnapshotError,
+                          pydatajson.DataJson.from_snapshot, snapshot_path)
+
+    def test_missing_snapshot_without_source(self):
+        assert_raises(pydatajson.custom_exceptions.StaleSnapshotError,
+                      pydatajson.DataJson.from_snapshot,
+                      os.path.join(self.TEMP_DIR, "inexistente.snapshot"))
+
 
 if __name__ == '__main__':
     nose.run(defaultTest=__name__)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests del modulo 'download', contra un servidor HTTP local."""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import with_statement
+
+import gzip
+import io
+import os.path
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import nose
+import requests
+try:
+    import mock
+except ImportError:
+    from unittest import mock
+from six.moves import BaseHTTPServer
+
+from .context import pydatajson
+from pydatajson import custom_exceptions as ce
+from pydatajson import download, readers, snapshot, writers
+from pydatajson.core import DataJson
+
+SAMPLES_DIR = os.path.join("tests", "samples")
+TEMP_DIR = os.path.join("tests", "temp")
+ETAG = '"full-data-v1"'
+
+
+def gzip_compress(content):
+    compressed = io.BytesIO()
+    with gzip.GzipFile(fileobj=compressed, mode="wb") as gzip_file:
+        gzip_file.write(content)
+    return compressed.getvalue()
+
+
+class CatalogHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Sirve los archivos de tests/samples (data.json es full_data.json) y
+    de tests/temp (bajo /temp/) con el ETag `server.etag` (ninguno si es
+    None), y respuestas configurables por el test a través de
+    `server.responses`."""
+
+    def do_HEAD(self):
+        self.server.head_requests.append(dict(self.headers.items()))
+        self.send_response(200)
+        if self.server.etag:
+            self.send_header("ETag", self.server.etag)
+        self.end_headers()
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers.items()))
+        response = (self.server.responses.pop(0) if self.server.responses
+                    else "ok")
+
+        if response == "slow":
+            time.sleep(1)
+        if response == "unavailable":
+            self.send_response(503)
+            self.end_headers()
+        elif (self.server.etag and
+              self.headers.get("If-None-Match") == self.server.etag):
+            self.send_response(304)
+            self.end_headers()
+        else:
+            sample_name = os.path.basename(self.path)
+            if sample_name == "data.json":
+                sample_name = "full_data.json"
+            samples_dir = (TEMP_DIR if self.path.startswith("/temp/")
+                           else SAMPLES_DIR)
+            with io.open(os.path.join(samples_dir, sample_name),
+                         "rb") as sample:
+                body = sample.read()
+            self.send_response(200)
+            if response == "gzip":
+                body = gzip_compress(body)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            if self.server.etag:
+                self.send_header("ETag", self.server.etag)
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except IOError:
+                # el cliente cortó la conexión por timeout
+                pass
+
+    def log_message(self, *args):
+        pass
+
+
+class DownloadTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0),
+                                               CatalogHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever)
+        cls.server_thread.daemon = True
+        cls.server_thread.start()
+        cls.base_url = "http://127.0.0.1:{}/".format(cls.server.server_port)
+        cls.url = cls.base_url + "data.json"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests = []
+        self.server.head_requests = []
+        self.server.responses = []
+        self.server.etag = ETAG
+        self.cache_dir = os.path.join(TEMP_DIR, "http_cache")
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        download.configure(backoff_factor=0)
+
+    def tearDown(self):
+        download.configure()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_sessions_are_shared_per_host(self):
+        session = download.get_session(self.url)
+        self.assertIs(session, download.get_session(self.url + "?otro"))
+        self.assertIsNot(session,
+                         download.get_session("http://localhost:1/"))
+
+    def test_conditional_get_served_from_disk_cache(self):
+        download.configure(cache_dir=self.cache_dir, backoff_factor=0)
+        expected = readers.read_catalog(
+            os.path.join(SAMPLES_DIR, "full_data.json"))
+
+        self.assertEqual(readers.read_catalog(self.url), expected)
+        self.assertEqual(readers.read_catalog(self.url), expected)
+        self.assertEqual(list(readers.iter_datasets(self.url)),
+                         expected["dataset"])
+
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertNotIn("If-None-Match", self.server.requests[0])
+        self.assertEqual(self.server.requests[1].get("If-None-Match"), ETAG)
+        self.assertEqual(self.server.requests[2].get("If-None-Match"), ETAG)
+
+    def test_without_cache_no_conditional_get(self):
+        readers.read_catalog(self.url)
+        readers.read_catalog(self.url)
+        self.assertNotIn("If-None-Match", self.server.requests[1])
+
+    def test_retries_unavailable_server(self):
+        download.configure(retries=2, backoff_factor=0)
+        self.server.responses = ["unavailable", "unavailable"]
+
+        catalog = readers.read_catalog(self.url)
+
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertIn("dataset", catalog)
+
+    def test_download_tries_are_not_multiplied(self):
+        """`download` sólo hace los intentos de `tries`: su sesión no
+        reintenta por su cuenta."""
+        download.configure(retries=2, backoff_factor=0)
+        self.server.responses = ["unavailable"] * 3
+
+        download.download(self.url, tries=1)
+        self.assertEqual(len(self.server.requests), 1)
+
+        self.assertRaises(requests.exceptions.RequestException,
+                          download.download, "http://127.0.0.1:1/", tries=2,
+                          retry_delay=0)
+
+    def test_concurrent_downloads_of_same_url_to_cache(self):
+        """Dos descargas simultáneas de la misma URL no comparten el archivo
+        temporal del caché."""
+        download.configure(cache_dir=self.cache_dir, backoff_factor=0)
+        with io.open(os.path.join(SAMPLES_DIR, "full_data.json"),
+                     "rb") as sample:
+            expected = sample.read()
+
+        first = download.iter_content(self.url, chunk_size=1024)
+        second = download.iter_content(self.url, chunk_size=1024)
+        first_chunks = [next(first)]
+        second_chunks = [next(second)]
+        first_chunks.extend(first)
+        second_chunks.extend(second)
+
+        self.assertEqual(b"".join(first_chunks), expected)
+        self.assertEqual(b"".join(second_chunks), expected)
+        self.assertEqual(download.get_content(self.url), expected)
+        self.assertEqual(self.server.requests[-1].get("If-None-Match"), ETAG)
+        self.assertEqual(
+            [name for name in os.listdir(self.cache_dir)
+             if name.endswith(".tmp")], [])
+
+    def test_content_encoding(self):
+        self.server.responses = ["gzip", "gzip"]
+        expected = readers.read_catalog(
+            os.path.join(SAMPLES_DIR, "full_data.json"))
+
+        self.assertEqual(readers.read_catalog(self.url), expected)
+        self.assertEqual(list(readers.iter_datasets(self.url)),
+                         expected["dataset"])
+
+    def test_read_remote_compressed_catalog(self):
+        catalog = readers.read_catalog(
+            os.path.join(SAMPLES_DIR, "full_data.json"))
+        writers.write_json(catalog,
+                           os.path.join(TEMP_DIR, "full_data.json.gz"))
+        url = self.base_url + "temp/full_data.json.gz"
+
+        self.assertEqual(readers.read_catalog(url), catalog)
+
+    def test_read_remote_xlsx_catalog_concurrently(self):
+        url = self.base_url + "catalogo_justicia.xlsx"
+        expected = readers.read_catalog(
+            os.path.join(SAMPLES_DIR, "catalogo_justicia.xlsx"))
+
+        results = readers.read_catalogs([url] * 4, max_per_host=4)
+
+        self.assertEqual(results, [(expected, None)] * 4)
+        self.assertFalse(os.path.exists(".tmpfile.xlsx"))
+
+    @mock.patch("pydatajson.readers.XLSX_SPOOL_MAX_SIZE", 1024)
+    def test_read_remote_xlsx_catalog_spooled_to_disk(self):
+        url = self.base_url + "catalogo_justicia.xlsx"
+        expected = readers.read_catalog(
+            os.path.join(SAMPLES_DIR, "catalogo_justicia.xlsx"))
+
+        with mock.patch("tempfile.TemporaryFile",
+                        wraps=tempfile.TemporaryFile) as temporary_file:
+            self.assertEqual(readers.read_catalog(url), expected)
+        self.assertEqual(temporary_file.call_count, 1)
+
+    def test_snapshot_of_url_follows_etag(self):
+        path = os.path.join(TEMP_DIR, "remote_catalog.snapshot")
+        DataJson(self.url).to_snapshot(path)
+        gets = len(self.server.requests)
+
+        # mientras no cambie el ETag se usa el snapshot sin descargar
+        catalog = DataJson.from_snapshot(path, self.url)
+        self.assertEqual(len(self.server.requests), gets)
+        self.assertEqual(catalog["title"], DataJson(self.url)["title"])
+
+        self.server.etag = '"full-data-v2"'
+        DataJson.from_snapshot(path, self.url)
+        self.assertEqual(len(self.server.requests), gets + 2)
+        DataJson.from_snapshot(path, self.url)
+        self.assertEqual(len(self.server.requests), gets + 2)
+
+    def test_snapshot_of_url_without_validators(self):
+        self.server.etag = None
+        path = os.path.join(TEMP_DIR, "remote_catalog.snapshot")
+        self.assertRaises(ValueError, DataJson(self.url).to_snapshot, path)
+
+        self.server.etag = ETAG
+        DataJson(self.url).to_snapshot(path)
+        self.server.etag = None
+        self.assertRaises(ce.StaleSnapshotError, snapshot.read_snapshot,
+                          path, self.url)
+
+    def test_timeout(self):
+        download.configure(timeout=0.2, retries=0)
+        self.server.responses = ["slow"]
+        self.assertRaises(requests.exceptions.RequestException,
+                          readers.read_catalog, self.url)
+
+
+if __name__ == '__main__':
+    nose.run(defaultTest=__name__)
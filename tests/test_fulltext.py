@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests del modulo 'fulltext'."""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import with_statement
+
+import copy
+import io
+import os.path
+import unittest
+
+import nose
+
+from .context import pydatajson
+from pydatajson.fulltext import FullTextIndex, tokenize
+
+
+class FullTextIndexTestCase(unittest.TestCase):
+    SAMPLES_DIR = os.path.join("tests", "samples")
+    TEMP_DIR = os.path.join("tests", "temp")
+
+    DATASET = {
+        "identifier": "ventas",
+        "title": "Ventas de la Administración Pública",
+        "description": "Ventas de bienes del Estado",
+        "keyword": ["ventas", "subastas"],
+        "distribution": [{
+            "identifier": "ventas.1",
+            "title": "Subastas del año 2016",
+            "field": [{"id": "ventas.1.1", "title": "monto_subastas"}],
+        }],
+    }
+
+    def setUp(self):
+        self.index = FullTextIndex.from_catalog(
+            os.path.join(self.SAMPLES_DIR, "full_data.json"))
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Convocatorias del Año 2015, en la Ciudad"),
+                         ["convocatorias", "ano", "2015", "ciudad"])
+        self.assertEqual(tokenize("unidad_operativa"), ["unidad", "operativa"])
+
+    def test_search_ranks_by_relevance(self):
+        results = self.index.search("convocatorias abiertas")
+
+        self.assertEqual(results[0]["type"], "distribution")
+        self.assertEqual(results[0]["title"],
+                         "Convocatorias abiertas durante el año 2015")
+        scores = [result["score"] for result in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_search_folds_accents_and_case(self):
+        self.assertEqual(self.index.search("ELECTRÓNICAS"),
+                         self.index.search("electronicas"))
+        self.assertEqual(
+            set(result["dataset_identifier"] for result in
+                self.index.search("electronicas", types=["dataset"])),
+            {"99db6631-d1c9-470b-a73e-c62daa32c777",
+             "99db6631-d1c9-470b-a73e-c62daa32c420"})
+        self.assertEqual(self.index.search("de la"), [])
+
+    def test_search_themes_by_label(self):
+        results = self.index.search("adquisicion")
+
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(result["type"] == "dataset" for result in results))
+
+    def test_prefix_search(self):
+        self.assertEqual(self.index.search("convoc"), [])
+        results = self.index.search("convoc", prefix=True, limit=None)
+
+        self.assertEqual(results, self.index.search("convoc*", limit=None))
+        self.assertIn("field", [result["type"] for result in results])
+        self.assertIn("fecha_publicacion_convocatoria",
+                      [result["title"] for result in results])
+
+    def test_add_and_remove_dataset(self):
+        documents = len(self.index)
+        self.index.add_dataset(self.DATASET)
+
+        self.assertEqual(len(self.index), documents + 3)
+        self.assertEqual(
+            [(result["type"], result["field_id"]) for result in
+             self.index.search("subastas", types=["field"])],
+            [("field", "ventas.1.1")])
+        self.assertEqual(self.index.search("ventas")[0]["dataset_identifier"],
+                         "ventas")
+
+        # volver a agregarlo lo reemplaza
+        self.index.add_dataset(self.DATASET)
+        self.assertEqual(len(self.index), documents + 3)
+
+        self.assertTrue(self.index.remove_dataset("ventas"))
+        self.assertFalse(self.index.remove_dataset("ventas"))
+        self.assertEqual(len(self.index), documents)
+        self.assertEqual(self.index.search("subast*"), [])
+
+    def test_repeated_distribution_identifiers(self):
+        dataset = copy.deepcopy(self.DATASET)
+        dataset["distribution"].append({"identifier": "ventas.1",
+                                        "title": "Subastas del año 2017"})
+        documents = len(self.index)
+        self.index.add_dataset(dataset)
+
+        self.assertEqual(len(self.index), documents + 4)
+        self.assertEqual(
+            sorted(result["title"] for result in
+                   self.index.search("subastas", types=["distribution"])),
+            ["Subastas del año 2016", "Subastas del año 2017"])
+
+        self.assertTrue(self.index.remove_dataset("ventas"))
+        self.assertEqual(len(self.index), documents)
+        self.assertEqual(self.index.search("subast*"), [])
+
+    def test_dataset_without_identifier(self):
+        dataset = copy.deepcopy(self.DATASET)
+        del dataset["identifier"]
+        documents = len(self.index)
+
+        self.assertRaises(ValueError, self.index.add_dataset, dataset)
+        self.assertEqual(len(self.index), documents)
+        self.assertRaises(ValueError, FullTextIndex.from_catalog,
+                          {"dataset": [dataset]})
+
+    def test_search_text_from_datajson(self):
+        datajson = pydatajson.DataJson(
+            os.path.join(self.SAMPLES_DIR, "full_data.json"))
+
+        self.assertEqual(datajson.search_text("convoc*", limit=None),
+                         self.index.search("convoc*", limit=None))
+        self.assertIs(datajson.get_fulltext_index(), datajson.fulltext_index)
+        self.assertEqual(
+            pydatajson.search.search_text(datajson, "contrataciones"),
+            self.index.search("contrataciones"))
+
+        # los métodos que modifican el catálogo actualizan el índice
+        datajson.remove_distribution("1.1")
+        self.assertNotIn("1.1", [
+            result["distribution_identifier"] for result in
+            datajson.search_text("convocatorias", types=["distribution"])])
+        datajson.remove_dataset("99db6631-d1c9-470b-a73e-c62daa32c777")
+        self.assertNotIn(
+            "99db6631-d1c9-470b-a73e-c62daa32c777",
+            [result["dataset_identifier"]
+             for result in datajson.search_text("contrataciones")])
+
+    def test_save_and_load(self):
+        path = os.path.join(self.TEMP_DIR, "full_data.index")
+        self.index.save(path)
+        loaded = FullTextIndex.load(path)
+
+        for query in ["contrataciones", "adquisicion", "convoc*"]:
+            self.assertEqual(loaded.search(query, limit=None),
+                             self.index.search(query, limit=None))
+
+        loaded.add_dataset(self.DATASET)
+        self.assertEqual(len(loaded.search("subastas")), 3)
+
+    def test_load_invalid_file(self):
+        path = os.path.join(self.TEMP_DIR, "invalid.index")
+        with io.open(path, "wb") as index_file:
+            index_file.write(b"{}")
+
+        self.assertRaises(ValueError, FullTextIndex.load, path)
+
+
+if __name__ == '__main__':
+    nose.run(defaultTest=__name__)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests del modulo 'json_backend'.
+
+Comparan cada backend instalado con el módulo `json` de la biblioteca
+estándar sobre los catálogos de ejemplo."""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import with_statement
+
+import datetime
+import glob
+import io
+import json
+import os.path
+import threading
+import unittest
+from collections import OrderedDict
+
+import nose
+try:
+    import mock
+except ImportError:
+    from unittest import mock
+
+from .context import pydatajson
+from pydatajson import json_backend, readers, writers
+
+
+class JSONBackendTestCase(unittest.TestCase):
+    SAMPLES_DIR = os.path.join("tests", "samples")
+    TEMP_DIR = os.path.join("tests", "temp")
+
+    @classmethod
+    def setUpClass(cls):
+        cls.samples = []
+        for path in sorted(glob.glob(os.path.join(cls.SAMPLES_DIR, "*.json"))):
+            with io.open(path, "rb") as sample:
+                cls.samples.append(sample.read())
+
+    def tearDown(self):
+        json_backend.set_backend()
+
+    def test_backends_decode_like_stdlib(self):
+        for name in json_backend.available_backends():
+            json_backend.set_backend(name)
+            for sample in self.samples:
+                expected = json.loads(sample.decode("utf-8"))
+                self.assertEqual(json_backend.loads(sample), expected)
+                self.assertEqual(json_backend.loads(sample.decode("utf-8")),
+                                 expected)
+
+    @mock.patch("pydatajson.json_backend.JSON_DUMP_CHUNK_SIZE", 16)
+    def test_backends_encode_like_stdlib(self):
+        obj = OrderedDict([("a", [1, 2.5, None, True, {"b": "ñ/x"}]),
+                           (1, "clave no textual"), ("c", {}), ("d", [])])
+        objects = [json.loads(sample.decode("utf-8"))
+                   for sample in self.samples] + [obj, [], {}, "texto"]
+
+        for name in json_backend.available_backends():
+            json_backend.set_backend(name)
+            for obj in objects:
+                expected = json.loads(json.dumps(obj))
+                for indent in [None, 2, 4]:
+                    text = json_backend.dumps(obj, indent)
+                    self.assertEqual(json.loads(text), expected)
+                    self.assertEqual(
+                        "".join(json_backend.iter_dumps(obj, indent)), text)
+
+    def test_falls_back_to_stdlib(self):
+        for name in json_backend.available_backends():
+            json_backend.set_backend(name)
+            self.assertEqual(repr(json_backend.loads('{"a": NaN}')),
+                             repr({"a": float("nan")}))
+            self.assertRaises(ValueError, json_backend.loads, '{"a": }')
+            self.assertRaises(TypeError, json_backend.dumps,
+                              {"a": datetime.date(2017, 1, 1)})
+
+    def test_set_unknown_backend(self):
+        self.assertRaises(ValueError, json_backend.set_backend, "pickle")
+        self.assertEqual(json_backend.get_backend(),
+                         json_backend.available_backends()[0])
+
+    @mock.patch("pydatajson.json_backend.JSON_DUMP_CHUNK_SIZE", 16)
+    def test_write_json_streaming(self):
+        catalog = readers.read_catalog(
+            os.path.join(self.SAMPLES_DIR, "full_data.json"))
+        path = os.path.join(self.TEMP_DIR, "streamed.json")
+
+        for name in json_backend.available_backends():
+            json_backend.set_backend(name)
+            writers.write_json(catalog, path)
+            self.assertEqual(readers.read_json(path), catalog)
+
+    def test_write_json_output_like_stdlib(self):
+        # con orjson se escriben los mismos bytes que con json; con los demás
+        # backends, un texto que se decodifica a los mismos valores
+        path = os.path.join(self.TEMP_DIR, "same_bytes.json")
+        objects = [json.loads(sample.decode("utf-8"))
+                   for sample in self.samples]
+        objects.append({"a": [1.5e-7, 1e16, 0.1, -0.0]})
+        for obj in objects:
+            expected = json.dumps(obj, indent=4, separators=(",", ": "),
+                                  ensure_ascii=False).encode("utf-8")
+            for name in json_backend.available_backends():
+                json_backend.set_backend(name)
+                writers.write_json(obj, path)
+                with io.open(path, "rb") as written:
+                    text = written.read()
+                if name in ["orjson", "json"]:
+                    self.assertEqual(text, expected, name)
+                else:
+                    self.assertEqual(json.loads(text.decode("utf-8")), obj,
+                                     name)
+
+    def test_failed_write_json_keeps_previous_file(self):
+        path = os.path.join(self.TEMP_DIR, "failed.json")
+        writers.write_json({"a": 1}, path)
+
+        self.assertRaises(TypeError, writers.write_json,
+                          {"b": 1, "c": object()}, path)
+
+        self.assertEqual(readers.read_json(path), {"a": 1})
+        self.assertEqual(
+            [name for name in os.listdir(self.TEMP_DIR)
+             if name.startswith("failed.json.")], [])
+
+    def test_concurrent_write_json(self):
+        # cada escritura usa su propio temporal
+        path = os.path.join(self.TEMP_DIR, "concurrent.json")
+        catalog = readers.read_catalog(
+            os.path.join(self.SAMPLES_DIR, "full_data.json"))
+        errors = []
+
+        def write():
+            try:
+                for _ in range(5):
+                    writers.write_json(catalog, path)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(readers.read_json(path), catalog)
+        self.assertEqual(
+            [name for name in os.listdir(self.TEMP_DIR)
+             if name.startswith("concurrent.json.")], [])
+
+    def test_benchmark(self):
+        path = os.path.join(self.SAMPLES_DIR, "full_data.json")
+        results = json_backend.benchmark([path], number=1)
+
+        self.assertEqual([result["backend"] for result in results],
+                         json_backend.available_backends())
+        for result in results:
+            self.assertEqual(result["path"], path)
+            for operation in ["loads", "dumps", "iter_dumps"]:
+                self.assertGreater(result[operation], 0)
+
+
+if __name__ == '__main__':
+    nose.run(defaultTest=__name__)
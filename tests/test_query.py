@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests del modulo 'query'."""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import with_statement
+
+import datetime
+import unittest
+
+import nose
+
+from .context import pydatajson
+from pydatajson.query import compile_conditions, compile_filters
+from pydatajson.query import compile_getter
+
+DATASET = {
+    "identifier": "1",
+    "title": "Compras",
+    "issued": "2016-04-14T19:48:05.433640-03:00",
+    "keyword": ["bienes", "compras"],
+    "publisher": {"name": "Ministerio de Modernización"},
+    "accrualPeriodicity": "R/P1Y",
+}
+
+
+class QueryTestCase(unittest.TestCase):
+
+    def assert_matches(self, conditions, expected=True):
+        predicate = compile_conditions(conditions)
+        self.assertEqual(predicate(DATASET), expected, conditions)
+
+    def test_equality(self):
+        self.assert_matches({"title": "Compras"})
+        self.assert_matches({"title": "Ventas"}, False)
+        self.assert_matches({"title__ne": "Ventas"})
+        # una clave inexistente vale None
+        self.assert_matches({"spatial": None})
+
+    def test_membership(self):
+        self.assert_matches({"accrualPeriodicity__in": ["R/P1Y", "R/P1M"]})
+        self.assert_matches({"accrualPeriodicity__not_in": ["R/P1M"]})
+        self.assert_matches({"keyword__in": ["compras", "ventas"]})
+        self.assert_matches({"keyword__in": ["ventas"]}, False)
+
+    def test_contains(self):
+        self.assert_matches({"keyword__contains": "bienes"})
+        self.assert_matches({"keyword__not_contains": "bienes"}, False)
+        self.assert_matches({"title__contains": "ompra"})
+        self.assert_matches({"spatial__contains": "ARG"}, False)
+
+    def test_date_ranges(self):
+        self.assert_matches({"issued__gte": "2016-01-01",
+                             "issued__lt": "2017-01-01"})
+        self.assert_matches({"issued__gt": datetime.date(2016, 5, 1)}, False)
+        self.assert_matches({"modified__lte": "2017-01-01"}, False)
+
+    def test_nested_paths(self):
+        self.assert_matches({"publisher.name": "Ministerio de Modernización"})
+        self.assert_matches({"publisher.name__contains": "Modernización"})
+        self.assert_matches({"publisher.mbox__exists": False})
+        self.assert_matches({"title.name": None})
+
+    def test_compile_getter(self):
+        self.assertEqual(compile_getter("accrualPeriodicity")(DATASET),
+                         "R/P1Y")
+        self.assertEqual(compile_getter("publisher.name")(DATASET),
+                         "Ministerio de Modernización")
+        self.assertIsNone(compile_getter("publisher.mbox")(DATASET))
+        self.assertIsNone(compile_getter("title.name")(DATASET))
+
+    def test_filter_out_excludes_any_match(self):
+        predicate = compile_conditions(
+            {"title": "Compras"},
+            {"title": "Ventas", "keyword__contains": "bienes"})
+        self.assertFalse(predicate(DATASET))
+
+    def test_invalid_conditions(self):
+        self.assertRaises(ValueError, compile_conditions,
+                          {"title__startswith": "C"})
+        self.assertRaises(ValueError, compile_conditions,
+                          {"format__in": "CSV"})
+
+    def test_compiled_filters_are_reused(self):
+        filter_in = {"dataset": {"title": "Compras"},
+                     "field": {"type__in": ["integer", "number"]}}
+        compiled = compile_filters(filter_in)
+
+        self.assertIs(compile_filters(dict(filter_in)), compiled)
+        self.assertIsNone(compiled["distribution"])
+        self.assertEqual(compile_filters(), dict.fromkeys(
+            ["dataset", "distribution", "field"]))
+
+    def test_compiled_filters_keep_value_types(self):
+        # una fecha y su texto tienen la misma huella: no se comparte la
+        # compilación entre ambos filtros
+        text_filter = {"dataset": {"issued__gt": "2016-05-01"}}
+        date_filter = {"dataset": {"issued__gt": datetime.date(2016, 5, 1)}}
+        compiled_text = compile_filters(text_filter)
+        compiled_date = compile_filters(date_filter)
+
+        self.assertIsNot(compiled_date, compiled_text)
+        self.assertIsNot(compile_filters(date_filter), compiled_date)
+        self.assertIs(compile_filters(text_filter), compiled_text)
+        self.assertFalse(compiled_date["dataset"](DATASET))
+        self.assertFalse(compiled_text["dataset"](DATASET))
+
+
+if __name__ == '__main__':
+    nose.run(defaultTest=__name__)
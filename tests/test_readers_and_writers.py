@@ -5,7 +5,14 @@
 
 from __future__ import print_function, unicode_literals, with_statement
 
+import bz2
+import copy
+import gzip
+import io
 import os.path
+import shutil
+import threading
+import time
 import unittest
 
 import nose
@@ -18,6 +25,10 @@ try:
 except ImportError:
     from unittest import mock
 import filecmp
+try:
+    import lzma
+except ImportError:
+    lzma = None
 from .context import pydatajson
 from pydatajson.helpers import ensure_dir_exists
 from . import xl_methods
@@ -70,6 +81,16 @@ class ReadersAndWritersTestCase(unittest.TestCase):
 
         self.assertListEqual(actual_table, expected_table)
 
+    def test_iter_table(self):
+        for filename, expected_table in [("read_table.csv", CSV_TABLE),
+                                         ("read_table.xlsx", READ_XLSX_TABLE)]:
+            rows = pydatajson.readers.iter_table(
+                os.path.join(self.SAMPLES_DIR, filename))
+
+            self.assertNotIsInstance(rows, list)
+            self.assertEqual([dict(row) for row in rows],
+                             [dict(row) for row in expected_table])
+
     @nose.tools.raises(ValueError)
     def test_read_table_from_invalid_format(self):
         """Si se quiere leer un formato desconocido (no XLSX ni CSV),
@@ -158,6 +179,20 @@ revíselo manualmente""".format(temp_filename)
 
         self.assertDictEqual(actual_catalog, expected_catalog)
 
+    def test_read_xlsx_closes_workbooks(self):
+        """Los libros de XLSX, abiertos en modo read_only, se cierran para
+        no dejar el archivo abierto."""
+        close = pyxl.Workbook.close
+        with mock.patch.object(pyxl.Workbook, "close", autospec=True,
+                               side_effect=close) as closed:
+            pydatajson.readers.read_catalog(
+                os.path.join(self.SAMPLES_DIR, "catalogo_justicia.xlsx"))
+            self.assertEqual(closed.call_count, 1)
+
+            list(pydatajson.readers.iter_table(
+                os.path.join(self.SAMPLES_DIR, "read_table.xlsx")))
+            self.assertEqual(closed.call_count, 2)
+
     def test_read_written_xlsx_catalog(self):
         """read_catalog puede leer XLSX creado por write_xlsx_catalog"""
         original_catalog = pydatajson.DataJson(
@@ -202,6 +237,268 @@ revíselo manualmente""".format(temp_filename)
 
         self.assertDictEqual(actual_catalog, expected_catalog)
 
+    @mock.patch('pydatajson.readers.JSON_STREAM_CHUNK_SIZE', 16)
+    def test_iter_datasets_from_json(self):
+        """iter_datasets lee los datasets de a uno, aunque los bloques leídos
+        corten los valores por la mitad."""
+        for sample in ["full_data.json", "several_datasets.json",
+                       "missing_dataset.json"]:
+            catalog_path = os.path.join(self.SAMPLES_DIR, sample)
+            expected_catalog = pydatajson.readers.read_catalog(catalog_path)
+
+            catalog_fields = {}
+            datasets = list(pydatajson.readers.iter_datasets(
+                catalog_path, catalog_fields))
+
+            self.assertEqual(datasets, expected_catalog.get("dataset", []))
+            self.assertEqual(
+                catalog_fields,
+                dict(expected_catalog, dataset=[])
+                if "dataset" in expected_catalog else expected_catalog)
+
+    def test_iter_datasets_from_dict(self):
+        catalog = pydatajson.readers.read_catalog(
+            os.path.join(self.SAMPLES_DIR, "several_datasets.json"))
+        self.assertEqual(list(pydatajson.readers.iter_datasets(catalog)),
+                         catalog["dataset"])
+
+    def test_iter_datasets_invalid_json(self):
+        catalog_path = os.path.join(self.TEMP_DIR, "invalid.json")
+        with open(catalog_path, "w") as catalog_file:
+            catalog_file.write('{"title": "x", "dataset": [{"a": 1} {"b": 2}]}')
+
+        datasets = pydatajson.readers.iter_datasets(catalog_path)
+        self.assertEqual(next(datasets), {"a": 1})
+        self.assertRaises(ValueError, next, datasets)
+
+    def test_read_catalog_cache(self):
+        catalog_path = os.path.join(self.TEMP_DIR, "cached_catalog.json")
+        shutil.copy(os.path.join(self.SAMPLES_DIR, "full_data.json"),
+                    catalog_path)
+        pydatajson.readers.configure_catalog_cache(max_items=10)
+        try:
+            with mock.patch('pydatajson.readers.read_json',
+                            wraps=pydatajson.readers.read_json) as read_json:
+                catalog = pydatajson.readers.read_catalog(catalog_path)
+                catalog["title"] = "modificado"
+                cached = pydatajson.readers.read_catalog(catalog_path)
+                self.assertEqual(read_json.call_count, 1)
+                self.assertNotEqual(cached["title"], "modificado")
+
+                # un archivo modificado se vuelve a leer
+                os.utime(catalog_path, (0, 0))
+                pydatajson.readers.read_catalog(catalog_path)
+                self.assertEqual(read_json.call_count, 2)
+
+                pydatajson.readers.invalidate_catalog_cache(catalog_path)
+                pydatajson.readers.read_catalog(catalog_path)
+                self.assertEqual(read_json.call_count, 3)
+        finally:
+            pydatajson.readers.configure_catalog_cache()
+
+    def test_read_catalog_cache_read_only(self):
+        catalog_path = os.path.join(self.SAMPLES_DIR, "full_data.json")
+        pydatajson.readers.configure_catalog_cache(max_items=10,
+                                                   read_only=True)
+        try:
+            catalog = pydatajson.readers.read_catalog(catalog_path)
+            self.assertIs(catalog,
+                          pydatajson.readers.read_catalog(catalog_path))
+            self.assertRaises(TypeError, catalog.__setitem__, "title", "x")
+            self.assertRaises(TypeError, catalog["dataset"].append, {})
+
+            writable = copy.deepcopy(catalog)
+            writable["dataset"][0]["title"] = "x"
+            self.assertEqual(type(writable["dataset"]), list)
+
+            # los valores default se aplican sobre una copia
+            with_defaults = pydatajson.readers.read_catalog(
+                catalog_path, default_values={"catalog_language": ["x"]})
+            self.assertIsNot(with_defaults, catalog)
+        finally:
+            pydatajson.readers.configure_catalog_cache()
+
+    def test_search_read_only_cached_catalog(self):
+        """Las funciones `get_*` y DataJson funcionan con la cache de sólo
+        lectura, sin modificar los catálogos guardados en ella."""
+        catalog_path = os.path.join(self.SAMPLES_DIR, "full_data.json")
+        search = pydatajson.search
+        get_entities = [
+            lambda catalog: search.get_datasets(catalog),
+            lambda catalog: search.get_distributions(catalog),
+            lambda catalog: search.get_fields(catalog),
+            lambda catalog: search.get_distribution(catalog,
+                                                    identifier="1.1"),
+            lambda catalog: search.get_field(catalog, identifier="proc12")
+        ]
+        # las funciones `get_*` escriben en los catálogos modificables, así
+        # que cada una se compara con un catálogo recién leído
+        expected = [get(pydatajson.DataJson(catalog_path))
+                    for get in get_entities]
+
+        pydatajson.readers.configure_catalog_cache(max_items=10,
+                                                   read_only=True)
+        try:
+            catalog = pydatajson.readers.read_catalog(catalog_path)
+            for get, entities in zip(get_entities, expected):
+                self.assertEqual(get(catalog), entities)
+                self.assertEqual(get(pydatajson.DataJson(catalog_path)),
+                                 entities)
+            self.assertNotIn(
+                "distribution_identifier",
+                catalog["dataset"][0]["distribution"][0]["field"][0])
+        finally:
+            pydatajson.readers.configure_catalog_cache()
+
+    def test_xlsx_row_to_dict(self):
+        row = {"dataset_identifier": "1", "dataset_theme": "a, b",
+               "dataset_publisher_name": "P", "distribution_title": "x"}
+        self.assertEqual(
+            pydatajson.readers._xlsx_row_to_dict(row, "dataset_", ["theme"]),
+            {"identifier": "1", "theme": ["a", "b"], "publisher_name": "P"})
+
+    def test_get_distribution_indexes(self):
+        datasets = [
+            {"identifier": "1", "title": "A", "distribution": [
+                {"identifier": "1.1", "title": "a"},
+                {"identifier": "1.2", "title": "b"}]},
+            {"identifier": "2", "title": "B", "distribution": []},
+            {"identifier": "2", "title": "B", "distribution": []}
+        ]
+        datasets_index = pydatajson.readers._index_by(datasets, "identifier")
+        distributions_index = {
+            (0, "1.1"): [0], (0, "1.2"): [1]
+        }
+        logger = mock.Mock()
+
+        def get_indexes(*ids_and_titles):
+            return pydatajson.readers._get_distribution_indexes(
+                datasets, datasets_index, distributions_index,
+                *ids_and_titles, logger=logger)
+
+        self.assertEqual(get_indexes("1", "A", "1.2", "b"), (0, 1))
+        self.assertEqual(get_indexes("1", "A", "1.2", "otro"), (0, None))
+        self.assertEqual(get_indexes("2", "B", "2.1", "c"), (None, None))
+        self.assertEqual(get_indexes("3", "C", "3.1", "d"), (None, None))
+        self.assertIsInstance(logger.warning.call_args_list[0][0][0],
+                              pydatajson.custom_exceptions.
+                              DistributionUnexpectedTitle)
+
+    def test_read_catalogs(self):
+        catalogs = [os.path.join(self.SAMPLES_DIR, "full_data.json"),
+                    os.path.join(self.TEMP_DIR, "no_existe.json"),
+                    {"title": "catálogo"},
+                    os.path.join(self.SAMPLES_DIR, "several_datasets.json")]
+
+        results = pydatajson.readers.read_catalogs(catalogs, workers=2)
+
+        self.assertEqual([catalog for catalog, _ in results],
+                         [pydatajson.readers.read_catalog(catalogs[0]), None,
+                          catalogs[2],
+                          pydatajson.readers.read_catalog(catalogs[3])])
+        self.assertIsInstance(results[1][1], IOError)
+
+    def test_map_catalogs_max_per_host(self):
+        running = []
+        max_running = {}
+        lock = threading.Lock()
+
+        def function(index, catalog):
+            host = catalog.split("/")[2]
+            with lock:
+                running.append(host)
+                max_running[host] = max(max_running.get(host, 0),
+                                        running.count(host))
+            time.sleep(0.02)
+            with lock:
+                running.remove(host)
+            return index
+
+        catalogs = ["http://{}/data.json?{}".format(host, i)
+                    for i in range(4) for host in ["a.gob.ar", "b.gob.ar"]]
+        results = pydatajson.readers.map_catalogs(
+            function, catalogs, workers=8, max_per_host=2)
+
+        self.assertEqual(results, [(i, None) for i in range(8)])
+        self.assertEqual(max_running, {"a.gob.ar": 2, "b.gob.ar": 2})
+
+    def test_map_catalogs_timeout(self):
+        def function(index, catalog):
+            time.sleep(0.5 if index == 0 else 0)
+            return index
+
+        results = pydatajson.readers.map_catalogs(
+            function, ["lento.json", "rapido.json"], timeout=0.1)
+
+        self.assertIsNone(results[0][0])
+        self.assertIsInstance(results[0][1],
+                              pydatajson.custom_exceptions.
+                              CatalogReadTimeoutError)
+        self.assertEqual(results[1], (1, None))
+
+    @mock.patch('pydatajson.readers.JSON_STREAM_CHUNK_SIZE', 16)
+    def test_write_read_compressed_json_loop(self):
+        catalog = pydatajson.readers.read_catalog(
+            os.path.join(self.SAMPLES_DIR, "several_datasets.json"))
+
+        for suffix in ["gz", "bz2", "xz"]:
+            path = os.path.join(self.TEMP_DIR, "catalog.json." + suffix)
+            pydatajson.writers.write_json(catalog, path)
+
+            with open(path, "rb") as compressed_file:
+                self.assertTrue(compressed_file.read().startswith(
+                    pydatajson.compression.MAGIC_NUMBERS[suffix]))
+            self.assertEqual(pydatajson.readers.read_catalog(path), catalog)
+            self.assertEqual(list(pydatajson.readers.iter_datasets(path)),
+                             catalog["dataset"])
+
+    def test_iter_decompressed_passes_through_plain_content(self):
+        """Si el contenido no está comprimido (por ejemplo, si un servidor lo
+        descomprimió por Content-Encoding), se devuelve intacto."""
+        chunks = [b"{", b'"a": 1}']
+        self.assertEqual(
+            b"".join(pydatajson.compression.iter_decompressed(chunks, "gz")),
+            b'{"a": 1}')
+
+    def test_iter_decompressed_concatenated_streams(self):
+        """Los archivos con varios miembros (gzip) o streams (bzip2, xz)
+        concatenados se descomprimen completos."""
+        def gzip_compress(content):
+            compressed = io.BytesIO()
+            with gzip.GzipFile(fileobj=compressed, mode="wb") as gzip_file:
+                gzip_file.write(content)
+            return compressed.getvalue()
+
+        compress = {"gz": gzip_compress, "bz2": bz2.compress}
+        if lzma:
+            compress["xz"] = lzma.compress
+        parts = [b'{"a": [1, ', b'2, 3], ', b'"b": "c"}']
+        for suffix, compress_part in compress.items():
+            content = b"".join(compress_part(part) for part in parts)
+            for chunk_size in [1, 7, len(content)]:
+                chunks = [content[i:i + chunk_size]
+                          for i in range(0, len(content), chunk_size)]
+                self.assertEqual(
+                    b"".join(pydatajson.compression.iter_decompressed(
+                        chunks, suffix)), b"".join(parts), suffix)
+
+    @mock.patch('pydatajson.readers.JSON_STREAM_CHUNK_SIZE', 16)
+    def test_read_compressed_json_is_streamed(self):
+        """Un JSON comprimido se decodifica a medida que se descomprime, sin
+        armar su texto completo."""
+        catalog = pydatajson.readers.read_catalog(
+            os.path.join(self.SAMPLES_DIR, "several_datasets.json"))
+        path = os.path.join(self.TEMP_DIR, "streamed.json.gz")
+        pydatajson.writers.write_json(catalog, path)
+
+        with mock.patch("pydatajson.json_backend.loads") as loads:
+            self.assertEqual(pydatajson.readers.read_json(path), catalog)
+            loads.assert_not_called()
+
+        with pydatajson.compression.open_compressed(path, "wb") as gz_file:
+            gz_file.write(b'{"a": 1} []')
+        self.assertRaises(ValueError, pydatajson.readers.read_json, path)
+
     @mock.patch('pydatajson.writers.write_json')
     def test_write_json_catalog_is_write_json(self, mock_write_json):
         obj = [1, 2, 3]
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests del modulo 'schema_compiler'.
+
+Comparan los errores del motor compilado con los de jsonschema sobre todos
+los catálogos de ejemplo."""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import with_statement
+
+import glob
+import os.path
+import unittest
+
+import jsonschema
+import nose
+
+from .context import pydatajson
+from pydatajson import readers
+from pydatajson.schema_compiler import CompiledValidator
+from pydatajson.validation import create_validator, validate_catalog
+from pydatajson.validation import invalidate_validation_memo
+
+
+def _error_tuples(validator, instance):
+    return [(error.validator, error.message, error.validator_value,
+             list(error.path), error.instance)
+            for error in validator.iter_errors(instance)]
+
+
+def _validation_outcome(path, validator):
+    """Devuelve la respuesta de `validate_catalog`, o el tipo de la excepción
+    que levanta. Descarta antes las validaciones memorizadas, que comparten
+    ambos motores."""
+    invalidate_validation_memo()
+    try:
+        return validate_catalog(path, validator=validator)
+    except Exception as e:
+        return type(e)
+
+
+class SchemaCompilerTestCase(unittest.TestCase):
+    SAMPLES_DIR = os.path.join("tests", "samples")
+
+    @classmethod
+    def setUpClass(cls):
+        cls.validator = create_validator()
+        cls.compiled_validator = create_validator(engine="compiled")
+        cls.samples = []
+        for path in sorted(glob.glob(os.path.join(cls.SAMPLES_DIR, "*.json"))):
+            try:
+                cls.samples.append((path, readers.read_catalog(path)))
+            except Exception:
+                # algunos ejemplos no son catálogos
+                continue
+
+    def test_create_validator_with_compiled_engine(self):
+        self.assertIsInstance(self.compiled_validator, CompiledValidator)
+        self.assertIs(self.compiled_validator,
+                      create_validator(engine="compiled"))
+        self.assertIsNot(self.compiled_validator, self.validator)
+
+    def test_unknown_engine(self):
+        self.assertRaises(ValueError, create_validator, engine="unknown")
+
+    def test_same_errors_as_jsonschema(self):
+        for path, catalog in self.samples:
+            self.assertEqual(
+                _error_tuples(self.validator, catalog),
+                _error_tuples(self.compiled_validator, catalog), path)
+            self.assertEqual(self.validator.is_valid(catalog),
+                             self.compiled_validator.is_valid(catalog), path)
+
+    def test_same_validation_response_as_jsonschema(self):
+        responses = 0
+        for path, _ in self.samples:
+            expected = _validation_outcome(path, self.validator)
+            result = _validation_outcome(path, self.compiled_validator)
+            # si un motor falla, el otro debe fallar de la misma forma
+            self.assertEqual(expected, result, path)
+            responses += isinstance(expected, dict)
+        self.assertGreater(responses, 0)
+
+    def test_not_compiled_keywords_fall_back_to_jsonschema(self):
+        schema = {
+            "type": "object",
+            "properties": {
+                "size": {"type": "integer", "minimum": 0},
+                "unit": {"enum": ["kb", "mb"]},
+                "tags": {"type": "array", "maxItems": 1,
+                         "items": {"not": {"type": "null"}}}
+            },
+            "additionalProperties": False
+        }
+        instance = {"size": -1, "unit": "gb", "tags": ["a", None],
+                    "extra": True}
+
+        self.assertEqual(
+            _error_tuples(jsonschema.Draft4Validator(schema), instance),
+            _error_tuples(CompiledValidator(schema), instance))
+
+
+if __name__ == '__main__':
+    nose.run(defaultTest=__name__)
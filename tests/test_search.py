@@ -9,11 +9,17 @@ from __future__ import print_function
 from __future__ import with_statement
 
 from functools import wraps
+import copy
+import operator
 import unittest
 import nose
 import os
 import io
 import json
+try:
+    import mock
+except ImportError:
+    from unittest import mock
 
 from six import text_type
 
@@ -30,6 +36,14 @@ def pprint(result):
     )))
 
 
+def _count_values(values):
+    counts = {}
+    for value in values:
+        for item in value if isinstance(value, list) else [value]:
+            counts[item] = counts.get(item, 0) + 1
+    return counts
+
+
 class SearchTestCase(unittest.TestCase):
 
     def load_expected_result():
@@ -67,6 +81,16 @@ class SearchTestCase(unittest.TestCase):
         pprint(datasets)
         self.assertEqual(expected_result, datasets)
 
+    def test_stream_datasets(self):
+        for kwargs in [{}, {"meta_field": "title"},
+                       {"exclude_meta_fields": ["distribution"]},
+                       {"filter_in": {"dataset": {"accrualPeriodicity":
+                                                  "R/P1Y"}}}]:
+            self.assertEqual(
+                pydatajson.search.get_datasets(self.catalog, **kwargs),
+                list(pydatajson.search.stream_datasets(
+                    self.catalog, **kwargs)))
+
     @load_expected_result()
     def test_distributions(self, expected_result):
         distributions = pydatajson.search.get_distributions(self.catalog)
@@ -254,6 +278,268 @@ class SearchTestCase(unittest.TestCase):
         self.assertEqual(field_location["distribution_title"],
                          "Convocatorias abiertas durante el año 2015")
 
+    def test_indexed_lookups_match_scans(self):
+        datajson = pydatajson.DataJson(self.catalog)
+        lookups = [
+            ("get_dataset", {"identifier": "99db6631-d1c9-470b-a73e-c62daa32c777"}),
+            ("get_dataset", {"title": "Sistema de contrataciones electrónicas"}),
+            ("get_dataset", {"identifier": "id_que_no_existe"}),
+            ("get_distribution", {"identifier": "1.1"}),
+            ("get_distribution", {
+                "title": "Convocatorias abiertas durante el año 2015"}),
+            ("get_distribution", {
+                "title": "Convocatorias abiertas durante el año 2015",
+                "dataset_identifier": "99db6631-d1c9-470b-a73e-c62daa32c420"}),
+            ("get_field", {"identifier": "proc12"}),
+            ("get_field", {"title": "procedimiento_id"}),
+            ("get_field", {"title": "procedimiento_id",
+                           "distribution_identifier": "1.1"}),
+            ("get_field", {"title": "procedimiento_id",
+                           "distribution_identifier": "id_que_no_existe"}),
+            ("get_theme", {"identifier": "ADJUDICACIONES"}),
+            ("get_theme", {"label": "Convocatorias"}),
+        ]
+
+        for method, kwargs in lookups:
+            self.assertEqual(
+                getattr(datajson, method)(**kwargs),
+                getattr(pydatajson.search, method)(self.catalog, **kwargs),
+                "{}({})".format(method, kwargs))
+
+    def test_indexed_lookups_detect_repetitions(self):
+        datajson = pydatajson.DataJson(self.catalog)
+        datajson["dataset"].append(copy.deepcopy(datajson["dataset"][0]))
+
+        self.assertRaises(
+            pydatajson.custom_exceptions.DatasetIdRepetitionError,
+            datajson.get_dataset, "99db6631-d1c9-470b-a73e-c62daa32c777")
+        self.assertRaises(
+            pydatajson.custom_exceptions.DistributionIdRepetitionError,
+            datajson.get_distribution, "1.1")
+        self.assertRaises(
+            pydatajson.custom_exceptions.FieldIdRepetitionError,
+            datajson.get_field, "proc12")
+
+    def test_index_is_built_once(self):
+        datajson = pydatajson.DataJson(self.catalog)
+        identifiers = [dataset["identifier"]
+                       for dataset in datajson["dataset"]]
+
+        with mock.patch.object(
+                pydatajson.search.CatalogIndex, "_build", autospec=True,
+                side_effect=pydatajson.search.CatalogIndex._build) as build:
+            for identifier in identifiers * 10:
+                self.assertEqual(datajson.get_dataset(identifier)["identifier"],
+                                 identifier)
+                # las búsquedas sin resultados no rearman el índice
+                self.assertIsNone(datajson.get_dataset("id_que_no_existe"))
+            self.assertEqual(build.call_count, 1)
+
+    def test_index_follows_catalog_changes(self):
+        datajson = pydatajson.DataJson(self.catalog)
+        self.assertIsNotNone(datajson.get_distribution("1.1"))
+
+        # nuevos datasets
+        new_dataset = copy.deepcopy(datajson["dataset"][0])
+        new_dataset["identifier"] = "nuevo"
+        new_dataset["distribution"][0]["identifier"] = "nueva"
+        datajson["dataset"].append(new_dataset)
+        self.assertIs(datajson.get_dataset("nuevo"), new_dataset)
+        self.assertIsNotNone(datajson.get_distribution("nueva"))
+
+        # identificadores modificados
+        new_dataset["identifier"] = "renombrado"
+        self.assertIsNone(datajson.get_dataset("nuevo"))
+        self.assertIs(datajson.get_dataset("renombrado"), new_dataset)
+
+        # datasets reemplazados, sin cambiar la cantidad
+        replacement = copy.deepcopy(new_dataset)
+        replacement["identifier"] = "reemplazo"
+        datajson["dataset"][-1] = replacement
+        self.assertIsNone(datajson.get_dataset("renombrado"))
+        self.assertIs(datajson.get_dataset("reemplazo"), replacement)
+
+        # entidades eliminadas
+        datajson.remove_distribution("nueva")
+        self.assertIsNone(datajson.get_distribution("nueva"))
+        datajson.remove_dataset("reemplazo")
+        self.assertIsNone(datajson.get_dataset("reemplazo"))
+
+    def test_index_invalidate(self):
+        datajson = pydatajson.DataJson(self.catalog)
+        self.assertIsNone(datajson.get_distribution("agregada"))
+
+        distribution = copy.deepcopy(datajson["dataset"][0]["distribution"][0])
+        distribution["identifier"] = "agregada"
+        datajson["dataset"][0]["distribution"].append(distribution)
+        datajson.search_index.invalidate()
+        self.assertIs(datajson.get_distribution("agregada"), distribution)
+
+        # los identificadores repetidos se detectan al rearmar el índice
+        repeated = copy.deepcopy(distribution)
+        datajson["dataset"][0]["distribution"].append(repeated)
+        datajson.search_index.invalidate()
+        self.assertRaises(
+            pydatajson.custom_exceptions.DistributionIdRepetitionError,
+            datajson.get_distribution, "agregada")
+
+    def test_catalog_assignment_invalidates_index(self):
+        datajson = pydatajson.DataJson(self.catalog)
+        datajson.get_distribution("1.1")
+
+        with mock.patch.object(datajson.search_index,
+                               "invalidate") as invalidate:
+            datajson["themeTaxonomy"] = []
+            del datajson["themeTaxonomy"]
+        self.assertEqual(invalidate.call_count, 2)
+
+    def test_iter_entities_do_not_modify_catalog(self):
+        catalog = pydatajson.readers.read_catalog(self.catalog)
+        original = copy.deepcopy(catalog)
+
+        fields = list(pydatajson.search.iter_fields(catalog))
+        distributions = list(pydatajson.search.iter_distributions(
+            catalog, exclude_meta_fields=["field"]))
+
+        self.assertEqual(catalog, original)
+        self.assertEqual(fields, pydatajson.search.get_fields(self.catalog))
+        self.assertIs(fields[0].entity,
+                      catalog["dataset"][0]["distribution"][0]["field"][0])
+        self.assertEqual(fields[0]["distribution_identifier"], "1.1")
+        self.assertNotIn("field", distributions[0])
+        self.assertEqual(distributions[0]["dataset_identifier"],
+                         "99db6631-d1c9-470b-a73e-c62daa32c777")
+        self.assertRaises(TypeError, operator.setitem, distributions[0], "a", 1)
+
+    def test_get_entities_return_catalog_dicts(self):
+        catalog = pydatajson.readers.read_catalog(self.catalog)
+        datajson = pydatajson.DataJson(self.catalog)
+        distribution = catalog["dataset"][0]["distribution"][0]
+        field = distribution["field"][0]
+
+        self.assertIs(pydatajson.search.get_distributions(catalog)[0],
+                      distribution)
+        self.assertIs(pydatajson.search.get_fields(catalog)[0], field)
+        # como siempre, se agregan los ids de las entidades que las contienen
+        self.assertEqual(distribution["dataset_identifier"],
+                         catalog["dataset"][0]["identifier"])
+        self.assertEqual(field["distribution_identifier"], "1.1")
+
+        self.assertIs(datajson.get_distribution("1.1"),
+                      datajson["dataset"][0]["distribution"][0])
+        self.assertIs(datajson.get_field("proc12"),
+                      datajson["dataset"][0]["distribution"][0]["field"][0])
+
+    def test_get_datasets_does_not_write_datasets(self):
+        class UpdateForbiddenDict(dict):
+            def update(self, *args, **kwargs):
+                raise AssertionError("no se deben escribir los datasets")
+
+        catalog = pydatajson.readers.read_catalog(self.catalog)
+        catalog["dataset"] = [UpdateForbiddenDict(dataset)
+                              for dataset in catalog["dataset"]]
+        datasets = pydatajson.search.get_datasets(catalog)
+
+        self.assertEqual(len(datasets), len(catalog["dataset"]))
+        for dataset, catalog_dataset in zip(datasets, catalog["dataset"]):
+            self.assertIs(dataset, catalog_dataset)
+
+    def test_iter_entities_filters_match_get(self):
+        filters = [
+            {"filter_in": {"dataset": {"accrualPeriodicity": "R/P1Y"}}},
+            {"filter_out": {"distribution": {"format": "PDF"}}},
+            {"filter_in": {"field": {"type": "integer"}}},
+            {"only_time_series": True},
+        ]
+        for kwargs in filters:
+            for entity in ["datasets", "distributions", "fields"]:
+                catalog = (self.catalog_ts if kwargs.get("only_time_series")
+                           else self.catalog)
+                self.assertEqual(
+                    list(getattr(pydatajson.search, "iter_" + entity)(
+                        catalog, **kwargs)),
+                    getattr(pydatajson.search, "get_" + entity)(
+                        catalog, **kwargs))
+
+    def test_filter_operators_across_levels(self):
+        fields = pydatajson.search.get_fields(
+            self.catalog,
+            filter_in={
+                "dataset": {"publisher.name__contains": "Modernización",
+                            "issued__gte": "2016-01-01"},
+                "distribution": {"format__in": ["CSV", "XLSX"]},
+                "field": {"type__in": ["integer", "number"]}
+            },
+            filter_out={"field": {"id__exists": True}})
+
+        self.assertEqual(
+            [(field["distribution_identifier"], field["title"])
+             for field in fields],
+            [("1.1", "organismo_unidad_operativa_contrataciones_id"),
+             ("1.1", "unidad_operativa_contrataciones_id")])
+
+    def test_filter_by_parent_identifiers(self):
+        distributions = pydatajson.search.get_distributions(
+            self.catalog, filter_in={"distribution": {
+                "dataset_identifier": "99db6631-d1c9-470b-a73e-c62daa32c420"}},
+            exclude_meta_fields=["field"])
+        self.assertEqual(
+            [distribution["identifier"] for distribution in distributions],
+            ["d_7d4d816f-3a40-476e-ab71-d48a3f0eb3c8"])
+
+        fields = pydatajson.search.get_fields(
+            self.catalog, filter_in={"field": {
+                "distribution_identifier__ne": "1.1"}})
+        self.assertEqual(fields, [])
+
+    def test_facets_match_meta_field_counts(self):
+        facets = pydatajson.search.facets(self.catalog)
+        self.assertEqual(sorted(facets),
+                         sorted(pydatajson.search.DEFAULT_FACETS))
+        for field in ["superTheme", "theme", "accrualPeriodicity",
+                      "language", "license"]:
+            self.assertEqual(facets[field], _count_values(
+                pydatajson.search.get_datasets(self.catalog,
+                                               meta_field=field)))
+        self.assertEqual(facets["distribution.format"], _count_values(
+            pydatajson.search.get_distributions(self.catalog,
+                                                meta_field="format")))
+        self.assertEqual(facets["publisher.name"], _count_values(
+            publisher["name"] for publisher in
+            pydatajson.search.get_datasets(self.catalog,
+                                           meta_field="publisher")))
+        self.assertEqual(facets["theme"], {
+            "contrataciones": 2, "compras": 2, "convocatorias": 2})
+
+    def test_facets_with_filters(self):
+        facets = pydatajson.search.facets(
+            self.catalog, ["theme", "distribution.format", "field.type"],
+            filter_in={"dataset": {
+                "identifier": "99db6631-d1c9-470b-a73e-c62daa32c777"}},
+            filter_out={"field": {"type": "string"}})
+
+        self.assertEqual(facets["theme"], {
+            "contrataciones": 1, "compras": 1, "convocatorias": 1})
+        self.assertEqual(facets["distribution.format"], {"CSV": 1})
+        self.assertEqual(facets["field.type"], _count_values(
+            pydatajson.search.get_fields(
+                self.catalog, meta_field="type",
+                filter_in={"field": {"distribution_identifier": "1.1"}},
+                filter_out={"field": {"type": "string"}})))
+
+    def test_facets_skip_empty_and_repeated_values(self):
+        catalog = {"dataset": [
+            {"identifier": "1", "theme": ["a", "a", "b"], "language": [],
+             "distribution": [{"identifier": "1.1", "format": ""},
+                              {"identifier": "1.2", "format": "CSV"}]},
+            {"identifier": "2", "theme": "a", "distribution": []},
+        ]}
+        self.assertEqual(
+            pydatajson.search.facets(
+                catalog, ["theme", "language", "distribution.format"]),
+            {"theme": {"a": 2, "b": 1}, "language": {},
+             "distribution.format": {"CSV": 1}})
+
 
 if __name__ == '__main__':
     nose.run(defaultTest=__name__)
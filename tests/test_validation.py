@@ -260,3 +260,249 @@ class TestDataJsonTestCase(object):
             datajson["dataset"][0]["accrualPeriodicity"] = value
             res = self.dj.is_valid_catalog(datajson)
             assert_false(res, msg=value)
+
+    def test_create_validator_is_cached(self):
+        """create_validator devuelve el mismo validador si los esquemas no
+        cambiaron, sin volver a leerlos de disco."""
+        validator = pydatajson.validation.create_validator()
+
+        with mock.patch("pydatajson.validation.readers.read_json") as read:
+            cached_validator = pydatajson.validation.create_validator()
+            read.assert_not_called()
+
+        assert_true(validator is cached_validator)
+
+    def test_create_validator_preloads_referenced_schemas(self):
+        """El RefResolver del validador resuelve las referencias a otros
+        esquemas sin consultar el sistema de archivos."""
+        validator = pydatajson.validation.create_validator()
+
+        with mock.patch.object(validator.resolver, "resolve_remote") as remote:
+            assert_true(validator.is_valid(self.catalog))
+            remote.assert_not_called()
+
+    def test_validate_catalog_with_validation_cache(self):
+        """Validar con un almacén de resultados devuelve lo mismo que sin él,
+        y reutiliza los resultados de los datasets que no cambiaron."""
+        sample_path = self.get_sample("several_assorted_errors.json")
+        validation_cache = pydatajson.cache.MemoryStore()
+        expected = self.dj.validate_catalog(sample_path)
+
+        first = self.dj.validate_catalog(
+            sample_path, validation_cache=validation_cache)
+        second = self.dj.validate_catalog(
+            sample_path, validation_cache=validation_cache)
+
+        assert_dict_equal(expected, first)
+        assert_dict_equal(expected, second)
+        assert_true(validation_cache.misses == 1)
+        assert_true(validation_cache.hits == 1)
+
+    def test_validation_cache_detects_changed_datasets(self):
+        catalog = json.load(open(self.get_sample("several_datasets.json")))
+        validation_cache = pydatajson.cache.MemoryStore()
+        self.dj.validate_catalog(catalog, validation_cache=validation_cache)
+
+        del catalog["dataset"][1]["title"]
+        res = self.dj.validate_catalog(
+            catalog, validation_cache=validation_cache)
+
+        assert_true(validation_cache.misses == len(catalog["dataset"]) + 1)
+        assert_true(res["error"]["dataset"][1]["status"] == "ERROR")
+        assert_dict_equal(res, self.dj.validate_catalog(catalog))
+
+    def test_validation_cache_persists_in_sqlite(self):
+        sample_path = self.get_sample("several_datasets.json")
+        cache_path = os.path.join(self.TEMP_DIR, "validation_cache.sqlite")
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+
+        first_cache = pydatajson.cache.SQLiteStore(cache_path)
+        expected = self.dj.validate_catalog(
+            sample_path, validation_cache=first_cache)
+        first_cache.close()
+
+        second_cache = pydatajson.cache.SQLiteStore(cache_path)
+        res = self.dj.validate_catalog(
+            sample_path, validation_cache=second_cache)
+        second_cache.close()
+        os.remove(cache_path)
+
+        assert_dict_equal(expected, res)
+        assert_true(second_cache.misses == 0)
+
+    def test_validate_catalog_with_workers(self):
+        """Validar repartiendo los datasets entre procesos devuelve lo mismo
+        que validar en un único proceso."""
+        multiprocessing = pydatajson.validation.multiprocessing
+        for sample in ["several_datasets.json", "repeated_downloadURL.json",
+                       "several_assorted_errors.json"]:
+            sample_path = self.get_sample(sample)
+            expected = self.dj.validate_catalog(sample_path)
+            # sin el memo, la segunda validación no reutiliza la primera
+            pydatajson.validation.invalidate_validation_memo()
+            with mock.patch.object(multiprocessing, "Pool",
+                                   wraps=multiprocessing.Pool) as pool:
+                res = self.dj.validate_catalog(sample_path, workers=2)
+            assert_dict_equal(expected, res)
+            # los catálogos de un único dataset se validan en este proceso
+            if sample == "several_datasets.json":
+                assert_true(pool.called)
+
+    def test_validate_catalog_with_workers_spawned(self):
+        """Los procesos que no heredan la memoria del proceso principal
+        (Windows, macOS) reconstruyen el validador de cada motor."""
+        import multiprocessing
+        sample_path = self.get_sample("several_datasets.json")
+        spawn_pool = multiprocessing.get_context("spawn").Pool
+        for engine in pydatajson.validation.VALIDATION_ENGINES:
+            validator = pydatajson.validation.create_validator(engine=engine)
+            expected = pydatajson.validation.validate_catalog(
+                sample_path, validator=validator)
+            pydatajson.validation.invalidate_validation_memo()
+            with mock.patch.object(pydatajson.validation.multiprocessing,
+                                   "Pool", side_effect=spawn_pool) as pool:
+                res = pydatajson.validation.validate_catalog(
+                    sample_path, validator=validator, workers=2)
+            assert_true(pool.called)
+            assert_dict_equal(expected, res)
+
+    def test_validate_catalog_with_errors_budget(self):
+        """Los errores que superan los límites no se reportan, pero se
+        cuentan y siguen marcando los status."""
+        sample_path = self.get_sample("several_assorted_errors.json")
+        full = self.dj.validate_catalog(sample_path)
+        catalog_errors = full["error"]["catalog"]["errors"]
+        datasets_errors = [dataset["errors"]
+                           for dataset in full["error"]["dataset"]]
+
+        res = self.dj.validate_catalog(sample_path, max_errors_per_dataset=1)
+        for dataset, errors in zip(res["error"]["dataset"], datasets_errors):
+            assert_true(dataset["errors"] == errors[:1])
+            assert_true(dataset.get("omitted_errors", 0) ==
+                        max(len(errors) - 1, 0))
+        assert_true(res["error"]["catalog"]["errors"] == catalog_errors[:1])
+
+        res = self.dj.validate_catalog(sample_path, max_total_errors=0)
+        assert_true(res["status"] == "ERROR")
+        for dataset, full_dataset in zip(res["error"]["dataset"],
+                                         full["error"]["dataset"]):
+            assert_true(dataset["status"] == full_dataset["status"])
+            assert_true(dataset["errors"] == [])
+
+    def test_iter_validate_catalog(self):
+        """iter_validate_catalog genera los mismos resultados que
+        validate_catalog, primero los datasets y al final el catálogo."""
+        for sample in ["several_datasets.json", "repeated_downloadURL.json",
+                       "several_assorted_errors.json"]:
+            sample_path = self.get_sample(sample)
+            expected = self.dj.validate_catalog(sample_path)
+            results = list(
+                pydatajson.validation.iter_validate_catalog(sample_path))
+
+            assert_true(results[-1] == ("catalog",
+                                        expected["error"]["catalog"]))
+            assert_true(results[:-1] == [
+                ("dataset", dataset)
+                for dataset in expected["error"]["dataset"]])
+
+    def test_iter_validate_catalog_logs_custom_checks_failures(self):
+        """Si fallan las validaciones propias de pydatajson, se registra una
+        advertencia en el logger del módulo, sin imprimir nada."""
+        sample_path = self.get_sample("several_datasets.json")
+
+        with mock.patch("pydatajson.validation._iter_dataset_custom_errors",
+                        side_effect=KeyError("distribution")), \
+                mock.patch("pydatajson.validation.logger") as logger, \
+                mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            results = list(
+                pydatajson.validation.iter_validate_catalog(sample_path))
+
+        assert_true(results[-1][0] == "catalog")
+        assert_true(logger.warning.call_count == 1)
+        assert_true(stdout.getvalue() == "")
+
+    def test_validate_catalog_streaming_export(self):
+        sample_path = self.get_sample("several_assorted_errors.json")
+        export_path = os.path.join(self.TEMP_DIR, "streaming_report.csv")
+        self.dj.validate_catalog(sample_path, export_path=export_path,
+                                 streaming=True)
+
+        expected = self.dj.validate_catalog(sample_path, fmt="list")
+        for table_name in ["catalog", "dataset"]:
+            table_path = os.path.join(
+                self.TEMP_DIR, "streaming_report_{}.csv".format(table_name))
+            table = pydatajson.readers.read_table(table_path)
+            assert_true([row["{}_error_message".format(table_name)]
+                         for row in table] ==
+                        [row["{}_error_message".format(table_name)]
+                         for row in expected[table_name]])
+
+    def test_is_valid_catalog_stops_at_first_error(self):
+        """Si falta un campo obligatorio, is_valid_catalog no chequea formatos
+        ni corre las validaciones propias de pydatajson."""
+        sample_path = self.get_sample("missing_catalog_title.json")
+        validator = pydatajson.validation.create_validator()
+
+        with mock.patch.object(validator.format_checker, "check") as check, \
+                mock.patch("pydatajson.validation.iter_custom_errors") as \
+                custom_errors:
+            assert_false(pydatajson.validation.is_valid_catalog(
+                sample_path, validator=validator))
+            check.assert_not_called()
+            custom_errors.assert_not_called()
+
+    def test_is_valid_catalog_checks_valid_catalogs_once(self):
+        """Con un catálogo válido, is_valid_catalog evalúa las mismas
+        palabras clave del esquema que una única validación completa."""
+        catalog = pydatajson.readers.read_catalog(
+            self.get_sample("full_data.json"))
+        validator = pydatajson.validation.create_validator()
+        keywords = validator.VALIDATORS
+        calls = []
+
+        def counted(keyword, function):
+            def validate(*args, **kwargs):
+                calls.append(keyword)
+                return function(*args, **kwargs)
+            return validate
+
+        with mock.patch.dict(keywords, {
+                keyword: counted(keyword, function)
+                for keyword, function in iteritems(keywords)}):
+            assert_true(validator.is_valid(catalog))
+            expected = sorted(calls)
+            del calls[:]
+            assert_true(pydatajson.validation.is_valid_catalog(
+                catalog, validator=validator))
+
+        assert_true(sorted(calls) == expected)
+
+    def test_is_valid_catalog_matches_validate_catalog(self):
+        for sample in ["full_data.json", "minimum_data.json",
+                       "malformed_email.json", "malformed_uri.json",
+                       "invalid_dataset_theme_type.json",
+                       "repeated_downloadURL.json",
+                       "mismatched_fileName_and_format.json"]:
+            sample_path = self.get_sample(sample)
+            expected = self.dj.validate_catalog(sample_path)["status"] == "OK"
+            assert_true(self.dj.is_valid_catalog(sample_path) == expected)
+
+    def test_format_checker_remembers_checked_values(self):
+        """El FormatChecker del validador chequea una única vez cada valor
+        repetido, y sigue reportando los valores inválidos."""
+        format_checker = pydatajson.validation.CachedFormatChecker()
+
+        for _ in range(3):
+            assert_true(format_checker.conforms("2016-04-14", "date"))
+            assert_false(format_checker.conforms("14/04/2016", "date"))
+
+        stats = format_checker.stats()
+        assert_true(stats["date"]["misses"] == 2)
+        assert_true(stats["date"]["hits"] == 4)
+        assert_true(stats["all"]["hit_rate"] == 4.0 / 6)
+
+    def test_create_validator_uses_cached_format_checker(self):
+        validator = pydatajson.validation.create_validator()
+        assert_true(isinstance(validator.format_checker,
+                               pydatajson.validation.CachedFormatChecker))